@@ -1,6 +1,11 @@
-from pygame import Vector2, Vector3
+import copy
 
+from environments.vecmath import Vector2, Vector3
+
+from environments.control import ControlIntent
 from environments.piece import PieceType
+from environments.robots.armplanner import planArmMotion
+import constants
 
 class Pathfollow:
     def __init__(self, robot, env):
@@ -8,12 +13,36 @@ class Pathfollow:
         self.robot = robot
         self.commands = []
         self.index = 0
+        self.armPlan = None
+
+    # copy bound to a forked robot/environment (see Environment.copy)
+    def copy(self, robot, env):
+        clone = copy.copy(self)
+        clone.robot = robot
+        clone.env = env
+        clone.commands = list(self.commands)
+        return clone
+
+    # the same routine for the other alliance, with every target and heading mirrored across the center line
+    def mirrored(self, robot, env):
+        clone = self.copy(robot, env)
+        for index, (target, value) in enumerate(clone.commands):
+            if isinstance(target, Vector3):
+                clone.commands[index] = (constants.flipPoint(target), -value)
+            elif isinstance(target, Vector2):
+                clone.commands[index] = (Vector2(target.x, constants.FIELD_HEIGHT - target.y), -value)
+        return clone
 
     def addPath(self, targetPos, targetRot):
         self.commands.append((targetPos, targetRot))
 
     def addMoveArm(self, height, dist):
-        self.commands.append((dist, height))
+        self.addMoveJoints({"elevator": height, "laterator": dist})
+
+    # moves every named joint to its target together, see armplanner. Targets are clamped to the joint limits at the
+    # target configuration, so an elbow limited relative to its shoulder may go as far as the shoulder's target allows
+    def addMoveJoints(self, targets):
+        self.commands.append((dict(targets), None))
 
     def addDrop(self, time):
         self.commands.append((None, time))
@@ -23,23 +52,40 @@ class Pathfollow:
         self.commands.append((newPiece, None))
 
     def runCommand(self):
+        intent = self.decide(self.env.observe(self.robot))
+        self.commit(intent)
+        self.env.applyIntent(self.robot, intent)
+
+        if self.index == len(self.commands):
+            return False
+        return True
+
+    # pure function of the routine and `view`, so Environment.tick can run it in a worker pool
+    def decide(self, view):
+        intent = ControlIntent()
         if isinstance(self.commands[self.index][0], Vector3) or isinstance(self.commands[self.index][0], Vector2):
-            self.driveToTarget()
+            self.driveToTarget(view, intent)
 
-        elif isinstance(self.commands[self.index][0], float):
-            self.moveArm()
+        elif isinstance(self.commands[self.index][0], dict):
+            self.moveArm(view, intent)
 
         elif self.commands[self.index][0] is None:
-            self.drop()
+            self.drop(intent)
 
         elif isinstance(self.commands[self.index][0], PieceType):
-            self.changePieceType()
+            self.changePieceType(intent)
+        return intent
 
-        if self.index == len(self.commands):
-            return False
-        return True
+    def commit(self, intent):
+        if intent.dropTick:
+            self.dropTime += 1
+        if intent.plan is not None:
+            self.armPlan = intent.plan
+        if intent.advance:
+            self.armPlan = None
+        self.index += intent.advance
 
-    def driveToTarget(self):
+    def driveToTarget(self, view, intent):
 
         target = self.commands[self.index][0]
         rot = self.commands[self.index][1]
@@ -47,37 +93,43 @@ class Pathfollow:
         if isinstance(target, Vector3):
             target = Vector2(target.x, target.y)
 
-        delta = target - self.robot.pos
+        delta = target - view.pos
 
         
 
         delta *= 1.5
-        self.robot.setTargetVel(delta)
+        intent.targetVel = delta
 
-        angDelta = rot - self.robot.theta
+        angDelta = rot - view.theta
         angDelta *= 2
-        self.robot.setTargetRotSpeed(angDelta)
+        intent.rotSpeed = angDelta
 
         if delta.magnitude() < 1.5 and abs(angDelta) < 3:
-            self.index += 1
-
-        if self.index == len(self.commands):
-            return False
-        return True
+            intent.advance = 1
     
-    def moveArm(self):
-        self.robot.elevator.height = self.commands[self.index][1]
-        self.robot.laterator.height = self.commands[self.index][0]
-
-        self.index += 1
-
-    def drop(self):
-        self.robot.drop()
-        self.dropTime += 1
-        if self.dropTime > self.commands[self.index][1]:
-            self.index += 1
-            self.robot.runIntake()
-
-    def changePieceType(self):
-        self.env.pieceToAdd = self.commands[self.index][0]
-        self.index += 1
\ No newline at end of file
+    def moveArm(self, view, intent):
+        plan = self.armPlan
+        if plan is None:
+            plan = intent.plan = planArmMotion(view.joints, self.commands[self.index][0], view.time, view.relativeLimits)
+        intent.jointVelocities = plan.velocities(view.joints, view.time, view.dt)
+        if plan.finished(view.joints, view.time):
+            intent.jointVelocities = dict.fromkeys(plan.profiles, 0)
+            intent.advance = 1
+
+    def drop(self, intent):
+        intent.drop = True
+        intent.dropTick = True
+        if self.dropTime + 1 > self.commands[self.index][1]:
+            intent.advance = 1
+            intent.runIntake = True
+
+    def changePieceType(self, intent):
+        intent.pieceToAdd = self.commands[self.index][0]
+        intent.advance = 1
+
+    # the controller travels to worker processes without its robot and environment
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("robot", None)
+        state.pop("env", None)
+        return state
@@ -1,5 +1,5 @@
 from environments.piece import NodeType
-from pygame import Vector2, Vector3
+from environments.vecmath import Vector2, Vector3
 
 FIELD_WIDTH = 315.5
 FIELD_HEIGHT = 651.25
@@ -47,6 +47,9 @@ class FIELD_CONSTANTS:
     [Vector3(193.75, 47, 0), NodeType.HYBRID]
     ]
 
+    # blue's grid mirrors red's across the field's center line
+    BLUE_SCORING_LOCATIONS = [[flipPoint(location), nodeType] for location, nodeType in SCORING_LOCATIONS]
+
     BLUE_SUBSTATION_LEFT = Vector3(240, 7, 42)
     BLUE_SUBSTATION_RIGHT = Vector3(280, 7, 42)
     RED_SUBSTATION_LEFT = flipPoint(BLUE_SUBSTATION_LEFT)
@@ -0,0 +1,335 @@
+"""Determinism checks: per-tick state hashes and first-divergence reports between simulation engines.
+
+Every tick the full simulation state (robot poses and velocities, every joint's value and rate, every piece's
+position, velocity, type, scored flag and holder, both grids, the score and the match clock) is flattened into named
+fields. A Trace keeps a rolling hash over them (each tick's hash covers every tick before it) and, optionally, the
+values themselves, so two runs can be compared tick by tick and the report names the first field that differs.
+
+    reference = runScenario("main")                         # Environment.update, the reference engine
+    reference.save("golden/main.json.gz")
+    candidate = runScenario("main", engine="vector")        # environments.vecenv, one environment
+    print(firstDivergence(Trace.load("golden/main.json.gz"), candidate))
+    print(firstDivergence(reference, candidate, mode="absolute", tolerance=1e-9))
+    print(compareEngines("main", "reference", "adaptive"))  # lock step, stops at the first difference
+
+Scenarios are builders returning (env, pathing), like main.buildMatch. Every engine plays the routine as a match
+(auto, then teleop, as Match.step does) until the routine or the match ends. The vector engine is driven by the
+commands the routine gives the reference engine, so it checks the batched physics step rather than the controller.
+
+Comparison modes: "exact" (bit for bit, decided by the hashes), "absolute" (|a - b| <= tolerance), "relative"
+(|a - b| <= tolerance * max(|a|, |b|)) and "ulps" (at most `tolerance` representable doubles apart). Hashes depend on
+the platform's libm, so golden traces are only comparable on the platform that recorded them.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import struct
+
+from environments.environment import MatchMode, NODE_ALLIANCES
+from match import stepEnvironment
+
+MODES = ("exact", "absolute", "relative", "ulps")
+MATCH_MODES = {MatchMode.AUTO: 0, MatchMode.TELEOP: 1, MatchMode.DISABLED: 2} # environments.vecenv's numbering
+DOUBLE = struct.Struct("<d")
+
+
+def mainScenario():
+    from main import buildMatch
+    return buildMatch()
+
+
+SCENARIOS = {"main": mainScenario}
+
+
+def stateFields(env):
+    pieceIndex = {id(piece): index for index, piece in enumerate(env.pieces)}
+    robotIndex = {id(robot): index for index, robot in enumerate(env.robots)}
+    fields = []
+    for index, robot in enumerate(env.robots):
+        name = f"robot{index}."
+        fields += [(name + "x", robot.pos.x), (name + "y", robot.pos.y), (name + "theta", robot.theta),
+                   (name + "vx", robot.velocity.x), (name + "vy", robot.velocity.y), (name + "dtheta", robot.dtheta),
+                   (name + "intaking", robot.intaking),
+                   (name + "holding", pieceIndex[id(robot.pieceHeld)] if robot.pieceHeld is not None else -1)]
+        if robot.CHAIN is not None:
+            for joint in robot.CHAIN.joints:
+                value, rate = getattr(robot, joint.name).getJointState()[:2]
+                fields += [(name + joint.name, value), (name + joint.name + "Rate", rate)]
+    for index, piece in enumerate(env.pieces):
+        name = f"piece{index}."
+        fields += [(name + "x", piece.pos.x), (name + "y", piece.pos.y), (name + "z", piece.pos.z),
+                   (name + "vx", piece.vel.x), (name + "vy", piece.vel.y), (name + "vz", piece.vel.z),
+                   (name + "type", piece.type.value), (name + "scored", piece.scored),
+                   (name + "holder", robotIndex[id(piece.holder)] if piece.holder is not None else -1)]
+    for alliance in NODE_ALLIANCES:
+        for level, row in enumerate(env.scoring.grid[alliance]):
+            fields += [(f"grid.{alliance}.{level}.{column}", node) for column, node in enumerate(row)]
+        fields.append((f"score.{alliance}", env.scoring.score[alliance]))
+    fields += [("mode", MATCH_MODES[env.mode]), ("timeRemaining", env.timeRemaining), ("time", env.time)]
+    return fields
+
+
+# the same fields for one environment of a VectorEnvironment, pieces in creation order like Environment.pieces
+def vectorStateFields(vec, row=0):
+    s = vec.state
+    active = [index for index in range(vec.capacity) if s["pieceActive"][row, index]]
+    active.sort(key=lambda index: s["pieceSerial"][row, index])
+    order = {slot: index for index, slot in enumerate(active)}
+    fields = []
+    joint = 0
+    for index in range(vec.robotCount):
+        name = f"robot{index}."
+        held = int(s["held"][row, index])
+        fields += [(name + "x", s["pos"][row, index, 0]), (name + "y", s["pos"][row, index, 1]),
+                   (name + "theta", s["theta"][row, index]), (name + "vx", s["vel"][row, index, 0]),
+                   (name + "vy", s["vel"][row, index, 1]), (name + "dtheta", s["dtheta"][row, index]),
+                   (name + "intaking", s["intaking"][row, index]), (name + "holding", order[held] if held >= 0 else -1)]
+        while joint < len(vec.joints) and vec.joints[joint][0] == index:
+            jointName = vec.joints[joint][2].name
+            fields += [(name + jointName, s["jointValue"][row, joint]), (name + jointName + "Rate", s["jointRate"][row, joint])]
+            joint += 1
+    for index, slot in enumerate(active):
+        name = f"piece{index}."
+        fields += [(name + "x", s["piecePos"][row, 0, slot]), (name + "y", s["piecePos"][row, 1, slot]),
+                   (name + "z", s["piecePos"][row, 2, slot]), (name + "vx", s["pieceVel"][row, 0, slot]),
+                   (name + "vy", s["pieceVel"][row, 1, slot]), (name + "vz", s["pieceVel"][row, 2, slot]),
+                   (name + "type", s["pieceType"][row, slot]), (name + "scored", s["pieceScored"][row, slot]),
+                   (name + "holder", s["pieceHolder"][row, slot])]
+    for alliance, allianceName in enumerate(NODE_ALLIANCES):
+        for level in range(3):
+            fields += [(f"grid.{allianceName}.{level}.{column}", s["grid"][row, alliance, level, column]) for column in range(9)]
+        fields.append((f"score.{allianceName}", s["score"][row, alliance]))
+    fields += [("mode", s["mode"][row]), ("timeRemaining", s["timeRemaining"][row]), ("time", s["time"][row])]
+    return [(name, float(value)) for name, value in fields]
+
+
+class Trace:
+    """Rolling state hashes of a run, one per tick, with the field values when keepValues is set."""
+
+    def __init__(self, scenario=None, engine=None, keepValues=True):
+        self.scenario = scenario
+        self.engine = engine
+        self.keepValues = keepValues
+        self.hashes = []
+        self.layouts = [] # distinct lists of field names
+        self.layoutIndex = {}
+        self.ticks = [] # layout of each tick
+        self.values = []
+        self.digest = hashlib.blake2b(digest_size=16)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def layoutOf(self, names):
+        index = self.layoutIndex.get(names)
+        if index is None:
+            index = self.layoutIndex[names] = len(self.layouts)
+            self.layouts.append(list(names))
+        return index
+
+    def append(self, fields):
+        names = tuple(name for name, _ in fields)
+        values = [float(value) for _, value in fields]
+        digest = self.digest
+        digest.update("\0".join(names).encode())
+        digest.update(struct.pack(f"<{len(values)}d", *values))
+        self.hashes.append(digest.hexdigest())
+        self.ticks.append(self.layoutOf(names))
+        if self.keepValues:
+            self.values.append(values)
+
+    def fields(self, tick):
+        if not self.keepValues:
+            return None
+        return list(zip(self.layouts[self.ticks[tick]], self.values[tick]))
+
+    def save(self, path):
+        data = {"scenario": self.scenario, "engine": self.engine, "hashes": self.hashes, "layouts": self.layouts,
+                "ticks": self.ticks, "values": self.values if self.keepValues else None}
+        with gzip.open(path, "wt") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt") as file:
+            data = json.load(file)
+        trace = cls(data["scenario"], data["engine"], data["values"] is not None)
+        trace.hashes = data["hashes"]
+        trace.layouts = data["layouts"]
+        trace.layoutIndex = {tuple(names): index for index, names in enumerate(trace.layouts)}
+        trace.ticks = data["ticks"]
+        trace.values = data["values"] or []
+        return trace
+
+
+class Divergence:
+    __slots__ = ("tick", "field", "reference", "candidate")
+
+    def __init__(self, tick, field=None, reference=None, candidate=None):
+        self.tick = tick
+        self.field = field # None when neither side kept values, only the hashes differ
+        self.reference = reference
+        self.candidate = candidate
+
+    def __repr__(self):
+        if self.field is None:
+            return f"Divergence(tick={self.tick}, state hashes differ)"
+        return f"Divergence(tick={self.tick}, field={self.field!r}, reference={self.reference!r}, candidate={self.candidate!r})"
+
+
+def orderedBits(value):
+    bits = struct.unpack("<q", DOUBLE.pack(value))[0]
+    return bits if bits >= 0 else -(bits & 0x7fffffffffffffff)
+
+
+def close(a, b, mode, tolerance):
+    if a == b or (math.isnan(a) and math.isnan(b)):
+        return True
+    if mode == "exact":
+        return False
+    if mode == "absolute":
+        return abs(a - b) <= tolerance
+    if mode == "relative":
+        return abs(a - b) <= tolerance * max(abs(a), abs(b))
+    if mode == "ulps":
+        return abs(orderedBits(a) - orderedBits(b)) <= tolerance
+    raise ValueError(f"unknown comparison mode {mode!r}, expected one of {MODES}")
+
+
+# first differing field of one tick; a different set of fields (a piece appearing in only one run) is reported as
+# the field "<layout>"
+def compareFields(tick, reference, candidate, mode="exact", tolerance=0.):
+    for (name, a), (otherName, b) in zip(reference, candidate):
+        if name != otherName:
+            return Divergence(tick, "<layout>", name, otherName)
+        if not close(float(a), float(b), mode, tolerance):
+            return Divergence(tick, name, a, b)
+    if len(reference) != len(candidate):
+        return Divergence(tick, "<layout>", len(reference), len(candidate))
+    return None
+
+
+def firstDivergence(reference, candidate, mode="exact", tolerance=0.):
+    if mode == "exact":
+        tick = next((tick for tick, (a, b) in enumerate(zip(reference.hashes, candidate.hashes)) if a != b), None)
+        if tick is None:
+            if len(reference) != len(candidate):
+                return Divergence(min(len(reference), len(candidate)), "<length>", len(reference), len(candidate))
+            return None
+        if reference.keepValues and candidate.keepValues:
+            return compareFields(tick, reference.fields(tick), candidate.fields(tick)) or Divergence(tick)
+        return Divergence(tick)
+    if not (reference.keepValues and candidate.keepValues):
+        raise ValueError(f"{mode} comparison needs traces recorded with keepValues")
+    for tick in range(min(len(reference), len(candidate))):
+        divergence = compareFields(tick, reference.fields(tick), candidate.fields(tick), mode, tolerance)
+        if divergence is not None:
+            return divergence
+    if len(reference) != len(candidate):
+        return Divergence(min(len(reference), len(candidate)), "<length>", len(reference), len(candidate))
+    return None
+
+
+# Match.step's clock on a bare environment
+def advanceMatch(env):
+    if env.timeRemaining <= 0:
+        if env.mode == MatchMode.AUTO:
+            env.endAuto()
+        elif env.mode == MatchMode.TELEOP:
+            env.endMatch()
+
+
+def referenceTicks(env, pathing, dt=.1, tolerance=None):
+    env.startMatch()
+    while env.mode != MatchMode.DISABLED and pathing.runCommand():
+        stepEnvironment(env, dt, tolerance)
+        advanceMatch(env)
+        yield stateFields(env)
+
+
+def adaptiveTicks(env, pathing, dt=.1, tolerance=.5):
+    return referenceTicks(env, pathing, dt, tolerance)
+
+
+# the routine's commands, as issued to the reference engine, replayed as VectorEnvironment actions
+def vectorTicks(env, pathing, dt=.1):
+    import numpy as np
+    from environments.vecenv import ACTION_FIELDS, VectorEnvironment
+    env.startMatch()
+    vec = VectorEnvironment(env, 1, dt, autoReset=False)
+    vec.reset()
+    actions = np.zeros((1, vec.robotCount, vec.actionSize))
+    while env.mode != MatchMode.DISABLED and pathing.runCommand():
+        for index, robot in enumerate(env.robots):
+            row = actions[0, index]
+            row[0:3] = robot.targetVel.x, robot.targetVel.y, robot.dtheta
+            row[3] = robot.intaking
+            row[4] = robot.pieceHeld is None and vec.state["held"][0, index] >= 0
+            row[5] = env.pieceToAdd[robot.alliance].value
+            for slot, joint in enumerate(robot.CHAIN.joints):
+                row[len(ACTION_FIELDS) + slot] = getattr(robot, joint.name).targetVel
+        env.update(dt)
+        advanceMatch(env)
+        vec.step(actions)
+        yield vectorStateFields(vec)
+
+
+ENGINES = {"reference": referenceTicks, "adaptive": adaptiveTicks, "vector": vectorTicks}
+
+
+def scenarioTicks(scenario, engine="reference", **options):
+    build = SCENARIOS[scenario] if isinstance(scenario, str) else scenario
+    env, pathing = build()
+    return ENGINES[engine](env, pathing, **options)
+
+
+def runScenario(scenario, engine="reference", keepValues=True, **options):
+    trace = Trace(scenario if isinstance(scenario, str) else scenario.__name__, engine, keepValues)
+    for fields in scenarioTicks(scenario, engine, **options):
+        trace.append(fields)
+    return trace
+
+
+# runs two engines side by side and stops at the first tick where they disagree
+def compareEngines(scenario, reference="reference", candidate="vector", mode="exact", tolerance=0.):
+    tick = -1
+    referenceRun, candidateRun = scenarioTicks(scenario, reference), scenarioTicks(scenario, candidate)
+    for tick, (a, b) in enumerate(zip(referenceRun, candidateRun)):
+        divergence = compareFields(tick, a, b, mode, tolerance)
+        if divergence is not None:
+            return divergence
+    left = sum(1 for _ in referenceRun), sum(1 for _ in candidateRun)
+    if left[0] != left[1]:
+        return Divergence(tick + 1 + min(left), "<length>", tick + 1 + left[0], tick + 1 + left[1])
+    return None
+
+
+# python determinism.py record main golden/main.json.gz
+# python determinism.py check main golden/main.json.gz --engine vector --mode absolute --tolerance 1e-9
+# python determinism.py compare main --engine adaptive
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("record", "check", "compare"))
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("trace", nargs="?", help="golden trace file (record, check)")
+    parser.add_argument("--engine", default="reference", choices=sorted(ENGINES))
+    parser.add_argument("--mode", default="exact", choices=MODES)
+    parser.add_argument("--tolerance", type=float, default=0.)
+    parser.add_argument("--hashes-only", action="store_true", help="record hashes without field values")
+    args = parser.parse_args()
+    if args.command != "compare" and args.trace is None:
+        parser.error(f"{args.command} needs a trace file")
+    if args.command == "record":
+        trace = runScenario(args.scenario, args.engine, keepValues=not args.hashes_only)
+        trace.save(args.trace)
+        print(f"{len(trace)} ticks, final hash {trace.hashes[-1]}")
+    else:
+        if args.command == "check":
+            divergence = firstDivergence(Trace.load(args.trace), runScenario(args.scenario, args.engine), args.mode, args.tolerance)
+        else:
+            divergence = compareEngines(args.scenario, "reference", args.engine, args.mode, args.tolerance)
+        print(divergence or "no divergence")
+        raise SystemExit(divergence is not None)
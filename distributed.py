@@ -0,0 +1,249 @@
+"""Sweeps across machines: a coordinator serves a SweepQueue over TCP and workers anywhere pull jobs from it.
+
+The coordinator is the only process touching the SQLite file. Workers connect, are told which job function to run
+("module:function", importable on the worker) and how its results are packed, then pull batches of jobs and stream
+results back as fixed-size binary records. Each worker keeps at most one request in flight, asked for while it runs
+its current batch, so the coordinator never sends more work than a worker has room for and network latency hides
+behind simulation time. Workers can join at any point; when one disconnects or dies its unfinished jobs go straight
+back to the queue.
+
+    # coordinator (owns out/sweep.sqlite, filled with SweepQueue.addJobs)
+    serveSweep("out/sweep.sqlite", "studies.arm:trial", port=5555)
+    # on every worker machine
+    runWorkers(("coordinator-host", 5555), processes=os.cpu_count())
+
+or from a shell: `python distributed.py serve out/sweep.sqlite studies.arm:trial --port 5555` and
+`python distributed.py work coordinator-host:5555`. The job function takes the job's parameter dict and returns a
+sequence of numbers matching `resultFormat` (struct codes, two 32-bit ints such as the red and blue score by default),
+stored as the job's result.
+
+Frames are a 5 byte header (payload length, frame type) followed by the payload:
+HELLO/WELCOME/JOBS/ERRORS carry JSON, REQUEST a job count, RESULTS packed (job id, seconds, values...) records,
+WAIT the seconds to wait before asking again (other workers still hold the last jobs) and DONE nothing.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from sweep import SweepQueue, nextBatchSize
+
+HEADER = struct.Struct("!IB")
+COUNT = struct.Struct("!I")
+SECONDS = struct.Struct("!d")
+HELLO, WELCOME, REQUEST, JOBS, RESULTS, ERRORS, WAIT, DONE = range(1, 9)
+RESULT_FORMAT = "ii"
+WAIT_SECONDS = 1.
+
+
+def resultStruct(resultFormat):
+    return struct.Struct("!qd" + resultFormat)
+
+
+def sendFrame(sock, kind, payload=b""):
+    sock.sendall(HEADER.pack(len(payload), kind) + payload)
+
+
+# (kind, payload), or (None, b"") once the peer has closed the connection
+def readFrame(reader):
+    header = reader.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None, b""
+    length, kind = HEADER.unpack(header)
+    payload = reader.read(length)
+    if len(payload) < length:
+        return None, b""
+    return kind, payload
+
+
+def loadFunction(spec):
+    module, name = spec.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, path, function, address=("0.0.0.0", 0), resultFormat=RESULT_FORMAT, maxAttempts=3,
+                 lease=3600, maxBatch=1000):
+        self.queue = SweepQueue(path, maxAttempts, lease)
+        self.function = function
+        self.resultFormat = resultFormat
+        self.records = resultStruct(resultFormat)
+        self.maxBatch = maxBatch
+        self.lock = threading.Lock() # one SQLite connection shared by the connection threads
+        self.finished = threading.Event()
+        self.workerCount = 0
+        super().__init__(address, WorkerHandler)
+
+    def nextWorkerName(self, peer):
+        with self.lock:
+            self.workerCount += 1
+            return f"{peer[0]}:{peer[1]}#{self.workerCount}"
+
+    def claim(self, worker, count):
+        with self.lock:
+            jobs = self.queue.claim(worker, min(count, self.maxBatch))
+            if jobs:
+                return jobs, None
+            progress = self.queue.progress()
+        if progress["claimed"] == 0:
+            self.finished.set()
+            return jobs, DONE
+        return jobs, WAIT
+
+    def complete(self, worker, done, failed):
+        with self.lock:
+            self.queue.complete(worker, done, failed)
+
+    # a worker that disconnects with jobs in hand may have been killed by one of them, so the attempt counts
+    def release(self, worker):
+        with self.lock:
+            self.queue.release(worker, refund=False)
+
+    # serves until every job is done or failed, then tells each worker as it next asks for work
+    def run(self, poll=.5):
+        thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": poll}, daemon=True)
+        thread.start()
+        try:
+            with self.lock:
+                progress = self.queue.progress()
+            if progress["pending"] + progress["claimed"] > 0:
+                self.finished.wait()
+        finally:
+            self.shutdown()
+            self.server_close()
+            thread.join()
+        with self.lock:
+            return self.queue.progress()
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        worker = server.nextWorkerName(self.client_address)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            kind, payload = readFrame(self.rfile)
+            if kind != HELLO:
+                return
+            sendFrame(self.request, WELCOME, json.dumps({"worker": worker, "function": server.function,
+                                                         "resultFormat": server.resultFormat}).encode())
+            while True:
+                kind, payload = readFrame(self.rfile)
+                if kind is None:
+                    return
+                if kind == REQUEST:
+                    jobs, status = server.claim(worker, COUNT.unpack(payload)[0])
+                    if status == DONE:
+                        sendFrame(self.request, DONE)
+                    elif status == WAIT:
+                        sendFrame(self.request, WAIT, SECONDS.pack(WAIT_SECONDS))
+                    else:
+                        sendFrame(self.request, JOBS, json.dumps([[job.id, job.params] for job in jobs]).encode())
+                elif kind == RESULTS:
+                    done = [(id, values, seconds) for id, seconds, *values in server.records.iter_unpack(payload)]
+                    server.complete(worker, done, ())
+                elif kind == ERRORS:
+                    server.complete(worker, (), [tuple(error) for error in json.loads(payload)])
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            server.release(worker)
+
+
+def serveSweep(path, function, host="0.0.0.0", port=5555, **options):
+    with Coordinator(path, function, (host, port), **options) as coordinator:
+        return coordinator.run()
+
+
+# one worker connection: run batches until the coordinator says the sweep is done. Returns the number of jobs run.
+def workerLoop(address, maxOverhead=.01, maxBatch=1000):
+    sock = socket.create_connection(tuple(address))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    reader = sock.makefile("rb")
+    try:
+        sendFrame(sock, HELLO, json.dumps({"pid": os.getpid(), "host": socket.gethostname()}).encode())
+        kind, payload = readFrame(reader)
+        if kind != WELCOME:
+            raise ConnectionError("coordinator did not accept the worker")
+        welcome = json.loads(payload)
+        function = loadFunction(welcome["function"])
+        records = resultStruct(welcome["resultFormat"])
+        batch = 1
+        count = 0
+        sendFrame(sock, REQUEST, COUNT.pack(batch))
+        while True:
+            blocked = time.perf_counter()
+            kind, payload = readFrame(reader)
+            blocked = time.perf_counter() - blocked
+            if kind is None or kind == DONE:
+                return count
+            if kind == WAIT:
+                time.sleep(SECONDS.unpack(payload)[0])
+                sendFrame(sock, REQUEST, COUNT.pack(batch))
+                continue
+            jobs = json.loads(payload)
+            # ask for the next batch before running this one
+            sendFrame(sock, REQUEST, COUNT.pack(batch))
+            results, errors = [], []
+            started = time.perf_counter()
+            for id, params in jobs:
+                jobStart = time.perf_counter()
+                try:
+                    values = function(params)
+                    results.append(records.pack(id, time.perf_counter() - jobStart, *values))
+                except Exception:
+                    errors.append((id, traceback.format_exc()))
+            ran = time.perf_counter() - started
+            if results:
+                sendFrame(sock, RESULTS, b"".join(results))
+            if errors:
+                sendFrame(sock, ERRORS, json.dumps(errors).encode())
+            count += len(jobs)
+            # time spent blocked on the coordinator against the time one job takes
+            batch = nextBatchSize(blocked, ran / len(jobs), maxOverhead, maxBatch)
+    finally:
+        reader.close()
+        sock.close()
+
+
+def runWorkers(address, processes=1, **options):
+    if processes <= 1:
+        return workerLoop(address, **options)
+    with ProcessPoolExecutor(processes) as executor:
+        futures = [executor.submit(workerLoop, address, **options) for _ in range(processes)]
+        return sum(future.result() for future in futures)
+
+
+def parseAddress(text):
+    host, port = text.rsplit(":", 1)
+    return host, int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="serve a sweep queue to workers")
+    serve.add_argument("queue")
+    serve.add_argument("function", help="job function as module:function")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=5555)
+    serve.add_argument("--result-format", default=RESULT_FORMAT)
+    work = commands.add_parser("work", help="run jobs from a coordinator")
+    work.add_argument("address", type=parseAddress, help="host:port")
+    work.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.command == "serve":
+        print(serveSweep(args.queue, args.function, args.host, args.port, resultFormat=args.result_format))
+    else:
+        print(runWorkers(args.address, args.processes), "jobs run")
@@ -0,0 +1,30 @@
+"""Match simulation core. Names below are loaded on first use, so importing the package (as every sweep worker
+does) does not pull in submodules it never touches; pygame windows live in environments.visualization."""
+
+import importlib
+
+_EXPORTS = {
+    "Environment": "environments.environment",
+    "MatchMode": "environments.environment",
+    "Piece": "environments.piece",
+    "PieceType": "environments.piece",
+    "NodeType": "environments.piece",
+    "Vector2": "environments.vecmath",
+    "Vector3": "environments.vecmath",
+    "VectorEnvironment": "environments.vecenv",
+    "IntentRecorder": "environments.teleop",
+    "ReplayController": "environments.teleop",
+    "readIntentLog": "environments.teleop",
+    "replaySession": "environments.teleop",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
@@ -0,0 +1,62 @@
+"""Batched 2D/3D vector math over NumPy arrays.
+
+The array counterpart of environments.vecmath: vectors are the rows of an (N, 2) or (N, 3) array and angles are
+(N,) arrays (or scalars) in degrees. Rotations use the same convention and the same exact results at multiples of
+90 degrees as the scalar Vector2/Vector3, so a batched pass agrees with stepping the scalar types one by one.
+"""
+
+import numpy as np
+
+from environments.vecmath import EPSILON
+
+
+# cos and sin of angles in degrees, exact at multiples of 90 degrees
+def trig(angles):
+    angles = np.mod(np.asarray(angles, dtype=float), 360.)
+    cos = np.cos(angles * np.pi / 180.)
+    sin = np.sin(angles * np.pi / 180.)
+    quarter = np.mod(angles + EPSILON, 90.) < 2 * EPSILON
+    if quarter.any():
+        turns = (((angles + EPSILON) // 90) % 4).astype(int)
+        cos = np.where(quarter, np.array([1., 0., -1., 0.])[turns], cos)
+        sin = np.where(quarter, np.array([0., 1., 0., -1.])[turns], sin)
+    return cos, sin
+
+
+# counterclockwise
+def rotate2(vectors, angles):
+    vectors = np.asarray(vectors, dtype=float)
+    cos, sin = trig(angles)
+    x, y = vectors[..., 0], vectors[..., 1]
+    return np.stack((cos * x - sin * y, sin * x + cos * y), axis=-1)
+
+
+# right-handed rotation about a single axis shared by every row
+def rotate3(vectors, angles, axis):
+    vectors = np.asarray(vectors, dtype=float)
+    a0, a1, a2 = (float(value) for value in axis)
+    axisLength2 = a0 * a0 + a1 * a1 + a2 * a2
+    if axisLength2 < EPSILON:
+        raise ValueError("Rotation Axis is to close to Zero")
+    if abs(axisLength2 - 1) > EPSILON:
+        factor = 1. / np.sqrt(axisLength2)
+        a0, a1, a2 = a0 * factor, a1 * factor, a2 * factor
+    cos, sin = trig(angles)
+    rest = 1 - cos
+    x, y, z = vectors[..., 0], vectors[..., 1], vectors[..., 2]
+    return np.stack((
+        x * (cos + a0 * a0 * rest) + y * (a0 * a1 * rest - a2 * sin) + z * (a0 * a2 * rest + a1 * sin),
+        x * (a0 * a1 * rest + a2 * sin) + y * (cos + a1 * a1 * rest) + z * (a1 * a2 * rest - a0 * sin),
+        x * (a0 * a2 * rest - a1 * sin) + y * (a1 * a2 * rest + a0 * sin) + z * (cos + a2 * a2 * rest)), axis=-1)
+
+
+def lengths(vectors):
+    vectors = np.asarray(vectors, dtype=float)
+    return np.sqrt((vectors * vectors).sum(axis=-1))
+
+
+# rows of length zero stay zero instead of raising like Vector.normalize
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=float)
+    size = lengths(vectors)[..., None]
+    return np.divide(vectors, size, out=np.zeros_like(vectors), where=size != 0)
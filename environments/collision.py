@@ -0,0 +1,34 @@
+"""Swept (continuous) box tests, so a piece moving several inches per step cannot pass through a scoring node's
+tolerance box between two ticks, and the plain point-in-box test used for intakes."""
+
+import numpy as np
+
+
+# (P, N) bool: does the segment starts[p] -> ends[p] pass through the open box of half size `halfSizes` around
+# centers[n]. starts/ends are (P, 3), centers (N, 3). A segment with no length is a plain point-in-box test.
+def segmentsHitBoxes(starts, ends, centers, halfSizes):
+    return slabTest(starts[:, None, :], (ends - starts)[:, None, :], centers[None, :, :], halfSizes)
+
+
+# (M,) bool: the same test for M (segment, box) pairs, row by row
+def segmentsHitPairedBoxes(starts, ends, centers, halfSizes):
+    return slabTest(starts, ends - starts, centers, halfSizes)
+
+
+def slabTest(starts, delta, centers, halfSizes):
+    low = centers - halfSizes - starts
+    high = centers + halfSizes - starts
+    moving = delta != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first = low / delta
+        second = high / delta
+    # slab test: the parameter range spent inside every axis' slab, with axes that do not move already inside or never
+    enter = np.where(moving, np.minimum(first, second), -np.inf).max(axis=-1)
+    leave = np.where(moving, np.maximum(first, second), np.inf).min(axis=-1)
+    inside = (moving | ((low < 0) & (high > 0))).all(axis=-1)
+    return inside & (np.maximum(enter, 0) < np.minimum(leave, 1))
+
+
+# (P, N) bool: is points[p] inside the closed box lows[n]..highs[n]. points are (P, 3), lows/highs (N, 3).
+def pointsInBoxes(points, lows, highs):
+    return ((points[:, None, :] >= lows[None, :, :]) & (points[:, None, :] <= highs[None, :, :])).all(axis=-1)
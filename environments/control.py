@@ -0,0 +1,41 @@
+from environments.vecmath import Vector2
+
+
+# read-only view of a robot handed to controllers during the decide phase of Environment.tick
+class RobotView:
+    __slots__ = ("pos", "theta", "velocity", "holding", "alliance", "time", "dt", "joints", "relativeLimits")
+
+    # dt is the length of the environment's last step, which controllers may take as the length of the next one
+    def __init__(self, robot, time, dt=0):
+        self.pos = Vector2(robot.pos)
+        self.theta = robot.theta
+        self.velocity = Vector2(robot.velocity)
+        self.holding = robot.pieceHeld is not None
+        self.alliance = robot.alliance
+        self.time = time
+        self.dt = dt
+        self.joints = {name: getattr(robot, name).getJointState() for name in robot.subsystemSlots()}
+        # shared with the robot's KinematicChain; never modify it
+        self.relativeLimits = robot.CHAIN.relativeLimits if robot.CHAIN is not None else {}
+
+
+# everything a controller wants done to its robot this tick. Fields left at None/False are not touched.
+# `advance`, `dropTick` and `plan` are progress for the controller's own commit() and are ignored by the environment.
+class ControlIntent:
+    __slots__ = ("targetVel", "rotSpeed", "jointVelocities", "drop", "runIntake", "pieceToAdd", "advance", "dropTick", "plan")
+
+    def __init__(self):
+        self.targetVel = None
+        self.rotSpeed = None
+        self.jointVelocities = None
+        self.drop = False
+        self.runIntake = False
+        self.pieceToAdd = None
+        self.advance = 0
+        self.dropTick = False
+        self.plan = None
+
+
+# module level so process pools can pickle it
+def decideIntent(controller, view):
+    return controller.decide(view)
@@ -1,15 +1,35 @@
 # nuttpmamous natvogtion
 # algerithm
 
-import sys, pathlib
-parent_dir = str(pathlib.Path(__file__).resolve().parents[1])
-sys.path.insert(0, parent_dir)
+import copy
+import math
 from enum import Enum
-from pygame import Vector3
+from environments.vecmath import Vector3
 from constants import FIELD_CONSTANTS
 import constants
+from environments.control import RobotView, decideIntent
 from environments.piece import NodeType, Piece, PieceType
 
+SCORING_LOCATIONS = {"Red": FIELD_CONSTANTS.SCORING_LOCATIONS, "Blue": FIELD_CONSTANTS.BLUE_SCORING_LOCATIONS}
+GRAVITY = 9.8
+NODE_ALLIANCES = ("Red", "Blue")
+NODE_HALF_SIZES = (10, 8, 5) # how close (x, y, z) a piece must be to a node to score
+_scoringNodes = None
+
+
+# every node of both grids as arrays for the batched scoring test, Red's 27 first: (centers, halfSizes, types, isRed).
+# Built on first use so that importing the simulation does not load NumPy.
+def scoringNodes():
+    global _scoringNodes
+    if _scoringNodes is None:
+        import numpy as np
+        nodes = [(spot, nodeType) for alliance in NODE_ALLIANCES for spot, nodeType in SCORING_LOCATIONS[alliance]]
+        _scoringNodes = (np.array([(spot.x, spot.y, spot.z) for spot, nodeType in nodes], dtype=float),
+                         np.array(NODE_HALF_SIZES, dtype=float),
+                         np.array([nodeType.value for spot, nodeType in nodes]),
+                         np.arange(len(nodes)) < len(SCORING_LOCATIONS["Red"]))
+    return _scoringNodes
+
 class MatchMode(Enum):
         AUTO = 0
         TELEOP = 1
@@ -21,15 +41,122 @@ class Environment:
         self.robots = robots
         self.pieces = startingPieces
         for robot in robots:
-            self.pieces.append(robot.pieceHeld)
+            if robot.pieceHeld is not None:
+                self.pieces.append(robot.pieceHeld)
         self.scoring_locations = FIELD_CONSTANTS.SCORING_LOCATIONS
         self.timeRemaining = 0
         self.scoring = ScoringManager()
         self.mode = MatchMode.DISABLED
-        self.pieceToAdd = PieceType.CONE
+        self.pieceToAdd = {"Red": PieceType.CONE, "Blue": PieceType.CONE} # next piece at each alliance's substation
+        self.time = 0
+        self.lastStep = 0
+        self.wakeAll()
+
+    def snapshot(self):
+        pieceIndex = {id(piece): index for index, piece in enumerate(self.pieces)}
+        return EnvironmentSnapshot(
+            [robot.getState() for robot in self.robots],
+            [pieceIndex[id(robot.pieceHeld)] if robot.pieceHeld is not None else -1 for robot in self.robots],
+            list(self.pieces),
+            [piece.getState() for piece in self.pieces],
+            self.scoring.getState(),
+            (self.mode, self.timeRemaining, dict(self.pieceToAdd), self.time, self.lastStep))
+
+    # pieces added after the snapshot are dropped, the rest keep their identity
+    def restore(self, snapshot: "EnvironmentSnapshot"):
+        self.pieces[:] = snapshot.pieces
+        for piece, state in zip(self.pieces, snapshot.pieceStates):
+            piece.setState(state)
+            piece.holder = None
+        for robot, state, held in zip(self.robots, snapshot.robotStates, snapshot.heldPieces):
+            robot.setState(state)
+            robot.pieceHeld = self.pieces[held] if held >= 0 else None
+            if robot.pieceHeld is not None:
+                robot.pieceHeld.holder = robot
+        self.scoring.setState(snapshot.scoringState)
+        self.mode, self.timeRemaining, pieceToAdd, self.time, self.lastStep = snapshot.matchState
+        self.pieceToAdd = dict(pieceToAdd)
+        self.wakeAll()
+
+    # independent fork: new robots, pieces and scoring, with pieceHeld pointing into the new pieces
+    def copy(self):
+        clone = copy.copy(self)
+        clone.pieces = [piece.copy() for piece in self.pieces]
+        pieceIndex = {id(piece): index for index, piece in enumerate(self.pieces)}
+        clone.robots = [robot.copy(clone.pieces[pieceIndex[id(robot.pieceHeld)]] if robot.pieceHeld is not None else None)
+                        for robot in self.robots]
+        clone.scoring = self.scoring.copy()
+        clone.pieceToAdd = dict(self.pieceToAdd)
+        clone.wakeAll()
+        return clone
+
+    # Active set: only awake pieces are moved and scored. A loose piece falls asleep once a step leaves it where it
+    # was with no velocity (on the floor or at a substation), a scored piece sleeps for good, and a held piece is
+    # woken when its robot lets go. Pieces appended to self.pieces start awake; after moving pieces by hand, call
+    # wakeAll(). Waking is always safe, sleeping only skips updates that would not change anything.
+    def wakeAll(self):
+        self.held = {id(robot.pieceHeld): robot.pieceHeld for robot in self.robots if robot.pieceHeld is not None}
+        self.awake = {id(piece): piece for piece in self.pieces if not piece.scored and id(piece) not in self.held}
+        self.docked = {} # pieces inside a substation box, which addPieces keeps checking while they sleep
+        self.knownPieces = len(self.pieces)
+
+    # picks up new pieces and pieces robots have picked up or let go of since the last call
+    def trackPieces(self):
+        if len(self.pieces) > self.knownPieces:
+            for piece in self.pieces[self.knownPieces:]:
+                self.awake[id(piece)] = piece
+            self.knownPieces = len(self.pieces)
+        held = {id(robot.pieceHeld): robot.pieceHeld for robot in self.robots if robot.pieceHeld is not None}
+        if held.keys() != self.held.keys():
+            for key, piece in held.items():
+                if key not in self.held:
+                    piece.lastPos = None
+                    self.awake.pop(key, None)
+            for key, piece in self.held.items():
+                if key not in held:
+                    piece.lastPos = None
+                    if not piece.scored:
+                        self.awake[key] = piece
+        self.held = held
+
+    def observe(self, robot):
+        return RobotView(robot, self.time, self.lastStep)
+
+    # two-phase tick: every controller decides against views taken before any intent is applied, then intents are
+    # applied in controller order. Any executor (thread or process pool) therefore gives the same result as running
+    # the controllers one after another.
+    def tick(self, controllers, time_elapsed, executor=None):
+        self.applyIntents(controllers, self.gatherIntents(controllers, executor))
+        self.update(time_elapsed)
+
+    def gatherIntents(self, controllers, executor=None):
+        views = [self.observe(controller.robot) for controller in controllers]
+        if executor is None:
+            return [controller.decide(view) for controller, view in zip(controllers, views)]
+        return list(executor.map(decideIntent, controllers, views))
+
+    def applyIntents(self, controllers, intents):
+        for controller, intent in zip(controllers, intents):
+            controller.commit(intent)
+            self.applyIntent(controller.robot, intent)
+
+    def applyIntent(self, robot, intent):
+        if intent.targetVel is not None:
+            robot.setTargetVel(intent.targetVel)
+        if intent.rotSpeed is not None:
+            robot.setTargetRotSpeed(intent.rotSpeed)
+        if intent.jointVelocities is not None:
+            for name, velocity in intent.jointVelocities.items():
+                getattr(robot, name).setTargetVel(velocity)
+        if intent.drop:
+            robot.drop()
+        if intent.runIntake:
+            robot.runIntake()
+        if intent.pieceToAdd is not None:
+            self.pieceToAdd[robot.alliance] = intent.pieceToAdd
 
     def endAuto(self):
-        self.scoring.updateEndOfAuto()
+        self.scoring.updateEndOfAuto(self)
         self.initTeleop()
 
     def startMatch(self):
@@ -44,14 +171,57 @@ class Environment:
         self.mode = MatchMode.DISABLED
 
     def update(self, time_elapsed):
+        loose = None
         for robot in self.robots:
             robot.update(time_elapsed)
-            self.checkIntake(robot)
+            if robot.intaking and robot.pieceHeld is None:
+                if loose is None:
+                    loose = self.loosePieces()
+                self.checkIntake(robot, loose)
             self.checkBorders(robot)
-            for piece in self.pieces:
-                self.checkScoring(piece)
-            self.scoring.update()
-            self.movePieces(time_elapsed)
+        self.trackPieces()
+        self.checkScoring()
+        self.scoring.update()
+        self.movePieces(time_elapsed)
+        self.time += time_elapsed
+        self.lastStep = time_elapsed
+        if self.mode != MatchMode.DISABLED:
+            self.timeRemaining -= time_elapsed
+
+    # adaptive stepping: time_elapsed is split into substeps no longer than stableStep(tolerance) (and no shorter than
+    # minStep), so accelerating robots, moving joints and falling pieces get short steps while a field that is
+    # cruising or at rest takes the whole interval at once. lastStep stays the full interval, the control period.
+    def advance(self, time_elapsed, tolerance=.5, minStep=.001):
+        remaining = time_elapsed
+        while remaining > 1e-9:
+            step = min(remaining, max(self.stableStep(tolerance), minStep))
+            if remaining - step < minStep:
+                step = remaining
+            self.update(step)
+            remaining -= step
+        self.lastStep = time_elapsed
+
+    # longest step whose explicit update stays within `tolerance` (inches, or degrees for pivots) of the exact motion.
+    # An accel-limited ramp or a falling piece is off by accel * step**2 / 2, and robots may not cover more than half
+    # their frame, so border and charge station checks cannot be skipped. Scoring is swept, so pieces need no such cap.
+    def stableStep(self, tolerance):
+        self.trackPieces()
+        step = math.inf
+        for robot in self.robots:
+            if robot.velocity != robot.targetVel:
+                step = min(step, math.sqrt(2 * tolerance / robot.maxaccel))
+            speed = robot.velocity.length()
+            if speed > 0:
+                step = min(step, min(robot.frame) / 2 / speed)
+            for subsystem in robot.getSubsystems():
+                value, rate, maxRate, accel, lower, upper = subsystem.getJointState()
+                if rate != max(-maxRate, min(subsystem.targetVel, maxRate)):
+                    step = min(step, math.sqrt(2 * tolerance / accel))
+        for piece in self.awake.values():
+            if piece.pos.z <= 0 and piece.vel.z == 0:
+                continue
+            step = min(step, math.sqrt(2 * tolerance / GRAVITY))
+        return step
 
     def checkBorders(self, robot):
         # edges
@@ -96,62 +266,128 @@ class Environment:
             if robot.pos.y + robot.frame[0]/2 > constants.FIELD_HEIGHT - 56:
                 robot.pos.y = constants.FIELD_HEIGHT - (56 + robot.frame[0]/2)
 
-    def checkIntake(self, robot):
-        if robot.intaking:
-            for piece in self.pieces:
-                robot.intake(piece)
+    # pieces a robot could pick up, with their positions and types as arrays for checkIntake. Loose pieces do not
+    # move between robots' updates, so one list serves every robot in a tick.
+    def loosePieces(self):
+        import numpy as np
+        pieces = [piece for piece in self.pieces if not piece.scored and piece.holder is None]
+        positions = np.array([(piece.pos.x, piece.pos.y, piece.pos.z) for piece in pieces], dtype=float).reshape(-1, 3)
+        types = np.array([piece.type.value for piece in pieces], dtype=int)
+        return pieces, positions, types
 
-    def movePieces(self, time_elapsed):
-        for piece in self.pieces:
-            if piece.scored:
-                continue
+    # the robot takes the first loose piece (in self.pieces order) inside one of its intake boxes. The boxes are
+    # evaluated once and tested against every piece in one query.
+    def checkIntake(self, robot, loose=None):
+        if not robot.intaking or robot.pieceHeld is not None:
+            return
+        pieces, positions, types = self.loosePieces() if loose is None else loose
+        if not pieces:
+            return
+        import numpy as np
+        from environments.collision import pointsInBoxes
+        boxes = robot.getIntakeBoxes()
+        lows = np.array([(low.x, low.y, low.z) for low, _, _ in boxes], dtype=float)
+        highs = np.array([(high.x, high.y, high.z) for _, high, _ in boxes], dtype=float)
+        accepts = np.array([0 if pieceType is None else pieceType.value for _, _, pieceType in boxes])
+        inside = pointsInBoxes(positions, lows, highs) & ((accepts == 0) | (accepts[None, :] == types[:, None]))
+        for index in np.flatnonzero(inside.any(axis=1)):
+            # a robot earlier in this tick may have taken it
+            if pieces[index].holder is None:
+                robot.grab(pieces[index])
+                return
 
-            if self.pieceOnRobot(piece):
-                continue
-            
+    def movePieces(self, time_elapsed):
+        for piece in self.awake.values():
+            piece.lastPos = piece.pos.copy()
             piece.pos.x += piece.vel.x * time_elapsed
             piece.pos.y += piece.vel.y * time_elapsed
             piece.pos.z = max(piece.pos.z + piece.vel.z * time_elapsed, 0)
 
             if piece.pos.z > 0:
-                piece.vel.z -= 9.8 * time_elapsed
+                piece.vel.z -= GRAVITY * time_elapsed
             else:
                 piece.vel = Vector3(0, 0, 0)
 
         self.addPieces()
+        for key, piece in list(self.awake.items()):
+            if piece.vel.x == 0 and piece.vel.y == 0 and piece.vel.z == 0 and piece.pos == piece.lastPos:
+                del self.awake[key]
 
+    # a piece can only be in a substation box if it moved there (awake or held) or was already there (docked)
     def addPieces(self):
-        for spot in [constants.FIELD_CONSTANTS.BLUE_SUBSTATION_LEFT, constants.FIELD_CONSTANTS.BLUE_SUBSTATION_RIGHT, constants.FIELD_CONSTANTS.RED_SUBSTATION_LEFT, constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT]:
+        candidates = {**self.docked, **self.awake, **self.held}
+        self.docked = {}
+        for alliance, spot in [("Blue", constants.FIELD_CONSTANTS.BLUE_SUBSTATION_LEFT), ("Blue", constants.FIELD_CONSTANTS.BLUE_SUBSTATION_RIGHT), ("Red", constants.FIELD_CONSTANTS.RED_SUBSTATION_LEFT), ("Red", constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT)]:
             toadd = True
-            for piece in self.pieces:
+            for key, piece in candidates.items():
                 if (spot.x - 10 <= piece.pos.x <= spot.x + 10 and
                 spot.y - 15 <= piece.pos.y <= spot.y + 15 and
                 spot.z - 10 <= piece.pos.z <= spot.z + 10):
                     toadd = False
+                    self.docked[key] = piece
                     piece.pos.z = spot.copy().z
                     piece.vel.z = 0
-                    piece.type = self.pieceToAdd
+                    piece.type = self.pieceToAdd[alliance]
             if toadd:
-                self.pieces.append(Piece(self.pieceToAdd, spot.copy()))
+                piece = Piece(self.pieceToAdd[alliance], spot.copy())
+                self.pieces.append(piece)
+                self.awake[id(piece)] = piece
+                self.knownPieces += 1
 
-    def checkScoring(self, piece):
-        for scoringNodeIndex in range(len(constants.FIELD_CONSTANTS.SCORING_LOCATIONS)):
-            if piece.scored or self.pieceOnRobot(piece):
-                continue
-            if constants.FIELD_CONSTANTS.SCORING_LOCATIONS[scoringNodeIndex][1] != NodeType.HYBRID and constants.FIELD_CONSTANTS.SCORING_LOCATIONS[scoringNodeIndex][1].value != piece.type.value:
-                continue
-            spot = constants.FIELD_CONSTANTS.SCORING_LOCATIONS[scoringNodeIndex][0]
-            if (piece.pos.x - 10 < spot.x and piece.pos.x + 10 > spot.x and
-                piece.pos.y - 8 < spot.y and piece.pos.y + 8 > spot.y and
-                piece.pos.z - 5 < spot.z and piece.pos.z + 5 > spot.z):
-                self.scoring.grid["Red"][scoringNodeIndex // 9][scoringNodeIndex % 9] += 1
+    # a loose piece scores in the first matching node whose box the segment it moved along in the last step
+    # (lastPos -> pos) passes through, so a piece falling several inches per tick cannot skip a node. All pieces are
+    # tested against all nodes in one batch. Nodes sit within 56in of their alliance wall, so only the grid on the
+    # piece's half of the field can score it.
+    def checkScoring(self):
+        pieces = [piece for piece in self.awake.values() if piece.holder is None]
+        if not pieces:
+            return
+        import numpy as np
+        from environments.collision import segmentsHitBoxes
+        centers, halfSizes, nodeTypes, red = scoringNodes()
+        ends = np.array([(piece.pos.x, piece.pos.y, piece.pos.z) for piece in pieces], dtype=float)
+        starts = np.array([(piece.lastPos.x, piece.lastPos.y, piece.lastPos.z) if piece.lastPos is not None
+                           else (piece.pos.x, piece.pos.y, piece.pos.z) for piece in pieces], dtype=float)
+        types = np.array([piece.type.value for piece in pieces])
+        hits = segmentsHitBoxes(starts, ends, centers, halfSizes)
+        hits &= red[None, :] == (ends[:, 1] < constants.FIELD_HEIGHT / 2)[:, None]
+        hits &= (nodeTypes[None, :] == NodeType.HYBRID.value) | (nodeTypes[None, :] == types[:, None])
+        for piece, row in zip(pieces, hits):
+            if row.any():
+                index = int(row.argmax())
+                alliance = NODE_ALLIANCES[0] if red[index] else NODE_ALLIANCES[1]
+                index %= len(SCORING_LOCATIONS["Red"])
+                self.scoring.grid[alliance][index // 9][index % 9] += 1
                 piece.scored = True
-            
+                del self.awake[id(piece)]
+
     def pieceOnRobot(self, piece):
+        return piece.holder is not None
+
+    # raises AssertionError if any robot's pieceHeld and its piece's holder disagree
+    def checkHolders(self):
+        robots = {id(robot) for robot in self.robots}
         for robot in self.robots:
-            if robot.pieceHeld == piece:
-                return True
-        return False
+            if robot.pieceHeld is not None and robot.pieceHeld.holder is not robot:
+                raise AssertionError(f"{robot!r} holds a piece whose holder is {robot.pieceHeld.holder!r}")
+        for index, piece in enumerate(self.pieces):
+            if piece.holder is None:
+                continue
+            if id(piece.holder) not in robots:
+                raise AssertionError(f"piece {index} is held by {piece.holder!r}, which is not in this environment")
+            if piece.holder.pieceHeld is not piece:
+                raise AssertionError(f"piece {index} is held by {piece.holder!r}, which holds {piece.holder.pieceHeld!r}")
+
+class EnvironmentSnapshot:
+    __slots__ = ("robotStates", "heldPieces", "pieces", "pieceStates", "scoringState", "matchState")
+
+    def __init__(self, robotStates, heldPieces, pieces, pieceStates, scoringState, matchState):
+        self.robotStates = robotStates
+        self.heldPieces = heldPieces
+        self.pieces = pieces
+        self.pieceStates = pieceStates
+        self.scoringState = scoringState
+        self.matchState = matchState
 
 class ScoringManager:
 
@@ -167,18 +403,42 @@ class ScoringManager:
         self.autoScores = {"Red":  {"Leaves":  (False, False, False), "PiecesScoredBonus": 0, "chargeStationScore": 0}, 
                                             "Blue":  {"Leaves":  (False, False, False), "PiecesScoredBonus": 0, "chargeStationScore": 0}}
         
-    def updateEndOfAuto(self, evnironment: Environment):
-        for robot in evnironment.robots:
-            if robot.pos > FIELD_CONSTANTS.chargeStationBottomLeft and robot.pos < FIELD_CONSTANTS.chargeStationTopRights:
-                if evnironment.robots.indexof(robot) < 3:
-                    self.autoScores["Red"]["chargeStationScore"] = 8
-                else:
-                    self.autoScores["Blue"]["chargeStationScore"] = 12
-            if robot.pos > FIELD_CONSTANTS.chargeStationBalancedBottomLeft and robot.pos < FIELD_CONSTANTS.chargeStationBalancedTopRight:
-                if evnironment.robots.indexof(robot) < 3:
-                    self.autoScores["Red"]["chargeStationScore"] = 6
-                else:
-                    self.autoScores["Blue"]["chargeStationScore"] = 10
+    def getState(self):
+        return (
+            {alliance: [list(row) for row in rows] for alliance, rows in self.grid.items()},
+            dict(self.score),
+            {alliance: list(values) for alliance, values in self.chargeStationScore.items()},
+            {alliance: dict(values) for alliance, values in self.autoScores.items()})
+
+    def setState(self, state):
+        grid, score, chargeStationScore, autoScores = state
+        self.grid = {alliance: [list(row) for row in rows] for alliance, rows in grid.items()}
+        self.score = dict(score)
+        self.chargeStationScore = {alliance: list(values) for alliance, values in chargeStationScore.items()}
+        self.autoScores = {alliance: dict(values) for alliance, values in autoScores.items()}
+
+    def copy(self):
+        clone = ScoringManager.__new__(ScoringManager)
+        clone.setState(self.getState())
+        return clone
+
+    # auto pieces are worth one extra point each; a robot docked (8) or engaged (12) on its own charge station scores for its alliance
+    def updateEndOfAuto(self, environment: Environment):
+        for alliance in ["Red", "Blue"]:
+            self.autoScores[alliance]["PiecesScoredBonus"] = sum(1 for row in self.grid[alliance] for node in row if node > 0)
+        for robot in environment.robots:
+            x = robot.pos.x
+            y = robot.pos.y if robot.alliance == "Red" else constants.FIELD_HEIGHT - robot.pos.y
+            points = 0
+            if (FIELD_CONSTANTS.chargeStationBalancedBottomLeft.x < x < FIELD_CONSTANTS.chargeStationBalancedTopRight.x and
+                FIELD_CONSTANTS.chargeStationBalancedBottomLeft.y < y < FIELD_CONSTANTS.chargeStationBalancedTopRight.y):
+                points = 12
+            elif (FIELD_CONSTANTS.chargeStationBottomLeft.x < x < FIELD_CONSTANTS.chargeStationTopRight.x and
+                FIELD_CONSTANTS.chargeStationBottomLeft.y < y < FIELD_CONSTANTS.chargeStationTopRight.y):
+                points = 8
+            if points > self.autoScores[robot.alliance]["chargeStationScore"]:
+                self.autoScores[robot.alliance]["chargeStationScore"] = points
+                self.chargeStationScore[robot.alliance][0] = points
 
     def getScore(self):
         newScore = {"Red": 0, "Blue": 0}
@@ -211,6 +471,8 @@ class ScoringManager:
 
     def update(self):
         self.score = self.calculateGridScore()
+        for alliance in ["Red", "Blue"]:
+            self.score[alliance] += self.autoScores[alliance]["PiecesScoredBonus"] + self.autoScores[alliance]["chargeStationScore"]
 
     def calculateLinks(self):
         links = {"Red": 0, "Blue": 0}
@@ -1,5 +1,5 @@
 from enum import Enum
-from pygame import Vector3
+from environments.vecmath import Vector3
 
 class PieceType(Enum):
     CUBE = 1
@@ -11,9 +11,37 @@ class NodeType(Enum):
     HYBRID = 3
 
 class Piece: 
+    __slots__ = ("pos", "type", "vel", "scored", "lastPos", "holder")
+
+    STATE_SIZE = 11
 
     def __init__(self, type: PieceType, pos: Vector3):
         self.pos = pos
         self.type = type
         self.vel = Vector3(0, 0, 0)
-        self.scored = False
\ No newline at end of file
+        self.scored = False
+        self.lastPos = None # where the piece started its last free-flight step, for swept scoring
+        self.holder = None # the Robot whose pieceHeld this is, kept by Robot.intake/drop
+
+    # flat (pos, vel, type, scored, lastPos) tuple, see Robot.getState. holder is a reference and is restored from the
+    # robots' side. A missing lastPos is stored as pos, which
+    # sweeps the same (empty) segment.
+    def getState(self):
+        last = self.lastPos if self.lastPos is not None else self.pos
+        return (self.pos.x, self.pos.y, self.pos.z, self.vel.x, self.vel.y, self.vel.z, self.type.value, self.scored,
+                last.x, last.y, last.z)
+
+    def setState(self, state):
+        self.pos = Vector3(state[0], state[1], state[2])
+        self.vel = Vector3(state[3], state[4], state[5])
+        self.type = PieceType(state[6])
+        self.scored = bool(state[7])
+        self.lastPos = Vector3(state[8], state[9], state[10])
+
+    def copy(self):
+        # the copy is loose until a robot copy takes it, see Robot.copy
+        clone = Piece(self.type, self.pos.copy())
+        clone.vel = self.vel.copy()
+        clone.scored = self.scored
+        clone.lastPos = self.lastPos.copy() if self.lastPos is not None else None
+        return clone
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Synchronized, time-optimal point-to-point joint motion.
+
+Every joint gets an accel-limited trapezoidal (or triangular) velocity profile using its own maxVel/accel. The
+slowest joint sets the duration and the others are stretched to finish at the same moment, so a combined move (JITB's
+pivot, telescope and wrist, Poofs' elevator and laterator) arrives everywhere at once. Plans are closed form and
+cheap enough to build once per cycle in sweeps.
+
+Joint states are the `(value, rate, maxRate, accel, lower, upper)` tuples from Elevator/Pivot.getJointState().
+Goals are clamped to the limits the joints will have at the goal configuration: a joint whose upper limit follows
+its parent (KinematicChain.relativeLimits, e.g. OPRobot's elbow) is clamped against the parent's clamped goal, not
+the parent's current angle.
+"""
+
+import math
+
+
+class JointProfile:
+    __slots__ = ("start", "goal", "direction", "cruise", "accel", "rampTime", "duration")
+
+    # rest-to-rest profile finishing at `duration`, which must be at least minimumTime()
+    def __init__(self, start, goal, maxRate, accel, duration):
+        self.start = start
+        self.goal = goal
+        self.direction = 1 if goal >= start else -1
+        self.accel = accel
+        self.duration = duration
+        distance = abs(goal - start)
+        if distance == 0 or duration == 0:
+            self.cruise = 0
+            self.rampTime = 0
+            return
+        discriminant = max(accel * accel * duration * duration - 4 * accel * distance, 0)
+        self.cruise = min((accel * duration - math.sqrt(discriminant)) / 2, maxRate)
+        self.rampTime = self.cruise / accel
+
+    @staticmethod
+    def minimumTime(distance, maxRate, accel):
+        distance = abs(distance)
+        if distance == 0:
+            return 0
+        if distance >= maxRate * maxRate / accel:
+            return distance / maxRate + maxRate / accel
+        return 2 * math.sqrt(distance / accel)
+
+    def position(self, t):
+        if t <= 0:
+            return self.start
+        if t >= self.duration:
+            return self.goal
+        ramp = self.rampTime
+        if t < ramp:
+            travelled = self.accel * t * t / 2
+        elif t <= self.duration - ramp:
+            travelled = self.cruise * (t - ramp / 2)
+        else:
+            remaining = self.duration - t
+            travelled = abs(self.goal - self.start) - self.accel * remaining * remaining / 2
+        return self.start + self.direction * travelled
+
+    def velocity(self, t):
+        if t <= 0 or t >= self.duration:
+            return 0
+        ramp = self.rampTime
+        if t < ramp:
+            speed = self.accel * t
+        elif t <= self.duration - ramp:
+            speed = self.cruise
+        else:
+            speed = self.accel * (self.duration - t)
+        return self.direction * speed
+
+
+class ArmPlan:
+    __slots__ = ("profiles", "startTime", "duration")
+
+    def __init__(self, profiles, startTime, duration):
+        self.profiles = profiles
+        self.startTime = startTime
+        self.duration = duration
+
+    # target velocities for the step starting at `time`. With the step length known the command aims each joint at
+    # its profile position at the end of the step, capped at the speed the joint can still stop from before the goal
+    # (so a joint lagging its profile catches up without overshooting); otherwise the feedforward velocity is used.
+    def velocities(self, joints, time, dt=0):
+        t = time - self.startTime
+        result = {}
+        for name, profile in self.profiles.items():
+            if dt <= 0:
+                result[name] = profile.velocity(t)
+                continue
+            value, accel = joints[name][0], joints[name][3]
+            command = (profile.position(t + dt) - value) / dt
+            remaining = abs(profile.goal - value)
+            stopping = accel * (math.sqrt(dt * dt / 4 + 2 * remaining / accel) - dt / 2)
+            result[name] = max(-stopping, min(command, stopping))
+        return result
+
+    def finished(self, joints, time, tolerance=.5):
+        if time - self.startTime < self.duration:
+            return False
+        return all(abs(joints[name][0] - profile.goal) <= tolerance for name, profile in self.profiles.items())
+
+
+# relativeLimits: {joint: (parent, low, high)} from KinematicChain.relativeLimits. Pivot.update only enforces
+# [0, maxAngle], so a relative joint's upper limit becomes the parent's goal + high and its lower limit is kept.
+def goalLimits(joints, goals, relativeLimits, name):
+    lower, upper = joints[name][4], joints[name][5]
+    if name in relativeLimits:
+        parent, low, high = relativeLimits[name]
+        if parent in goals:
+            parentLower, parentUpper = goalLimits(joints, goals, relativeLimits, parent)
+            parentGoal = min(max(goals[parent], parentLower), parentUpper)
+        else:
+            parentGoal = joints[parent][0]
+        upper = parentGoal + high
+    return lower, upper
+
+
+def planArmMotion(joints, goals, startTime=0, relativeLimits=None):
+    clamped = {}
+    minimum = 0
+    for name, goal in goals.items():
+        value, rate, maxRate, accel, lower, upper = joints[name]
+        if relativeLimits:
+            lower, upper = goalLimits(joints, goals, relativeLimits, name)
+        clamped[name] = min(max(goal, lower), upper)
+        minimum = max(minimum, JointProfile.minimumTime(clamped[name] - value, maxRate, accel))
+    profiles = {name: JointProfile(joints[name][0], goal, joints[name][2], joints[name][3], minimum) for name, goal in clamped.items()}
+    return ArmPlan(profiles, startTime, minimum)
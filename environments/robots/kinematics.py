@@ -0,0 +1,119 @@
+"""Declarative kinematic chains for robot mechanisms.
+
+A robot lists its joints once, parent first, as class data:
+
+    CHAIN = KinematicChain(
+        Prismatic("elevator", Vector3(-11, 0, 5), 42, 120, 500, 0),
+        Prismatic("laterator", None, 60, 150, 500, -75, parent="elevator"),
+        endEffector="laterator")
+    __slots__ = CHAIN.names
+
+Robot.__init__ builds an Elevator for every Prismatic joint and a Pivot for every Revolute joint, and Robot.update
+steps them in order, mounting each child on its parent's end position. Elevator/Pivot cache their end position,
+so a joint that did not move (and whose parent did not move) costs no rotations.
+"""
+
+from environments.vecmath import Vector3
+
+from environments.robots.subsystems.elevator import Elevator
+from environments.robots.subsystems.pivot import Pivot
+
+
+class Prismatic:
+    # inheritAngle: the rail is mounted on a revolute parent and points along it (a telescoping arm)
+    def __init__(self, name, lowPos, maxheight, maxVel, maxAccel, mountedAngle, parent=None, inheritAngle=False):
+        self.name = name
+        self.lowPos = lowPos
+        self.maxheight = maxheight
+        self.maxVel = maxVel
+        self.maxAccel = maxAccel
+        self.mountedAngle = mountedAngle
+        self.parent = parent
+        self.inheritAngle = inheritAngle
+
+    def build(self):
+        return Elevator(Vector3(self.lowPos) if self.lowPos is not None else Vector3(), self.maxheight, self.maxVel, self.maxAccel, self.mountedAngle)
+
+    def lowerLimit(self):
+        return 0
+
+    def upperLimit(self):
+        return self.maxheight
+
+
+class Revolute:
+    # relativeLimits: (min, max) offsets from the parent's angle, replacing minAngle/maxAngle every update
+    def __init__(self, name, pivotPoint, length, startAngle, minAngle, maxAngle, maxTurnRate, accel, angleOffset=0, parent=None, relativeLimits=None):
+        self.name = name
+        self.pivotPoint = pivotPoint
+        self.length = length
+        self.startAngle = startAngle
+        self.minAngle = minAngle
+        self.maxAngle = maxAngle
+        self.maxTurnRate = maxTurnRate
+        self.accel = accel
+        self.angleOffset = angleOffset
+        self.parent = parent
+        self.relativeLimits = relativeLimits
+
+    def build(self):
+        return Pivot(Vector3(self.pivotPoint) if self.pivotPoint is not None else Vector3(), self.length, self.startAngle, self.minAngle, self.maxAngle, self.maxTurnRate, self.accel, self.angleOffset)
+
+    # Pivot.update clamps to [0, maxAngle]
+    def lowerLimit(self):
+        return 0
+
+    def upperLimit(self):
+        return self.maxAngle
+
+
+class KinematicChain:
+    def __init__(self, *joints, endEffector):
+        self.joints = joints
+        self.names = tuple(joint.name for joint in joints)
+        self.endEffector = endEffector
+        # {joint: (parent, low, high)} for joints whose limits follow their parent, as the arm planner needs them
+        self.relativeLimits = {joint.name: (joint.parent, *joint.relativeLimits) for joint in joints
+                               if isinstance(joint, Revolute) and joint.relativeLimits is not None}
+        seen = set()
+        for joint in joints:
+            if joint.parent is not None and joint.parent not in seen:
+                raise ValueError(f"joint {joint.name} is listed before its parent {joint.parent}")
+            seen.add(joint.name)
+        if endEffector not in seen:
+            raise ValueError(f"unknown end effector {endEffector}")
+
+    def build(self, robot):
+        for joint in self.joints:
+            setattr(robot, joint.name, joint.build())
+        self.mount(robot)
+
+    # carries every parent's end position (and angle/limits where declared) onto its children
+    def mount(self, robot):
+        for joint in self.joints:
+            if joint.parent is not None:
+                self.mountJoint(robot, joint)
+
+    def mountJoint(self, robot, joint):
+        parent = getattr(robot, joint.parent)
+        child = getattr(robot, joint.name)
+        child.pos = parent.getEndPosition()
+        if isinstance(joint, Prismatic):
+            if joint.inheritAngle:
+                child.angle = parent.angle
+        elif joint.relativeLimits is not None:
+            child.minAngle = parent.angle + joint.relativeLimits[0]
+            child.maxAngle = parent.angle + joint.relativeLimits[1]
+
+    # joints at rest are still remounted (their parent may have moved) but not stepped
+    def update(self, robot, time_elapsed):
+        for joint in self.joints:
+            if joint.parent is not None:
+                self.mountJoint(robot, joint)
+            subsystem = getattr(robot, joint.name)
+            if not subsystem.atRest():
+                subsystem.update(time_elapsed)
+
+    # end effector position in the robot frame
+    def endPosition(self, robot):
+        return getattr(robot, self.endEffector).getEndPosition()
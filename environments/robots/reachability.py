@@ -0,0 +1,191 @@
+"""Reachability maps: where can a robot's end effector go, and which joint setpoints get it there.
+
+The joints between the chain root and the end effector are sampled on a grid over their limits and pushed through
+forward kinematics in one batched NumPy pass (the batchmath versions of Elevator/Pivot.getEndPosition). The resulting
+workspace is indexed by a KD-tree and cached on disk per chain configuration, so after the first build a lookup
+is a file load plus a tree query:
+
+    reach = ReachabilityMap.forRobot(PoofsRobot)
+    setpoints, error = reach.setpointsFor(FIELD_CONSTANTS.SCORING_LOCATIONS[4][0], (107, 70, 90))
+    pathing.addMoveArm(setpoints["elevator"], setpoints["laterator"])
+"""
+
+import hashlib
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from environments import batchmath
+from environments.robots.kinematics import Prismatic
+
+CACHE_VERSION = 2
+Y_AXIS = (0, 1, 0)
+
+
+def cacheDir():
+    return Path(os.environ.get("FRCSIM_CACHE", Path.home() / ".cache" / "frcsim")) / "reachability"
+
+
+# joints from the chain root to the end effector, parents first
+def armJoints(chain):
+    byName = {joint.name: joint for joint in chain.joints}
+    path = []
+    name = chain.endEffector
+    while name is not None:
+        path.append(byName[name])
+        name = byName[name].parent
+    return path[::-1]
+
+
+def jointGrid(joints, samples):
+    axes = [np.linspace(joint.relativeLimits[0], joint.relativeLimits[1], samples) if getattr(joint, "relativeLimits", None) is not None
+            else np.linspace(joint.lowerLimit(), joint.upperLimit(), samples) for joint in joints]
+    grids = np.meshgrid(*axes, indexing="ij")
+    return np.stack([grid.ravel() for grid in grids], axis=1)
+
+
+# batched forward kinematics. `values` is (N, len(joints)); relative joints hold their offset from the parent angle.
+# Returns end effector positions (N, 3) in the robot frame and the absolute joint values (N, len(joints)).
+def forwardKinematics(joints, values):
+    count = len(values)
+    absolute = np.empty_like(values, dtype=float)
+    ends = {}
+    angles = {}
+    end = np.zeros((count, 3))
+    for column, joint in enumerate(joints):
+        if joint.parent is None:
+            mount = joint.lowPos if isinstance(joint, Prismatic) else joint.pivotPoint
+            base = np.broadcast_to(np.array([mount.x, mount.y, mount.z], dtype=float), (count, 3))
+        else:
+            base = ends[joint.parent]
+        offset = np.zeros((count, 3))
+        if isinstance(joint, Prismatic):
+            height = values[:, column]
+            angle = angles[joint.parent] if joint.inheritAngle else np.full(count, float(joint.mountedAngle))
+            offset[:, 2] = height
+            end = base + batchmath.rotate3(offset, angle, Y_AXIS)
+            absolute[:, column] = height
+        else:
+            angle = values[:, column]
+            if joint.relativeLimits is not None:
+                angle = np.maximum(angles[joint.parent] + angle, 0)
+            offset[:, 0] = joint.length
+            end = base + batchmath.rotate3(offset, -(angle + joint.angleOffset), Y_AXIS)
+            absolute[:, column] = angle
+        ends[joint.name] = end
+        angles[joint.name] = angle
+    return end, absolute
+
+
+class KDTree:
+    """Static KD-tree over (N, 3) points, stored as flat arrays so it can be saved with np.savez."""
+
+    LEAF_SIZE = 16
+
+    def __init__(self, points, order=None, nodes=None):
+        self.points = points
+        if order is None:
+            order, nodes = self.build(points)
+        self.order = order
+        # per node: split axis (-1 for leaves), split value, left child / leaf start, right child / leaf end
+        self.nodes = nodes
+
+    @classmethod
+    def build(cls, points):
+        order = np.arange(len(points))
+        nodes = []
+
+        def split(start, stop):
+            index = len(nodes)
+            nodes.append(None)
+            if stop - start <= cls.LEAF_SIZE:
+                nodes[index] = (-1, 0.0, start, stop)
+                return index
+            block = points[order[start:stop]]
+            axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+            middle = (stop - start) // 2
+            partition = np.argpartition(block[:, axis], middle)
+            order[start:stop] = order[start:stop][partition]
+            value = float(points[order[start + middle], axis])
+            left = split(start, start + middle)
+            right = split(start + middle, stop)
+            nodes[index] = (axis, value, left, right)
+            return index
+
+        split(0, len(points))
+        return order, np.array(nodes, dtype=float)
+
+    def query(self, point):
+        point = np.asarray(point, dtype=float)
+        best = math.inf
+        bestIndex = -1
+        stack = [0]
+        while stack:
+            axis, value, left, right = self.nodes[stack.pop()]
+            if axis < 0:
+                indices = self.order[int(left):int(right)]
+                distances = ((self.points[indices] - point) ** 2).sum(axis=1)
+                closest = int(np.argmin(distances))
+                if distances[closest] < best:
+                    best = float(distances[closest])
+                    bestIndex = int(indices[closest])
+                continue
+            offset = point[int(axis)] - value
+            near, far = (int(left), int(right)) if offset < 0 else (int(right), int(left))
+            if offset * offset < best:
+                stack.append(far)
+            stack.append(near)
+        return math.sqrt(best), bestIndex
+
+
+class ReachabilityMap:
+    def __init__(self, names, points, setpoints, tree):
+        self.names = names
+        self.points = points
+        self.setpoints = setpoints
+        self.tree = tree
+
+    @classmethod
+    def forRobot(cls, robotClass, samples=24, useCache=True):
+        return cls.forChain(robotClass.CHAIN, samples, useCache)
+
+    @classmethod
+    def forChain(cls, chain, samples=24, useCache=True):
+        joints = armJoints(chain)
+        names = [joint.name for joint in joints]
+        path = cacheDir() / f"{chainKey(joints, samples)}.npz"
+        if useCache and path.exists():
+            data = np.load(path)
+            return cls(names, data["points"], data["setpoints"], KDTree(data["points"], data["order"], data["nodes"]))
+
+        points, setpoints = forwardKinematics(joints, jointGrid(joints, samples))
+        tree = KDTree(points)
+        if useCache:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix(f".{os.getpid()}.tmp.npz")
+            np.savez(temporary, points=points, setpoints=setpoints, order=tree.order, nodes=tree.nodes)
+            os.replace(temporary, path)
+        return cls(names, points, setpoints, tree)
+
+    # nearest reachable setpoints for a robot-frame point, with the distance (inches) still left to the target
+    def nearest(self, localPoint):
+        distance, index = self.tree.query((localPoint[0], localPoint[1], localPoint[2]))
+        return dict(zip(self.names, self.setpoints[index].tolist())), distance
+
+    # setpoints to reach a field-frame target (e.g. a scoring node) from robot pose (x, y, theta in degrees)
+    def setpointsFor(self, target, pose):
+        x, y, theta = pose
+        radians = math.radians(-theta)
+        dx, dy = target[0] - x, target[1] - y
+        local = (dx * math.cos(radians) - dy * math.sin(radians), dx * math.sin(radians) + dy * math.cos(radians), target[2])
+        return self.nearest(local)
+
+    def bounds(self):
+        return self.points.min(axis=0), self.points.max(axis=0)
+
+
+def chainKey(joints, samples):
+    description = repr([(type(joint).__name__, sorted(vars(joint).items())) for joint in joints])
+    return hashlib.sha1(f"{CACHE_VERSION}:{samples}:{description}".encode()).hexdigest()[:16]
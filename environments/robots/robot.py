@@ -1,12 +1,17 @@
-from pathlib import Path
-import sys
-parent_dir = str(Path(__file__).resolve().parents[1])
-sys.path.insert(0, parent_dir)
-from pygame import Vector2
+import math
+
+from environments.vecmath import Vector2, Vector3
 
 from environments.piece import Piece
 
 class Robot:
+    # subclasses declare their subsystems (Elevator/Pivot) as __slots__, in mechanism order
+    __slots__ = ("pos", "theta", "velocity", "dtheta", "maxaccel", "maxvel", "frame", "targetVel", "pieceHeld", "intaking", "intakeSlop", "alliance")
+
+    STATE_SIZE = 9
+    INTAKE_HALF_SIZE = Vector3(10, 10, 10) # of the intake box around the end effector, see getIntakeZone
+    CHAIN = None # KinematicChain describing the subclass's mechanism, built by __init__
+    _subsystemSlots = {}
 
     def __init__(self, x, y, theta, maxaccel, maxvel, frame_size: tuple, piece: Piece):
         self.pos = Vector2(x, y)
@@ -18,10 +23,27 @@ class Robot:
         self.frame = frame_size
         self.targetVel = Vector2(0, 0)
         self.pieceHeld = piece
+        if piece is not None:
+            piece.holder = self
         self.intaking = False
+        self.intakeSlop = 0 # grows (or shrinks, if negative) the intake zone on every side
+        self.alliance = "Red"
+        if self.CHAIN is not None:
+            self.CHAIN.build(self)
 
     def update(self, time_elapsed):
+        if self.velocity.x == 0 and self.velocity.y == 0 and self.targetVel.x == 0 and self.targetVel.y == 0:
+            # parked: the drivetrain has nothing to integrate
+            self.theta += self.dtheta * time_elapsed
+        else:
+            self.updateDrive(time_elapsed)
+
+        if self.CHAIN is not None:
+            self.CHAIN.update(self, time_elapsed)
+            if self.pieceHeld is not None:
+                self.pieceHeld.pos = self.getEndEffectorPosition()
 
+    def updateDrive(self, time_elapsed):
         delta = self.targetVel - self.velocity
         if delta.length() == 0:
             accel = Vector2(0, 0)
@@ -40,6 +62,37 @@ class Robot:
         self.pos.y += self.velocity.y * time_elapsed
         self.theta += self.dtheta * time_elapsed
 
+    # end effector in field coordinates
+    def getEndEffectorPosition(self):
+        return self.CHAIN.endPosition(self).rotate(self.theta, Vector3(0, 0, 1)) + Vector3(self.pos.x, self.pos.y, 0)
+
+    # two opposite corners of the field-aligned box around the end effector, in field coordinates, that a piece
+    # has to be in to be intaken
+    def getIntakeZone(self):
+        endPoint = self.getEndEffectorPosition()
+        return endPoint - self.INTAKE_HALF_SIZE, endPoint + self.INTAKE_HALF_SIZE
+
+    # every intake as (low corner, high corner, the piece type it takes or None for any), grown by intakeSlop.
+    # Environment.checkIntake evaluates this once per robot per tick.
+    def getIntakeBoxes(self):
+        point1, point2 = self.getIntakeZone()
+        return [self.intakeBox(point1, point2, None)]
+
+    def intakeBox(self, point1, point2, pieceType):
+        slop = self.intakeSlop
+        low = Vector3(min(point1.x, point2.x) - slop, min(point1.y, point2.y) - slop, min(point1.z, point2.z) - slop)
+        high = Vector3(max(point1.x, point2.x) + slop, max(point1.y, point2.y) + slop, max(point1.z, point2.z) + slop)
+        return low, high, pieceType
+
+    # the field-aligned box enclosing a box given by two corners in robot coordinates, as two corners in field
+    # coordinates
+    def fieldBox(self, point1, point2):
+        center = ((point1 + point2) / 2).rotate(self.theta, Vector3(0, 0, 1)) + Vector3(self.pos.x, self.pos.y, 0)
+        halfX, halfY, halfZ = abs(point2.x - point1.x) / 2, abs(point2.y - point1.y) / 2, abs(point2.z - point1.z) / 2
+        cos, sin = abs(math.cos(math.radians(self.theta))), abs(math.sin(math.radians(self.theta)))
+        extent = Vector3(cos * halfX + sin * halfY, sin * halfX + cos * halfY, halfZ)
+        return center - extent, center + extent
+
     def setTargetVel(self, targetVel: Vector2):
         self.targetVel = Vector2(targetVel)
         if self.targetVel.length() > self.maxvel:
@@ -49,28 +102,88 @@ class Robot:
         self.dtheta = targetVel
 
     def canIntake(self, piece: Piece):
-        point1, point2 = self.getIntakeZone()
-        min_x, max_x = sorted((point1.x, point2.x))
-        min_y, max_y = sorted((point1.y, point2.y))
-        min_z, max_z = sorted((point1.z, point2.z))
-        # use inclusive bounds: min <= coord <= max
-        return (min_x <= piece.pos.x <= max_x and
-                min_y <= piece.pos.y <= max_y and
-                min_z <= piece.pos.z <= max_z)
-    
+        pos = piece.pos
+        # inclusive bounds: min <= coord <= max
+        for low, high, pieceType in self.getIntakeBoxes():
+            if ((pieceType is None or pieceType == piece.type) and low.x <= pos.x <= high.x and
+                    low.y <= pos.y <= high.y and low.z <= pos.z <= high.z):
+                return True
+        return False
+
     def intake(self, piece: Piece):
         if self.pieceHeld is not None:
             return False
-        if piece.scored:
+        if piece.scored or piece.holder is not None:
             return False
         if self.canIntake(piece):
-            self.pieceHeld = piece
-            self.intaking = False
+            self.grab(piece)
             return True
         return False
-    
+
+    def grab(self, piece: Piece):
+        self.pieceHeld = piece
+        piece.holder = self
+        self.intaking = False
+
     def drop(self):
+        if self.pieceHeld is not None:
+            self.pieceHeld.holder = None
         self.pieceHeld = None
     
     def runIntake(self):
-        self.intaking = True
\ No newline at end of file
+        self.intaking = True
+
+    @classmethod
+    def subsystemSlots(cls):
+        names = Robot._subsystemSlots.get(cls)
+        if names is None:
+            names = []
+            for klass in reversed(cls.__mro__):
+                if klass is not Robot and issubclass(klass, Robot):
+                    names.extend(klass.__dict__.get("__slots__", ()))
+            Robot._subsystemSlots[cls] = names = tuple(names)
+        return names
+
+    def getSubsystems(self):
+        return [getattr(self, name) for name in self.subsystemSlots()]
+
+    # flat tuple of drivetrain state followed by each subsystem's state, in slot order.
+    # pieceHeld is a reference rather than a value, so it is left to the caller (see Environment).
+    def getState(self):
+        state = (self.pos.x, self.pos.y, self.theta,
+                 self.velocity.x, self.velocity.y, self.dtheta,
+                 self.targetVel.x, self.targetVel.y, self.intaking)
+        for subsystem in self.getSubsystems():
+            state += subsystem.getState()
+        return state
+
+    def setState(self, state):
+        self.pos = Vector2(state[0], state[1])
+        self.theta = state[2]
+        self.velocity = Vector2(state[3], state[4])
+        self.dtheta = state[5]
+        self.targetVel = Vector2(state[6], state[7])
+        self.intaking = bool(state[8])
+        index = Robot.STATE_SIZE
+        for subsystem in self.getSubsystems():
+            subsystem.setState(state[index:index + subsystem.STATE_SIZE])
+            index += subsystem.STATE_SIZE
+
+    # independent copy holding `piece` (a copy of pieceHeld owned by the caller's environment)
+    def copy(self, piece=None):
+        cls = type(self)
+        clone = cls.__new__(cls)
+        for name in Robot.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.pos = self.pos.copy()
+        clone.velocity = self.velocity.copy()
+        clone.targetVel = self.targetVel.copy()
+        clone.pieceHeld = piece
+        if piece is not None:
+            piece.holder = clone
+        for name in self.subsystemSlots():
+            setattr(clone, name, getattr(self, name).copy())
+        return clone
+
+    def stateSize(self):
+        return Robot.STATE_SIZE + sum(subsystem.STATE_SIZE for subsystem in self.getSubsystems())
\ No newline at end of file
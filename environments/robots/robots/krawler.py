@@ -1,31 +1,16 @@
-from robot import Robot
-from subsystems.pivot import Pivot
-from subsystems.elevator import Elevator
-from pygame import Vector2, Vector3
+from environments.robots.robot import Robot
+from environments.robots.kinematics import KinematicChain, Prismatic, Revolute
+from environments.vecmath import Vector2, Vector3
 from environments.piece import Piece
 
 class KrawlerBot(Robot):
-    
-    def __init__(self, x, y, theta, maxaccel, maxvel, frame_size, piece):
-        super().__init__(x, y, theta, maxaccel, maxvel, frame_size, piece)
-        self.elevator = Elevator(Vector3(0, -3, 8), 75, 50, 75, 55)
-        self.wrist = Pivot(self.elevator.getEndPosition() + Vector3(0, 5, 0), 6, 90, -45, 90, 180, 180, 0)
+    CHAIN = KinematicChain(
+        Prismatic("elevator", Vector3(0, -3, 8), 75, 50, 75, 55),
+        Revolute("wrist", None, 6, 90, -45, 90, 180, 180, 0, parent="elevator"),
+        endEffector="wrist")
+    __slots__ = CHAIN.names
+    INTAKE_HALF_SIZE = Vector3(5, 7, 2)
 
-    def update(self, time_elapsed):
-        super().update(time_elapsed)
-        self.elevator.update(time_elapsed)
-        self.wrist.pos = self.elevator.getEndPosition()
-        self.wrist.update(time_elapsed)
-        if self.pieceHeld is not None:
-            self.pieceHeld.pos = self.wrist.getEndPosition().rotate(self.theta, Vector3(0, 0, 1)) + Vector3(self.pos.x, self.pos.y, 0)
-
-    def getIntakeZone(self):
-        endPoint = self.wrist.getEndPosition()
-        point1 = endPoint - Vector3(5, 7, 2)
-        point2 = endPoint + Vector3(5, 7, 2)
-        return point1, point2
-    
-    
     def setElevatorVel(self, targetVel):
         self.elevator.setTargetVel(targetVel)
 
@@ -1,6 +1,10 @@
-from pygame import Vector2, Vector3
+from environments.vecmath import Vector2, Vector3
 
 class Elevator:
+    __slots__ = ("pos", "height", "maxheight", "dheight", "maxVel", "accel", "angle", "targetVel", "_end", "_endKey")
+
+    STATE_SIZE = 7
+
     def __init__(self, low_pos: Vector3, maxheight, maxVel, maxAccel, mountedAngle):
         self.pos = low_pos
         self.height = 0
@@ -10,6 +14,8 @@ class Elevator:
         self.accel = maxAccel
         self.angle = mountedAngle
         self.targetVel = 0
+        self._end = None
+        self._endKey = None
 
     def update(self, time_elapsed):
 
@@ -37,8 +43,39 @@ class Elevator:
         if self.height < 0:
             self.height = 0
 
+    # cached until the joint or its mount moves; shared with callers, so never modify it in place
     def getEndPosition(self) -> Vector3:
-        return Vector3(0, 0, self.height).rotate(self.angle, Vector3(0, 1, 0)) + self.pos
+        key = (self.pos.x, self.pos.y, self.pos.z, self.height, self.angle)
+        if key != self._endKey:
+            self._endKey = key
+            self._end = Vector3(0, 0, self.height).rotate(self.angle, Vector3(0, 1, 0)) + self.pos
+        return self._end
     
+    # update() would leave the joint exactly as it is
+    def atRest(self):
+        return self.dheight == 0 and self.targetVel == 0 and 0 <= self.height <= self.maxheight
+
     def setTargetVel(self, targetVel):
-        self.targetVel = targetVel
\ No newline at end of file
+        self.targetVel = targetVel
+
+    # (value, rate, maxRate, accel, lower, upper) as used by the arm planner
+    def getJointState(self):
+        return (self.height, self.dheight, self.maxVel, self.accel, 0, self.maxheight)
+
+    # pos is included because parent joints move it every update
+    def getState(self):
+        return (self.pos.x, self.pos.y, self.pos.z, self.height, self.dheight, self.targetVel, self.angle)
+
+    def setState(self, state):
+        self.pos = Vector3(state[0], state[1], state[2])
+        self.height = state[3]
+        self.dheight = state[4]
+        self.targetVel = state[5]
+        self.angle = state[6]
+
+    def copy(self):
+        clone = Elevator.__new__(Elevator)
+        for name in Elevator.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.pos = self.pos.copy()
+        return clone
\ No newline at end of file
@@ -1,6 +1,10 @@
-from pygame import Vector2, Vector3
+from environments.vecmath import Vector2, Vector3
 
 class Pivot:
+    __slots__ = ("pos", "length", "angle", "minAngle", "maxAngle", "maxTurnRate", "turnRate", "angleOffset", "targetVel", "accel", "_end", "_endKey")
+
+    STATE_SIZE = 8
+
     def __init__(self, pivot_point: Vector3, length, startAngle, minAngle, maxAngle, maxTurnRate, accel, angleOffset=0):
         self.pos = pivot_point
         self.length = length
@@ -12,6 +16,8 @@ class Pivot:
         self.angleOffset = angleOffset
         self.targetVel = 0
         self.accel = accel
+        self._end = None
+        self._endKey = None
 
     def update(self, time_elapsed):
         
@@ -38,8 +44,40 @@ class Pivot:
         if self.angle < 0:
             self.angle = 0
 
+    # cached until the joint or its mount moves; shared with callers, so never modify it in place
     def getEndPosition(self):
-        return self.pos + (Vector3(self.length, 0, 0).rotate(-(self.angle + self.angleOffset), Vector3(0, 1, 0)))
+        key = (self.pos.x, self.pos.y, self.pos.z, self.length, self.angle, self.angleOffset)
+        if key != self._endKey:
+            self._endKey = key
+            self._end = self.pos + (Vector3(self.length, 0, 0).rotate(-(self.angle + self.angleOffset), Vector3(0, 1, 0)))
+        return self._end
     
+    # update() would leave the joint exactly as it is
+    def atRest(self):
+        return self.turnRate == 0 and self.targetVel == 0 and 0 <= self.angle <= self.maxAngle
+
     def setTargetVel(self, targetVel):
-        self.targetVel = targetVel
\ No newline at end of file
+        self.targetVel = targetVel
+
+    # (value, rate, maxRate, accel, lower, upper) as used by the arm planner (update() clamps at 0, not minAngle)
+    def getJointState(self):
+        return (self.angle, self.turnRate, self.maxTurnRate, self.accel, 0, self.maxAngle)
+
+    # limits are included because some robots (OPRobot) move them with a parent joint
+    def getState(self):
+        return (self.pos.x, self.pos.y, self.pos.z, self.angle, self.turnRate, self.targetVel, self.minAngle, self.maxAngle)
+
+    def setState(self, state):
+        self.pos = Vector3(state[0], state[1], state[2])
+        self.angle = state[3]
+        self.turnRate = state[4]
+        self.targetVel = state[5]
+        self.minAngle = state[6]
+        self.maxAngle = state[7]
+
+    def copy(self):
+        clone = Pivot.__new__(Pivot)
+        for name in Pivot.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.pos = self.pos.copy()
+        return clone
\ No newline at end of file
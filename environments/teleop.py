@@ -0,0 +1,199 @@
+"""Recording and replaying driver control intents.
+
+The visualizer turns the keys held each frame into a ControlIntent for the driven robot. An IntentRecorder writes
+those intents to a compact binary log: an intent is only written when it differs from the one before, since a
+driver holds the same keys for many frames. A ReplayController reads a log back as a controller for Match or
+Environment.tick, so the session can be played headless, at full simulation speed, on any robot:
+
+    with IntentRecorder("sessions/practice.tlog", env.robots[0]) as recorder:
+        viz = EnvironmentVisualizer(env, recorder=recorder)
+        while viz.running:
+            viz.run(dt, teleop=True)
+
+    log = readIntentLog("sessions/practice.tlog")
+    for robot in candidates:    # e.g. a PoofsRobot and a JITBRobot in the recorded robot's starting pose
+        env = Environment(robots=[robot], startingPieces=[])
+        replaySession(env, [ReplayController(robot, log, jointMap={"elevator": "telescope"})])
+        print(type(robot).__name__, env.scoring.score)
+
+Each intent is held until the next record, so replay reproduces the session exactly when it runs with the dt the
+session was recorded at, and samples it at the replay's ticks otherwise. Joints are matched by name; jointMap renames
+recorded joints for a robot with a different mechanism and joints the robot lacks are ignored.
+
+Log layout (little endian): b"TLOG", a u16 header length and a JSON header (robot class, alliance, joint names), then
+per record a double time, a flag byte, a signed piece type byte (-1 for none) and the doubles the flags call for:
+target velocity x and y, rotation speed, one velocity per joint (NaN for a joint left alone).
+"""
+
+import json
+import math
+import struct
+
+from environments.control import ControlIntent
+from environments.piece import PieceType
+from environments.vecmath import Vector2
+
+MAGIC = b"TLOG"
+HEADER_LENGTH = struct.Struct("<H")
+RECORD = struct.Struct("<dBb")
+TARGET_VEL, ROT_SPEED, JOINTS, DROP, RUN_INTAKE = 1, 2, 4, 8, 16
+
+
+def intentKey(intent, jointNames):
+    targetVel = None if intent.targetVel is None else (intent.targetVel.x, intent.targetVel.y)
+    joints = None
+    if intent.jointVelocities is not None:
+        joints = tuple(intent.jointVelocities.get(name, math.nan) for name in jointNames)
+    return (targetVel, intent.rotSpeed, joints, bool(intent.drop), bool(intent.runIntake),
+            None if intent.pieceToAdd is None else intent.pieceToAdd.value)
+
+
+def packIntent(time, key):
+    targetVel, rotSpeed, joints, drop, runIntake, piece = key
+    flags = (TARGET_VEL if targetVel is not None else 0) | (ROT_SPEED if rotSpeed is not None else 0) | \
+            (JOINTS if joints is not None else 0) | (DROP if drop else 0) | (RUN_INTAKE if runIntake else 0)
+    values = (targetVel or ()) + ((rotSpeed,) if rotSpeed is not None else ()) + (joints or ())
+    return RECORD.pack(time, flags, -1 if piece is None else piece) + struct.pack(f"<{len(values)}d", *values)
+
+
+class IntentRecorder:
+    """Writes the intents applied to one robot, stamped with environment time."""
+
+    def __init__(self, path, robot):
+        self.file = open(path, "wb")
+        self.jointNames = list(robot.subsystemSlots())
+        header = json.dumps({"robot": type(robot).__name__, "alliance": robot.alliance, "joints": self.jointNames}).encode()
+        self.file.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+        self.last = None
+        self.endTime = 0. # end of the last recorded step, where the closing stop record goes
+        self.records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # `intent` is applied for the step from `time` to `time + dt`
+    def record(self, time, intent, dt=0.):
+        key = intentKey(intent, self.jointNames)
+        self.endTime = time + dt
+        if key != self.last:
+            self.file.write(packIntent(time, key))
+            self.last = key
+            self.records += 1
+
+    # ends the session with the robot stopped, at `time` or the end of the last recorded step
+    def close(self, time=None):
+        if self.file.closed:
+            return
+        stop = ControlIntent()
+        stop.targetVel = Vector2(0, 0)
+        stop.rotSpeed = 0
+        stop.jointVelocities = dict.fromkeys(self.jointNames, 0)
+        self.file.write(packIntent(self.endTime if time is None else time, intentKey(stop, self.jointNames)))
+        self.file.close()
+
+
+class IntentLog:
+    def __init__(self, robot, alliance, jointNames, records):
+        self.robot = robot # class name of the recorded robot
+        self.alliance = alliance
+        self.jointNames = jointNames
+        self.records = records # [(time, ControlIntent)]
+
+    @property
+    def duration(self):
+        return self.records[-1][0] if self.records else 0.
+
+
+def unpackIntent(flags, piece, values, jointNames):
+    intent = ControlIntent()
+    values = iter(values)
+    if flags & TARGET_VEL:
+        intent.targetVel = Vector2(next(values), next(values))
+    if flags & ROT_SPEED:
+        intent.rotSpeed = next(values)
+    if flags & JOINTS:
+        intent.jointVelocities = {name: velocity for name, velocity in zip(jointNames, values) if not math.isnan(velocity)}
+    intent.drop = bool(flags & DROP)
+    intent.runIntake = bool(flags & RUN_INTAKE)
+    intent.pieceToAdd = PieceType(piece) if piece >= 0 else None
+    return intent
+
+
+def readIntentLog(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an intent log")
+    offset = len(MAGIC) + HEADER_LENGTH.size
+    length, = HEADER_LENGTH.unpack_from(data, len(MAGIC))
+    header = json.loads(data[offset:offset + length])
+    offset += length
+    jointNames = header["joints"]
+    records = []
+    while offset < len(data):
+        time, flags, piece = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        count = (2 if flags & TARGET_VEL else 0) + (1 if flags & ROT_SPEED else 0) + (len(jointNames) if flags & JOINTS else 0)
+        values = struct.unpack_from(f"<{count}d", data, offset)
+        offset += 8 * count
+        records.append((time, unpackIntent(flags, piece, values, jointNames)))
+    return IntentLog(header["robot"], header["alliance"], jointNames, records)
+
+
+class ReplayController:
+    """Plays an IntentLog back on `robot`; a controller for Match and Environment.tick like autopaths.Pathfollow.
+
+    `commands` are the log's records and `index` counts the ones already reached, so the controller is finished
+    once the closing stop record has been applied.
+    """
+
+    def __init__(self, robot, log, jointMap=None, start=0.):
+        self.robot = robot
+        self.commands = log.records
+        self.index = 0
+        self.start = start # environment time the log's time 0 is played at
+        self.end = start + log.duration # where the recorded session ended
+        jointMap = jointMap or {}
+        names = set(robot.subsystemSlots())
+        self.jointNames = {name: jointMap.get(name, name) for name in log.jointNames if jointMap.get(name, name) in names}
+
+    def decide(self, view):
+        time = view.time - self.start + 1e-9
+        advance = 0
+        while self.index + advance < len(self.commands) and self.commands[self.index + advance][0] <= time:
+            advance += 1
+        intent = ControlIntent()
+        current = self.index + advance - 1
+        if current >= 0:
+            recorded = self.commands[current][1]
+            intent.targetVel = recorded.targetVel
+            intent.rotSpeed = recorded.rotSpeed
+            if recorded.jointVelocities is not None:
+                intent.jointVelocities = {self.jointNames[name]: velocity for name, velocity in recorded.jointVelocities.items()
+                                          if name in self.jointNames}
+            intent.drop = recorded.drop
+            intent.runIntake = recorded.runIntake
+            intent.pieceToAdd = recorded.pieceToAdd
+        intent.advance = advance
+        return intent
+
+    def commit(self, intent):
+        self.index += intent.advance
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("robot", None)
+        return state
+
+
+# ticks the environment until every controller's session has ended; returns the environment. The closing stop
+# record marks the end of the last recorded step, so the environment stops there like the recording did.
+def replaySession(env, controllers, dt=.1):
+    active = [controller for controller in controllers if env.time < controller.end - 1e-9]
+    while active:
+        env.tick(active, dt)
+        active = [controller for controller in active if env.time < controller.end - 1e-9]
+    return env
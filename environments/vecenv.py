@@ -0,0 +1,486 @@
+"""Batched, Gymnasium-style training environment.
+
+VectorEnvironment runs `count` copies of a template Environment as one structure of NumPy arrays: every robot's
+drivetrain and joints, every piece and both grids are columns indexed by environment, so a step is a fixed number of
+array operations whatever the batch size. The rules are Environment.update's and Match.step's (accel-limited drive,
+the same joint dynamics and kinematic chains, field borders, intake, drops, gravity, substations, swept scoring,
+links and the auto bonus), using the batchmath rotations so a single environment tracks the scalar simulation.
+
+    vec = VectorEnvironment(env, 4096)
+    observations, info = vec.reset()
+    observations, rewards, terminated, truncated, info = vec.step(actions)   # actions: (count, robots, actionSize)
+
+Every robot is an agent. Its action row is ACTION_FIELDS followed by one target velocity per joint of its chain
+(padded to the longest chain); observations are float32 rows of observationSize built from the robot's pose, its
+joints, the nearest loose pieces and both grids (own alliance first). The reward is the change of the robot's
+alliance score. Matches run auto then teleop; a finished match is reset in the same step, with its final score left
+in finalScore (with autoReset off it stays disabled instead). The returned arrays are buffers reused by the next
+step.
+
+The intake zone is Robot.getIntakeZone's box: INTAKE_HALF_SIZE around the end effector in field coordinates.
+Additional intakes a robot declares in getIntakeBoxes (BreadRobot's ground intake) are not modelled.
+"""
+
+import numpy as np
+
+import constants
+from constants import FIELD_CONSTANTS
+from environments import batchmath
+from environments.collision import segmentsHitPairedBoxes
+from environments.environment import GRAVITY, NODE_ALLIANCES, scoringNodes
+from environments.piece import NodeType, PieceType
+from environments.robots.kinematics import Prismatic
+
+ACTION_FIELDS = ("vx", "vy", "rotSpeed", "intake", "drop", "pieceType") # pieceType: 0 keep, 1 cube, 2 cone
+AUTO, TELEOP, DISABLED = 0, 1, 2
+AUTO_TIME = 15
+TELEOP_TIME = 135
+LEVEL_POINTS = np.array([5, 3, 2]) # top, middle, bottom row
+SUBSTATIONS = (("Blue", FIELD_CONSTANTS.BLUE_SUBSTATION_LEFT), ("Blue", FIELD_CONSTANTS.BLUE_SUBSTATION_RIGHT),
+               ("Red", FIELD_CONSTANTS.RED_SUBSTATION_LEFT), ("Red", FIELD_CONSTANTS.RED_SUBSTATION_RIGHT))
+Z_AXIS = (0, 0, 1)
+
+
+class VectorEnvironment:
+    def __init__(self, template, count, dt=.1, nearbyPieces=4, pieceCapacity=None, autoReset=True):
+        self.count = count
+        self.dt = dt
+        self.autoReset = autoReset
+        self.nearbyPieces = nearbyPieces
+        robots = template.robots
+        self.robotCount = len(robots)
+        self.alliance = np.array([NODE_ALLIANCES.index(robot.alliance) for robot in robots])
+        self.maxaccel = np.array([robot.maxaccel for robot in robots], dtype=float)
+        self.maxvel = np.array([robot.maxvel for robot in robots], dtype=float)
+        self.frame = np.array([robot.frame for robot in robots], dtype=float)
+        self.intakeHalf = np.array([tuple(robot.INTAKE_HALF_SIZE) for robot in robots], dtype=float) + \
+            np.array([robot.intakeSlop for robot in robots], dtype=float)[:, None]
+        self.buildJoints(robots)
+        self.capacity = pieceCapacity or len(template.pieces) + len(SUBSTATIONS) + 2 * self.robotCount + 8
+        if nearbyPieces >= self.capacity:
+            raise ValueError(f"nearbyPieces must be below pieceCapacity {self.capacity}")
+        self.nodeCenters, self.nodeHalfSizes, self.nodeTypes, self.nodeRed = scoringNodes()
+        self.allianceNodes = (np.flatnonzero(self.nodeRed), np.flatnonzero(~self.nodeRed)) # NODE_ALLIANCES order
+        self.nodeLow = [self.nodeCenters[nodes] - self.nodeHalfSizes for nodes in self.allianceNodes]
+        self.nodeHigh = [self.nodeCenters[nodes] + self.nodeHalfSizes for nodes in self.allianceNodes]
+        self.gridLow = [low.min(axis=0) for low in self.nodeLow]
+        self.gridHigh = [high.max(axis=0) for high in self.nodeHigh]
+        self.actionSize = len(ACTION_FIELDS) + self.maxJoints
+        self.observationSize = 11 + 2 * self.maxJoints + 5 * nearbyPieces + 54 + 2
+        self.initial = self.templateState(template)
+        self.state = {name: np.repeat(value[None], count, axis=0) for name, value in self.initial.items()}
+        self.observations = np.zeros((count, self.robotCount, self.observationSize), dtype=np.float32)
+        self.rewards = np.zeros((count, self.robotCount), dtype=np.float32)
+        self.terminated = np.zeros(count, dtype=bool)
+        self.truncated = np.zeros(count, dtype=bool)
+        self.finalScore = np.zeros((count, 2))
+        self.rows = np.arange(count)
+        self.endEffectors = self.endPositions()
+
+    # flat joint table over every robot's chain, parents before children
+    def buildJoints(self, robots):
+        self.joints = []
+        offset = 0
+        for index, robot in enumerate(robots):
+            names = {joint.name: offset + slot for slot, joint in enumerate(robot.CHAIN.joints)}
+            for slot, joint in enumerate(robot.CHAIN.joints):
+                self.joints.append((index, slot, joint, getattr(robot, joint.name), names.get(joint.parent, -1)))
+            offset += len(robot.CHAIN.joints)
+        self.jointRobot = np.array([robot for robot, _, _, _, _ in self.joints], dtype=int)
+        self.jointSlot = np.array([slot for _, slot, _, _, _ in self.joints], dtype=int)
+        self.jointMaxRate = np.array([subsystem.getJointState()[2] for _, _, _, subsystem, _ in self.joints], dtype=float)
+        self.jointAccel = np.array([subsystem.getJointState()[3] for _, _, _, subsystem, _ in self.joints], dtype=float)
+        self.endEffector = np.array([[index for index, (robot, _, joint, _, _) in enumerate(self.joints)
+                                      if robot == r and joint.name == robots[r].CHAIN.endEffector][0] for r in range(len(robots))])
+        self.jointMount = [np.array((subsystem.pos.x, subsystem.pos.y, subsystem.pos.z)) for _, _, _, subsystem, _ in self.joints]
+        self.maxJoints = max(len(robot.CHAIN.joints) for robot in robots)
+
+    def templateState(self, template):
+        robots = template.robots
+        pieceIndex = {id(piece): index for index, piece in enumerate(template.pieces)}
+        capacity = self.capacity
+        state = {
+            "pos": np.array([(robot.pos.x, robot.pos.y) for robot in robots], dtype=float),
+            "vel": np.array([(robot.velocity.x, robot.velocity.y) for robot in robots], dtype=float),
+            "target": np.array([(robot.targetVel.x, robot.targetVel.y) for robot in robots], dtype=float),
+            "theta": np.array([robot.theta for robot in robots], dtype=float),
+            "dtheta": np.array([robot.dtheta for robot in robots], dtype=float),
+            "intaking": np.array([robot.intaking for robot in robots]),
+            "held": np.array([pieceIndex[id(robot.pieceHeld)] if robot.pieceHeld is not None else -1 for robot in robots]),
+            "jointValue": np.array([subsystem.getJointState()[0] for _, _, _, subsystem, _ in self.joints], dtype=float),
+            "jointRate": np.array([subsystem.getJointState()[1] for _, _, _, subsystem, _ in self.joints], dtype=float),
+            "jointTarget": np.array([subsystem.targetVel for _, _, _, subsystem, _ in self.joints], dtype=float),
+            "piecePos": np.zeros((3, capacity)), # coordinate-major, so each coordinate row is contiguous
+            "pieceVel": np.zeros((3, capacity)),
+            "pieceLast": np.zeros((3, capacity)),
+            "pieceFresh": np.zeros(capacity, dtype=bool), # lastPos is None: the next scoring test is a point test
+            "pieceType": np.zeros(capacity, dtype=int),
+            "pieceScored": np.zeros(capacity, dtype=bool),
+            "pieceActive": np.zeros(capacity, dtype=bool),
+            "pieceHolder": np.full(capacity, -1),
+            "pieceSerial": np.zeros(capacity, dtype=int), # creation order, the order Environment.pieces keeps
+            "serial": np.array(len(template.pieces)),
+            "pieceToAdd": np.array([template.pieceToAdd[alliance].value for alliance in NODE_ALLIANCES]),
+            "grid": np.zeros((2, 3, 9), dtype=int),
+            "autoBonus": np.zeros(2),
+            "score": np.zeros(2),
+            "mode": np.array(AUTO),
+            "timeRemaining": np.array(float(AUTO_TIME)),
+            "time": np.array(float(template.time)),
+        }
+        if len(template.pieces) > capacity:
+            raise ValueError(f"{len(template.pieces)} pieces do not fit in pieceCapacity {capacity}")
+        for index, piece in enumerate(template.pieces):
+            state["piecePos"][:, index] = (piece.pos.x, piece.pos.y, piece.pos.z)
+            state["pieceVel"][:, index] = (piece.vel.x, piece.vel.y, piece.vel.z)
+            last = piece.lastPos if piece.lastPos is not None else piece.pos
+            state["pieceLast"][:, index] = (last.x, last.y, last.z)
+            state["pieceFresh"][index] = piece.lastPos is None
+            state["pieceType"][index] = piece.type.value
+            state["pieceScored"][index] = piece.scored
+            state["pieceActive"][index] = True
+            state["pieceSerial"][index] = index
+        for robot, held in enumerate(state["held"]):
+            if held >= 0:
+                state["pieceHolder"][held] = robot
+        for alliance, rows in enumerate(template.scoring.grid[name] for name in NODE_ALLIANCES):
+            state["grid"][alliance] = rows
+        return state
+
+    def reset(self):
+        for name, value in self.initial.items():
+            self.state[name][...] = value
+        self.terminated[:] = False
+        self.truncated[:] = False
+        self.updateScore()
+        self.endEffectors = self.endPositions()
+        self.observe()
+        return self.observations, {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=float)
+        s = self.state
+        previous = s["score"].copy()
+        self.applyActions(actions)
+        self.updateRobots()
+        self.updatePieces()
+        s["time"] += self.dt
+        s["timeRemaining"] -= np.where(s["mode"] != DISABLED, self.dt, 0)
+        self.updateMode()
+
+        delta = s["score"] - previous
+        self.rewards[...] = delta[:, self.alliance]
+        self.terminated[...] = s["mode"] == DISABLED
+        if self.autoReset and self.terminated.any():
+            finished = np.flatnonzero(self.terminated)
+            self.finalScore[finished] = s["score"][finished]
+            for name, value in self.initial.items():
+                s[name][finished] = value
+            self.updateScore(finished)
+            self.endEffectors[finished] = self.endPositions()[finished]
+        self.observe()
+        return self.observations, self.rewards, self.terminated, self.truncated, {}
+
+    # Environment.applyIntent for every robot at once
+    def applyActions(self, actions):
+        s = self.state
+        target = actions[..., 0:2]
+        length = np.sqrt(target[..., 0] * target[..., 0] + target[..., 1] * target[..., 1])
+        fast = length > self.maxvel
+        safe = np.where(fast, length, 1)[..., None]
+        s["target"][...] = np.where(fast[..., None], target / safe * self.maxvel[:, None], target)
+        s["dtheta"][...] = actions[..., 2]
+        s["jointTarget"][...] = actions[:, self.jointRobot, len(ACTION_FIELDS) + self.jointSlot]
+
+        drops = (actions[..., 4] > .5) & (s["held"] >= 0)
+        if drops.any():
+            rows, robots = np.nonzero(drops)
+            pieces = s["held"][rows, robots]
+            s["pieceHolder"][rows, pieces] = -1
+            s["pieceFresh"][rows, pieces] = True
+            s["held"][rows, robots] = -1
+        s["intaking"] |= actions[..., 3] > .5
+        for robot in range(self.robotCount):
+            request = np.rint(actions[:, robot, 5]).astype(int)
+            chosen = (request == PieceType.CUBE.value) | (request == PieceType.CONE.value)
+            s["pieceToAdd"][chosen, self.alliance[robot]] = request[chosen]
+
+    def updateRobots(self):
+        s = self.state
+        dt = self.dt
+        # Robot.updateDrive
+        delta = s["target"] - s["vel"]
+        deltaLength = np.sqrt(delta[..., 0] * delta[..., 0] + delta[..., 1] * delta[..., 1])
+        moving = deltaLength != 0
+        accel = np.where(moving[..., None], delta / np.where(moving, deltaLength, 1)[..., None], 0) * self.maxaccel[:, None]
+        step = accel * dt
+        stepLength = np.sqrt(step[..., 0] * step[..., 0] + step[..., 1] * step[..., 1])
+        s["vel"][...] = np.where((stepLength >= deltaLength)[..., None], s["target"], s["vel"] + step)
+        s["pos"] += s["vel"] * dt
+        s["theta"] += s["dtheta"] * dt
+
+        # Elevator/Pivot.update, then the chain's limits in mount order
+        rate, target = s["jointRate"], s["jointTarget"]
+        rate[...] = np.where(rate > target, np.maximum(rate - self.jointAccel * dt, target), rate)
+        rate[...] = np.where(rate < target, np.minimum(rate + self.jointAccel * dt, target), rate)
+        np.clip(rate, -self.jointMaxRate, self.jointMaxRate, out=rate)
+        value = s["jointValue"]
+        value += rate * dt
+        for index, (_, _, joint, subsystem, parent) in enumerate(self.joints):
+            if isinstance(joint, Prismatic):
+                upper = subsystem.maxheight
+            elif joint.relativeLimits is not None:
+                upper = value[:, parent] + joint.relativeLimits[1]
+            else:
+                upper = subsystem.maxAngle
+            value[:, index] = np.maximum(np.minimum(value[:, index], upper), 0)
+
+        self.endEffectors = self.endPositions()
+        self.followHeld()
+        self.intake()
+        self.checkBorders()
+
+    # end effectors in field coordinates (count, robots, 3), Elevator/Pivot.getEndPosition down each chain
+    def endPositions(self):
+        s = self.state
+        value = s["jointValue"]
+        ends = [None] * len(self.joints)
+        for index, (_, _, joint, subsystem, parent) in enumerate(self.joints):
+            mount = self.jointMount[index] if parent < 0 else ends[parent]
+            end = np.empty((self.count, 3))
+            if isinstance(joint, Prismatic):
+                angle = value[:, parent] if joint.inheritAngle else subsystem.angle
+                cos, sin = batchmath.trig(angle)
+                height = value[:, index]
+                end[:, 0] = height * sin
+                end[:, 1] = 0
+                end[:, 2] = height * cos
+            else:
+                cos, sin = batchmath.trig(-(value[:, index] + joint.angleOffset))
+                end[:, 0] = joint.length * cos
+                end[:, 1] = 0
+                end[:, 2] = -joint.length * sin
+            ends[index] = end + mount
+        local = np.stack([ends[index] for index in self.endEffector], axis=1)
+        world = batchmath.rotate3(local, s["theta"], Z_AXIS)
+        world[..., 0:2] += s["pos"]
+        return world
+
+    def followHeld(self):
+        s = self.state
+        rows, robots = np.nonzero(s["held"] >= 0)
+        s["piecePos"][rows, :, s["held"][rows, robots]] = self.endEffectors[rows, robots]
+
+    # Robot.intake against every piece, robots in order, the oldest piece in the zone first
+    def intake(self):
+        s = self.state
+        loose = s["pieceActive"] & ~s["pieceScored"] & (s["pieceHolder"] < 0)
+        for robot in range(self.robotCount):
+            rows = np.flatnonzero(s["intaking"][:, robot] & (s["held"][:, robot] < 0))
+            if len(rows) == 0:
+                continue
+            inside = loose[rows]
+            for axis in range(3):
+                coord = s["piecePos"][rows, axis]
+                center = self.endEffectors[rows, robot, axis, None]
+                inside &= (coord >= center - self.intakeHalf[robot, axis]) & (coord <= center + self.intakeHalf[robot, axis])
+            caught = inside.any(axis=1)
+            if not caught.any():
+                continue
+            rows, inside = rows[caught], inside[caught]
+            pieces = np.where(inside, s["pieceSerial"][rows], np.iinfo(int).max).argmin(axis=1)
+            s["held"][rows, robot] = pieces
+            s["pieceHolder"][rows, pieces] = robot
+            s["intaking"][rows, robot] = False
+            loose[rows, pieces] = False
+
+    # Environment.checkBorders, rule by rule
+    def checkBorders(self):
+        s = self.state
+        x, y = s["pos"][..., 0], s["pos"][..., 1]
+        halfX, halfY = self.frame[:, 0] / 2, self.frame[:, 1] / 2
+        width, height = constants.FIELD_WIDTH, constants.FIELD_HEIGHT
+        x[...] = np.where(x + halfX > width, width - halfX, x)
+        x[...] = np.where(x - halfX < 0, halfX, x)
+        y[...] = np.where(y + halfY > height, height - halfY, y)
+        y[...] = np.where(y - halfY < 0, halfY, y)
+
+        safe = (y - halfX < 132.25) | (y + halfX > height - 132.25)
+        x[...] = np.where(safe & (x + halfX > 216) & (x < 216), 216 - halfX, x)
+        x[...] = np.where(safe & (x - halfX < 216) & (x > 216), 216 + halfX, x)
+
+        for edge in (60, 157):
+            station = (((y - halfX < 190) & (y + halfX > 120)) |
+                       ((y + halfX > height - 190) & (y - halfX < height - 120)))
+            x[...] = np.where(station & (x + halfX > edge) & (x < edge), edge - halfX, x)
+            x[...] = np.where(station & (x - halfX < edge) & (x > edge), edge + halfX, x)
+
+        grid = x < 216
+        y[...] = np.where(grid & (y - halfX < 56), 56 + halfX, y)
+        y[...] = np.where(grid & (y + halfX > height - 56), height - (56 + halfX), y)
+
+    def updatePieces(self):
+        s = self.state
+        self.checkScoring()
+        self.updateScore()
+
+        # Environment.movePieces
+        loose = s["pieceActive"] & ~s["pieceScored"] & (s["pieceHolder"] < 0)
+        pos, vel = s["piecePos"], s["pieceVel"]
+        np.copyto(s["pieceLast"], pos, where=loose[:, None])
+        s["pieceFresh"] &= ~loose
+        moved = pos + vel * self.dt
+        np.maximum(moved[:, 2], 0, out=moved[:, 2])
+        np.copyto(pos, moved, where=loose[:, None])
+        airborne = loose & (pos[:, 2] > 0)
+        vel[:, 2] -= np.where(airborne, GRAVITY * self.dt, 0)
+        np.copyto(vel, 0, where=(loose & ~airborne)[:, None])
+        self.addPieces()
+
+    # Environment.checkScoring for the pieces that moved or were just let go
+    def checkScoring(self):
+        s = self.state
+        loose = s["pieceActive"] & ~s["pieceScored"] & (s["pieceHolder"] < 0)
+        pos, last = s["piecePos"], s["pieceLast"]
+        candidates = loose & (s["pieceFresh"] | (pos != last).any(axis=1))
+        rows, pieces = np.nonzero(candidates)
+        if len(rows) == 0:
+            return
+        ends = pos[rows, :, pieces]
+        starts = np.where(s["pieceFresh"][rows, pieces, None], ends, last[rows, :, pieces])
+        types = s["pieceType"][rows, pieces]
+        # only the grid on the piece's half of the field can score it (Environment.checkScoring), and only the nodes
+        # the path's bounding box overlaps need the exact test
+        half = ends[:, 1] >= constants.FIELD_HEIGHT / 2
+        low, high = np.minimum(starts, ends)[:, None], np.maximum(starts, ends)[:, None]
+        for alliance, nodes in enumerate(self.allianceNodes):
+            tested = np.flatnonzero((half == alliance) & (low[:, 0] < self.gridHigh[alliance]).all(axis=1) &
+                                    (high[:, 0] > self.gridLow[alliance]).all(axis=1))
+            overlap = ((low[tested] < self.nodeHigh[alliance]) & (high[tested] > self.nodeLow[alliance])).all(axis=2)
+            nodeTypes = self.nodeTypes[nodes]
+            overlap &= (nodeTypes == NodeType.HYBRID.value) | (nodeTypes == types[tested, None])
+            candidate, slot = np.nonzero(overlap)
+            if len(candidate) == 0:
+                continue
+            candidate = tested[candidate]
+            hit = segmentsHitPairedBoxes(starts[candidate], ends[candidate], self.nodeCenters[nodes[slot]], self.nodeHalfSizes)
+            # pairs come out piece by piece in node order, so a piece's first hit is its first matching node
+            candidate, first = np.unique(candidate[hit], return_index=True)
+            slot = slot[hit][first]
+            np.add.at(s["grid"], (rows[candidate], alliance, slot // 9, slot % 9), 1)
+            s["pieceScored"][rows[candidate], pieces[candidate]] = True
+
+    # ScoringManager.update for the given rows (all by default)
+    def updateScore(self, rows=slice(None)):
+        s = self.state
+        grid = s["grid"][rows]
+        filled = grid > 0
+        points = (filled.sum(axis=3) * LEVEL_POINTS).sum(axis=2)
+        # greedy links along each row are floor(run / 3) for every run of filled nodes
+        run = np.zeros(filled.shape[:3], dtype=int)
+        links = np.zeros(filled.shape[:2], dtype=int)
+        for column in range(9):
+            run = (run + 1) * filled[..., column]
+            links += ((run > 0) & (run % 3 == 0)).sum(axis=2)
+        supercharged = np.where(links == 9, 3 * (grid > 1).sum(axis=(2, 3)), 0)
+        s["score"][rows] = points + 5 * links + supercharged + s["autoBonus"][rows]
+
+    # Environment.addPieces: substations hold their docked piece still (as the alliance's requested type) or get a new one
+    def addPieces(self):
+        s = self.state
+        present = s["pieceActive"] & ~s["pieceScored"]
+        pos = s["piecePos"]
+        for alliance, spot in SUBSTATIONS:
+            inside = present & ((pos[:, 0] >= spot.x - 10) & (pos[:, 0] <= spot.x + 10) &
+                                (pos[:, 1] >= spot.y - 15) & (pos[:, 1] <= spot.y + 15) &
+                                (pos[:, 2] >= spot.z - 10) & (pos[:, 2] <= spot.z + 10))
+            allianceIndex = NODE_ALLIANCES.index(alliance)
+            pos[:, 2][inside] = spot.z
+            s["pieceVel"][:, 2][inside] = 0
+            s["pieceType"][inside] = np.broadcast_to(s["pieceToAdd"][:, allianceIndex, None], inside.shape)[inside]
+            empty = ~inside.any(axis=1)
+            if not empty.any():
+                continue
+            free = ~s["pieceActive"]
+            rows = np.flatnonzero(empty & free.any(axis=1))
+            slots = free[rows].argmax(axis=1)
+            s["piecePos"][rows, :, slots] = (spot.x, spot.y, spot.z)
+            s["pieceVel"][rows, :, slots] = 0
+            s["pieceLast"][rows, :, slots] = (spot.x, spot.y, spot.z)
+            s["pieceFresh"][rows, slots] = True
+            s["pieceType"][rows, slots] = s["pieceToAdd"][rows, allianceIndex]
+            s["pieceScored"][rows, slots] = False
+            s["pieceActive"][rows, slots] = True
+            s["pieceHolder"][rows, slots] = -1
+            s["pieceSerial"][rows, slots] = s["serial"][rows]
+            s["serial"][rows] += 1
+
+    # Match.step's transitions: auto -> teleop (with ScoringManager.updateEndOfAuto) -> disabled
+    def updateMode(self):
+        s = self.state
+        expired = s["timeRemaining"] <= 0
+        ending = expired & (s["mode"] == AUTO)
+        if ending.any():
+            rows = np.flatnonzero(ending)
+            s["autoBonus"][rows] = (s["grid"][rows] > 0).sum(axis=(2, 3)) + self.chargeStationPoints(rows)
+            s["mode"][rows] = TELEOP
+            s["timeRemaining"][rows] = TELEOP_TIME
+        s["mode"][expired & (s["mode"] == TELEOP) & ~ending] = DISABLED
+
+    # best auto charge station points per alliance: engaged 12, docked 8
+    def chargeStationPoints(self, rows):
+        pos = self.state["pos"][rows]
+        x = pos[..., 0]
+        y = np.where(self.alliance == 0, pos[..., 1], constants.FIELD_HEIGHT - pos[..., 1])
+        low, high = FIELD_CONSTANTS.chargeStationBottomLeft, FIELD_CONSTANTS.chargeStationTopRight
+        balancedLow, balancedHigh = FIELD_CONSTANTS.chargeStationBalancedBottomLeft, FIELD_CONSTANTS.chargeStationBalancedTopRight
+        points = np.where((balancedLow.x < x) & (x < balancedHigh.x) & (balancedLow.y < y) & (y < balancedHigh.y), 12,
+                          np.where((low.x < x) & (x < high.x) & (low.y < y) & (y < high.y), 8, 0))
+        best = np.zeros((len(rows), 2))
+        for alliance in range(2):
+            mine = self.alliance == alliance
+            if mine.any():
+                best[:, alliance] = points[:, mine].max(axis=1)
+        return best
+
+    def observe(self):
+        s = self.state
+        obs = self.observations
+        obs[..., 0:2] = s["pos"]
+        radians = np.radians(s["theta"])
+        obs[..., 2] = np.cos(radians)
+        obs[..., 3] = np.sin(radians)
+        obs[..., 4:6] = s["vel"]
+        obs[..., 6] = s["dtheta"]
+        obs[..., 7] = s["held"] >= 0
+        obs[..., 8:11] = self.endEffectors
+        obs[..., 11:11 + 2 * self.maxJoints] = 0
+        obs[:, self.jointRobot, 11 + 2 * self.jointSlot] = s["jointValue"]
+        obs[:, self.jointRobot, 12 + 2 * self.jointSlot] = s["jointRate"]
+
+        # nearest loose pieces: (dx, dy, z, type, present) each, closest first
+        start = 11 + 2 * self.maxJoints
+        count = self.nearbyPieces
+        loose = s["pieceActive"] & ~s["pieceScored"] & (s["pieceHolder"] < 0)
+        dx = s["piecePos"][:, None, 0] - s["pos"][:, :, 0, None]
+        dy = s["piecePos"][:, None, 1] - s["pos"][:, :, 1, None]
+        distance = dx * dx + dy * dy
+        distance += np.where(loose, 0, np.inf)[:, None]
+        nearest = np.argpartition(distance, count, axis=2)[..., :count]
+        order = np.take_along_axis(distance, nearest, axis=2).argsort(axis=2)
+        nearest = np.take_along_axis(nearest, order, axis=2)
+        present = np.isfinite(np.take_along_axis(distance, nearest, axis=2))
+        rows = self.rows[:, None, None]
+        features = obs[..., start:start + 5 * count].reshape(self.count, self.robotCount, count, 5)
+        features[..., 0] = np.take_along_axis(dx, nearest, axis=2) * present
+        features[..., 1] = np.take_along_axis(dy, nearest, axis=2) * present
+        features[..., 2] = s["piecePos"][rows, 2, nearest] * present
+        features[..., 3] = s["pieceType"][rows, nearest] * present
+        features[..., 4] = present
+
+        start += 5 * count
+        occupied = (s["grid"] > 0).reshape(self.count, 2, 27)
+        obs[..., start:start + 27] = occupied[:, self.alliance]
+        obs[..., start + 27:start + 54] = occupied[:, 1 - self.alliance]
+        obs[..., start + 54] = s["timeRemaining"][:, None]
+        obs[..., start + 55] = s["mode"][:, None]
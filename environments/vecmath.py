@@ -0,0 +1,444 @@
+"""Scalar 2D/3D vectors for the simulation core.
+
+A pure-Python stand-in for the parts of pygame.math.Vector2/Vector3 the simulation uses, so headless runs never
+import pygame. Arithmetic, lengths, epsilon equality and rotations (including the exact results pygame gives for
+multiples of 90 degrees) follow pygame's C implementation. Other rotations use the platform's math.cos/sin, which
+can differ from pygame's build in the last bit. Vectors are sequences, so pygame.Vector2(v) and pygame.draw accept
+them at the visualization boundary.
+
+Batched (NumPy) versions of the same operations live in environments.batchmath.
+"""
+
+import math
+
+EPSILON = 1e-6 # pygame's default Vector epsilon, used by == and the 90 degree special cases
+
+
+# (cos, sin) of a rotation, or None for an exact multiple of 90 degrees, with the angle's quarter turns
+def _rotation(angle):
+    angle = math.fmod(angle, 360.)
+    if angle < 0:
+        angle += 360.
+    if math.fmod(angle + EPSILON, 90.) < 2 * EPSILON:
+        return None, int((angle + EPSILON) / 90) % 4
+    radians = angle * math.pi / 180.
+    return (math.cos(radians), math.sin(radians)), 0
+
+
+_new = object.__new__
+_lastMatrix = (None, None)
+
+
+# rows of the 3D rotation about a unit axis, grouped exactly as pygame evaluates them. The last one is kept because
+# callers rotate many vectors by the same heading in a row.
+def _rotationMatrix(angle, a0, a1, a2):
+    global _lastMatrix
+    key = (angle, a0, a1, a2)
+    cachedKey, matrix = _lastMatrix
+    if cachedKey == key:
+        return matrix
+    trig, quarter = _rotation(angle)
+    if trig is not None:
+        cos, sin = trig
+        rest = 1 - cos
+        matrix = ((cos + a0 * a0 * rest, a0 * a1 * rest - a2 * sin, a0 * a2 * rest + a1 * sin),
+                  (a0 * a1 * rest + a2 * sin, cos + a1 * a1 * rest, a1 * a2 * rest - a0 * sin),
+                  (a0 * a2 * rest - a1 * sin, a1 * a2 * rest + a0 * sin, cos + a2 * a2 * rest))
+    elif quarter == 0:
+        matrix = ((1., 0., 0.), (0., 1., 0.), (0., 0., 1.))
+    elif quarter == 1:
+        matrix = ((a0 * a0, a0 * a1 - a2, a0 * a2 + a1),
+                  (a0 * a1 + a2, a1 * a1, a1 * a2 - a0),
+                  (a0 * a2 - a1, a1 * a2 + a0, a2 * a2))
+    elif quarter == 2:
+        matrix = ((-1 + a0 * a0 * 2, a0 * a1 * 2, a0 * a2 * 2),
+                  (a0 * a1 * 2, -1 + a1 * a1 * 2, a1 * a2 * 2),
+                  (a0 * a2 * 2, a1 * a2 * 2, -1 + a2 * a2 * 2))
+    else:
+        matrix = ((a0 * a0, a0 * a1 + a2, a0 * a2 - a1),
+                  (a0 * a1 - a2, a1 * a1, a1 * a2 + a0),
+                  (a0 * a2 + a1, a1 * a2 - a0, a2 * a2))
+    _lastMatrix = (key, matrix)
+    return matrix
+
+
+class Vector2:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0., y=None):
+        if y is None:
+            if isinstance(x, (int, float)):
+                y = x
+            else:
+                x, y = x
+        self.x = float(x)
+        self.y = float(y)
+
+    @classmethod
+    def _of(cls, x, y):
+        vector = object.__new__(cls)
+        vector.x = x
+        vector.y = y
+        return vector
+
+    def copy(self):
+        return Vector2._of(self.x, self.y)
+
+    def update(self, x=0., y=None):
+        if y is None:
+            if isinstance(x, (int, float)):
+                y = x
+            else:
+                x, y = x
+        self.x = float(x)
+        self.y = float(y)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y)
+
+    magnitude = length
+
+    def length_squared(self):
+        return self.x * self.x + self.y * self.y
+
+    def normalize(self):
+        length = math.sqrt(self.x * self.x + self.y * self.y)
+        if length == 0:
+            raise ValueError("Can't normalize Vector of length zero")
+        return Vector2._of(self.x / length, self.y / length)
+
+    def dot(self, other):
+        x, y = other
+        return self.x * x + self.y * y
+
+    def distance_to(self, other):
+        x, y = other
+        dx, dy = self.x - x, self.y - y
+        return math.sqrt(dx * dx + dy * dy)
+
+    # counterclockwise, in degrees
+    def rotate(self, angle):
+        trig, quarter = _rotation(angle)
+        x, y = self.x, self.y
+        if trig is not None:
+            cos, sin = trig
+            return Vector2._of(cos * x - sin * y, sin * x + cos * y)
+        if quarter == 0:
+            return Vector2._of(x, y)
+        if quarter == 1:
+            return Vector2._of(-y, x)
+        if quarter == 2:
+            return Vector2._of(-x, -y)
+        return Vector2._of(y, -x)
+
+    def __add__(self, other):
+        if type(other) is Vector2:
+            return Vector2._of(self.x + other.x, self.y + other.y)
+        try:
+            x, y = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return Vector2._of(self.x + x, self.y + y)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if type(other) is Vector2:
+            return Vector2._of(self.x - other.x, self.y - other.y)
+        try:
+            x, y = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return Vector2._of(self.x - x, self.y - y)
+
+    def __rsub__(self, other):
+        try:
+            x, y = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return Vector2._of(x - self.x, y - self.y)
+
+    # scalar product, or the dot product with another vector as in pygame
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector2._of(self.x * other, self.y * other)
+        try:
+            x, y = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return self.x * x + self.y * y
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector2._of(self.x / other, self.y / other)
+        return NotImplemented
+
+    def __iadd__(self, other):
+        x, y = other
+        self.x += x
+        self.y += y
+        return self
+
+    def __isub__(self, other):
+        x, y = other
+        self.x -= x
+        self.y -= y
+        return self
+
+    def __imul__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        self.x *= other
+        self.y *= other
+        return self
+
+    def __neg__(self):
+        return Vector2._of(-self.x, -self.y)
+
+    def __pos__(self):
+        return Vector2._of(self.x, self.y)
+
+    # equal when every coordinate is within EPSILON, like pygame
+    def __eq__(self, other):
+        try:
+            x, y = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        dx, dy = self.x - x, self.y - y
+        return abs(dx) < EPSILON and abs(dy) < EPSILON
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __bool__(self):
+        return self.x != 0 or self.y != 0
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.x, self.y)[index]
+
+    def __setitem__(self, index, value):
+        coords = [self.x, self.y]
+        coords[index] = value
+        self.x, self.y = float(coords[0]), float(coords[1])
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __getstate__(self):
+        return (self.x, self.y)
+
+    def __setstate__(self, state):
+        self.x, self.y = state
+
+    def __repr__(self):
+        return f"<Vector2({self.x:g}, {self.y:g})>"
+
+    def __str__(self):
+        return f"[{self.x:g}, {self.y:g}]"
+
+
+class Vector3:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0., y=None, z=None):
+        if y is None:
+            if isinstance(x, (int, float)):
+                y = z = x
+            else:
+                x, y, z = x
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @classmethod
+    def _of(cls, x, y, z):
+        vector = object.__new__(cls)
+        vector.x = x
+        vector.y = y
+        vector.z = z
+        return vector
+
+    def copy(self):
+        return Vector3._of(self.x, self.y, self.z)
+
+    def update(self, x=0., y=None, z=None):
+        if y is None:
+            if isinstance(x, (int, float)):
+                y = z = x
+            else:
+                x, y, z = x
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    magnitude = length
+
+    def length_squared(self):
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    def normalize(self):
+        length = math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+        if length == 0:
+            raise ValueError("Can't normalize Vector of length zero")
+        return Vector3._of(self.x / length, self.y / length, self.z / length)
+
+    def dot(self, other):
+        x, y, z = other
+        return self.x * x + self.y * y + self.z * z
+
+    def distance_to(self, other):
+        x, y, z = other
+        dx, dy, dz = self.x - x, self.y - y, self.z - z
+        return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+    # right-handed rotation about `axis`, in degrees
+    def rotate(self, angle, axis):
+        if type(axis) is Vector3:
+            a0, a1, a2 = axis.x, axis.y, axis.z
+        else:
+            a0, a1, a2 = (float(value) for value in axis)
+        axisLength2 = a0 * a0 + a1 * a1 + a2 * a2
+        if axisLength2 < EPSILON:
+            raise ValueError("Rotation Axis is to close to Zero")
+        if abs(axisLength2 - 1) > EPSILON:
+            factor = 1. / math.sqrt(axisLength2)
+            a0, a1, a2 = a0 * factor, a1 * factor, a2 * factor
+        (m00, m01, m02), (m10, m11, m12), (m20, m21, m22) = _rotationMatrix(angle, a0, a1, a2)
+        x, y, z = self.x, self.y, self.z
+        vector = _new(Vector3)
+        vector.x = x * m00 + y * m01 + z * m02
+        vector.y = x * m10 + y * m11 + z * m12
+        vector.z = x * m20 + y * m21 + z * m22
+        return vector
+
+    def __add__(self, other):
+        if type(other) is Vector3:
+            vector = _new(Vector3)
+            vector.x = self.x + other.x
+            vector.y = self.y + other.y
+            vector.z = self.z + other.z
+            return vector
+        try:
+            x, y, z = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return Vector3._of(self.x + x, self.y + y, self.z + z)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if type(other) is Vector3:
+            vector = _new(Vector3)
+            vector.x = self.x - other.x
+            vector.y = self.y - other.y
+            vector.z = self.z - other.z
+            return vector
+        try:
+            x, y, z = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return Vector3._of(self.x - x, self.y - y, self.z - z)
+
+    def __rsub__(self, other):
+        try:
+            x, y, z = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return Vector3._of(x - self.x, y - self.y, z - self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector3._of(self.x * other, self.y * other, self.z * other)
+        try:
+            x, y, z = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return self.x * x + self.y * y + self.z * z
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector3._of(self.x / other, self.y / other, self.z / other)
+        return NotImplemented
+
+    def __iadd__(self, other):
+        x, y, z = other
+        self.x += x
+        self.y += y
+        self.z += z
+        return self
+
+    def __isub__(self, other):
+        x, y, z = other
+        self.x -= x
+        self.y -= y
+        self.z -= z
+        return self
+
+    def __imul__(self, other):
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        self.x *= other
+        self.y *= other
+        self.z *= other
+        return self
+
+    def __neg__(self):
+        return Vector3._of(-self.x, -self.y, -self.z)
+
+    def __pos__(self):
+        return Vector3._of(self.x, self.y, self.z)
+
+    def __eq__(self, other):
+        try:
+            x, y, z = other
+        except (TypeError, ValueError):
+            return NotImplemented
+        return abs(self.x - x) < EPSILON and abs(self.y - y) < EPSILON and abs(self.z - z) < EPSILON
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __bool__(self):
+        return self.x != 0 or self.y != 0 or self.z != 0
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __setitem__(self, index, value):
+        coords = [self.x, self.y, self.z]
+        coords[index] = value
+        self.x, self.y, self.z = float(coords[0]), float(coords[1]), float(coords[2])
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __getstate__(self):
+        return (self.x, self.y, self.z)
+
+    def __setstate__(self, state):
+        self.x, self.y, self.z = state
+
+    def __repr__(self):
+        return f"<Vector3({self.x:g}, {self.y:g}, {self.z:g})>"
+
+    def __str__(self):
+        return f"[{self.x:g}, {self.y:g}, {self.z:g}]"
@@ -0,0 +1,30 @@
+"""Pygame visualizers. Each is imported on first access, so headless code never initializes a display."""
+
+import importlib
+
+_EXPORTS = {
+    "EnvironmentVisualizer": "environments.visualization.fullvisualization",
+    "RobotPositionVisualizer": "environments.visualization.robotvisualization",
+    "SubsystemVisualizer": "environments.visualization.subsystemvisualization",
+    "ElevatorSim": "environments.visualization.subsystemvisualization",
+    "PivotSim": "environments.visualization.subsystemvisualization",
+    "SubsystemsSim": "environments.visualization.subsystemvisualization",
+    "CombinedVisualizer": "environments.visualization.visualization",
+    "TiledVisualizer": "environments.visualization.tiledvisualization",
+    "MatchTile": "environments.visualization.tiledvisualization",
+    "get_screen": "environments.visualization.display",
+    "load_scaled_image": "environments.visualization.display",
+    "SpriteAtlas": "environments.visualization.sprites",
+    "atlas_for": "environments.visualization.sprites",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
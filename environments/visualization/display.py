@@ -0,0 +1,76 @@
+"""Shared pygame setup for the visualizers.
+
+Every visualizer gets its window from get_screen(), which initializes only the display and font modules (pygame.init()
+also brings up audio and joysticks) and hands back the existing window when one of the right size is already open,
+so visualizers embedded in one another share it.
+
+Scaled background images are cached on disk as raw RGB pixels, keyed by a hash of the source file and the target size,
+so the field is decoded and smoothscaled once per size rather than on every launch. The cache lives in
+$VISUALIZER_CACHE, or $XDG_CACHE_HOME/frc-visualizer (~/.cache/frc-visualizer); when it cannot be written the image is
+simply scaled every time.
+"""
+
+from __future__ import annotations
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pygame
+
+FIELD_IMAGE = os.path.join(os.path.dirname(__file__), "charged-up-field.jpg")
+FIELD_UNITS = (315.5, 651.5)  # field width and height in inches, as covered by FIELD_IMAGE
+
+
+def get_screen(screen_size, caption: str) -> pygame.Surface:
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
+    pygame.display.set_caption(caption)
+    screen = pygame.display.get_surface()
+    if screen is None or screen.get_size() != tuple(screen_size):
+        screen = pygame.display.set_mode(screen_size)
+    return screen
+
+
+def cache_dir() -> Path:
+    path = os.environ.get("VISUALIZER_CACHE")
+    if path:
+        return Path(path)
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "frc-visualizer"
+
+
+def fit_size(max_width: int, max_height: int, units=FIELD_UNITS) -> tuple[int, int]:
+    """Largest pixel size with the aspect ratio of `units` (width, height) that fits in max_width x max_height."""
+    width = int(max_width)
+    height = int(width * (units[1] / units[0]))
+    if height > max_height:
+        height = int(max_height)
+        width = int(height * (units[0] / units[1]))
+    return width, height
+
+
+def load_scaled_image(path, size, directory=None) -> pygame.Surface:
+    """`path` smoothscaled to `size`, converted for the current display (which must be open)."""
+    size = (int(size[0]), int(size[1]))
+    source = Path(path).read_bytes()
+    key = hashlib.blake2b(source, digest_size=12)
+    key.update(f"{size[0]}x{size[1]}".encode())
+    cached = Path(directory or cache_dir()) / f"{Path(path).stem}-{key.hexdigest()}-{size[0]}x{size[1]}.rgb"
+    try:
+        pixels = cached.read_bytes()
+        if len(pixels) == size[0] * size[1] * 3:
+            return pygame.image.frombytes(pixels, size, "RGB").convert()
+    except OSError:
+        pass
+
+    image = pygame.transform.smoothscale(pygame.image.load(io.BytesIO(source), str(path)).convert(), size)
+    try:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        partial = cached.with_suffix(f".{os.getpid()}.tmp")
+        partial.write_bytes(pygame.image.tobytes(image, "RGB"))
+        os.replace(partial, cached)
+    except OSError:
+        pass
+    return image
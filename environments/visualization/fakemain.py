@@ -1,21 +1,17 @@
-from pathlib import Path
-import sys
-parent_dir = str(Path(__file__).resolve().parents[1])
-sys.path.insert(0, parent_dir)
-
-from pygame import Vector3
+# run from the repository root: python -m environments.visualization.fakemain
+from environments.vecmath import Vector3
 
 from environments.piece import Piece, PieceType
-from fullvisualization import EnvironmentVisualizer
+from environments.visualization.fullvisualization import EnvironmentVisualizer
 
 
-from environment import Environment
-from subsystemvisualization import SubsystemsSim, ElevatorSim, PivotSim
-from robots.robots.poofs import PoofsRobot
-from robots.robots.jitb import JITBRobot
-from robots.robots.krawler import KrawlerBot
-from robots.robots.bread import BreadRobot
-from robots.robots.op import OPRobot
+from environments.environment import Environment
+from environments.visualization.subsystemvisualization import SubsystemsSim, ElevatorSim, PivotSim
+from environments.robots.robots.poofs import PoofsRobot
+from environments.robots.robots.jitb import JITBRobot
+from environments.robots.robots.krawler import KrawlerBot
+from environments.robots.robots.bread import BreadRobot
+from environments.robots.robots.op import OPRobot
 
 # robot = PoofsRobot(0, 0, 0, 0, 0, (20, 20))
 # sim = Sim([ElevatorSim(robot.elevator), ElevatorSim(robot.laterator)])
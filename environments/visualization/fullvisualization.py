@@ -14,9 +14,13 @@ Controls:
     A / D : pivot CCW / CW
 
   Global:
+    SPACE : drop the held piece and run the intake
     R     : reset robot poses and subsystem states
     ESC   : quit
 
+  Keys only drive the selected robot when run(dt, teleop=True); pass an environments.teleop.IntentRecorder as
+  `recorder` to log the session for headless replay.
+
 Note: Environment.update will advance robot physics and intake checks; Environment.movePieces (if present)
 will be called to animate free pieces. This visualizer avoids double-updating robots by delegating motion
 commands to RobotPositionVisualizer (target velocities), then calling environment.update(dt) once per frame.
@@ -24,40 +28,22 @@ commands to RobotPositionVisualizer (target velocities), then calling environmen
 
 from __future__ import annotations
 import os
-import sys
 import pygame
-from pygame import Vector2, Vector3
+from pygame import Vector2
+from environments.vecmath import Vector3
 from typing import Iterable
 
-
-def _augment_path():
-    here = os.path.dirname(__file__)
-    env_dir = os.path.dirname(here)
-    robots_dir = os.path.join(env_dir, "robots")
-    subsystems_dir = os.path.join(robots_dir, "subsystems")
-    for p in (env_dir, robots_dir, subsystems_dir):
-        if p not in sys.path:
-            sys.path.append(p)
-
-
-_augment_path()
-from environments.piece import Piece, PieceType  # type: ignore
-from environment import Environment
-from environments.visualization.robotvisualization import RobotPositionVisualizer  # type: ignore
-from environments.visualization.subsystemvisualization import SubsystemVisualizer  # type: ignore
+from environments.control import ControlIntent
+from environments.piece import Piece, PieceType
+from environments.environment import Environment
+from environments.visualization.display import FIELD_IMAGE, FIELD_UNITS, fit_size, get_screen, load_scaled_image
+from environments.visualization.robotvisualization import RobotPositionVisualizer
+from environments.visualization.sprites import PIECE_COLORS, atlas_for, label, place
+from environments.visualization.subsystemvisualization import SubsystemVisualizer
 from constants import FIELD_CONSTANTS
 from environments.piece import NodeType
-from subsystems.elevator import Elevator
-from subsystems.pivot import Pivot
-
-
-PIECE_COLORS = {
-    PieceType.CUBE: (140, 110, 255),
-    PieceType.CONE: (255, 210, 80),
-    NodeType.CUBE: (140, 110, 255),
-    NodeType.CONE: (255, 210, 80),
-    NodeType.HYBRID: (0, 0, 0),
-}
+from environments.robots.subsystems.elevator import Elevator
+from environments.robots.subsystems.pivot import Pivot
 
 
 def world_to_screen(origin_px: Vector2, ppu: float, v: Vector2) -> Vector2:
@@ -65,13 +51,12 @@ def world_to_screen(origin_px: Vector2, ppu: float, v: Vector2) -> Vector2:
 
 
 class EnvironmentVisualizer:
-    def __init__(self, env: Environment, screen_size=(1280, 1040), pixels_per_unit=3):
-        pygame.init()
-        pygame.display.set_caption("Environment Visualizer")
-        self.screen = pygame.display.set_mode(screen_size)
+    def __init__(self, env: Environment, screen_size=(1280, 1040), pixels_per_unit=3, recorder=None):
+        self.screen = get_screen(screen_size, "Environment Visualizer")
         self.clock = pygame.time.Clock()
         self.running = True
         self.env = env
+        self.recorder = recorder # environments.teleop.IntentRecorder for the intents handle_input applies
         # pixels_per_unit will be computed from the field image if available
         self.ppu = pixels_per_unit
 
@@ -83,31 +68,18 @@ class EnvironmentVisualizer:
         # Side view (x-z) origin - will be set after field_origin is computed
         self.side_view_origin = Vector2(0, 0)  # placeholder
 
-        # Try to load a field background image and scale it to represent
-        # the real field in inches. Robot positions/dimensions are in inches,
-        # so we use 324in (width) x 648in (height) as the field extent here.
+        # Field background, scaled to fit the right panel and cached on disk (see display.load_scaled_image).
+        # Robot positions/dimensions are in inches, so the image spans FIELD_UNITS inches.
         self.field_image = None
         self.field_image_rect = None
-        field_image_path = os.path.join(os.path.dirname(__file__), "charged-up-field.jpg")
-        # field dimensions in inches (width, height)
-        field_units_w, field_units_h = 315.5, 651.5
         try:
-            if os.path.exists(field_image_path):
-                img = pygame.image.load(field_image_path).convert()
-                # determine available width in right panel and scale image to fit
+            if os.path.exists(FIELD_IMAGE):
+                # available width in right panel, capped by screen height
                 right_width = w - self.divider_x - 20
-                desired_field_px_w = int(right_width * 0.95)
-                # maintain the field aspect ratio using units (inches)
-                desired_field_px_h = int(desired_field_px_w * (field_units_h / field_units_w))
-                # If the desired height is too tall for screen, cap by height
-                max_field_h = int(h * 0.85)
-                if desired_field_px_h > max_field_h:
-                    desired_field_px_h = max_field_h
-                    desired_field_px_w = int(desired_field_px_h * (field_units_w / field_units_h))
-
-                self.field_image = pygame.transform.smoothscale(img, (desired_field_px_w, desired_field_px_h))
+                desired_field_px_w, desired_field_px_h = fit_size(right_width * 0.95, h * 0.85)
+                self.field_image = load_scaled_image(FIELD_IMAGE, (desired_field_px_w, desired_field_px_h))
                 # compute pixels-per-unit (pixels per inch) based on scaled image width
-                self.ppu = desired_field_px_w / field_units_w
+                self.ppu = desired_field_px_w / FIELD_UNITS[0]
 
                 # center field image within right panel horizontally and place it with bottom aligned to ~78% height
                 field_left = self.divider_x + (right_width - desired_field_px_w) // 2 + 10
@@ -127,6 +99,9 @@ class EnvironmentVisualizer:
             self.field_origin = Vector2(int(w * 0.60), int(h * 0.78))
             self.side_view_origin = Vector2(self.field_origin.x, self.divider_y + int((h - self.divider_y) * 0.95))
 
+        # markers, robot outlines and intake overlays pre-rendered at this scale (see sprites.py)
+        self.atlas = atlas_for(self.ppu)
+
         # Robot visualizer (reuse; no extra window created because we pass screen)
         self.robot_viz = RobotPositionVisualizer(robots=self.env.robots, screen=self.screen, screen_size=screen_size, pixels_per_unit=self.ppu)
 
@@ -140,6 +115,9 @@ class EnvironmentVisualizer:
         # Collect subsystems from robots plus any provided extras
         subsystems = list(self._collect_subsystems(self.env.robots))
         self.subsys_viz = SubsystemVisualizer(subsystems=subsystems, origin=self.subsystem_origin, pixels_per_unit=self.ppu)
+        # (robot, subsystem) pairs for the field view, matched once rather than by scanning the robots every frame
+        self.field_subsystems = [(robot, subsys) for robot in self.env.robots for subsys in self._collect_subsystems([robot])
+                                 if hasattr(subsys, 'pos')]
 
     # -------------- Helpers --------------
     def _collect_subsystems(self, robots) -> Iterable:
@@ -160,16 +138,25 @@ class EnvironmentVisualizer:
         return list(self.env.pieces)
 
     # -------------- Input / Update --------------
-    def handle_input(self):
-        self.robot_viz.handle_input()
-        self.subsys_viz.handle_input()
+    def handle_input(self, dt: float = 0.) -> ControlIntent | None:
+        """Intent for the selected robot from the keys currently held, for the next `dt` seconds. It is applied, and
+        written to the recorder if there is one, so a session can be replayed headless with
+        environments.teleop.ReplayController."""
+        intent = self.robot_viz.handle_input()
+        if intent is None:
+            return None
+        robot = self.env.robots[self.robot_viz.current_index]
+        intent.jointVelocities = self.subsys_viz.joint_velocities(robot)
 
         keys = pygame.key.get_pressed()
         if keys[pygame.K_SPACE]:
-            for robot in self.env.robots:
-                robot.drop()
-                if robot.pieceHeld is None:
-                    robot.runIntake()
+            intent.drop = True
+            intent.runIntake = True
+
+        if self.recorder is not None:
+            self.recorder.record(self.env.time, intent, dt)
+        self.env.applyIntent(robot, intent)
+        return intent
 
     def update(self, dt: float):
         # Apply motion via env update (robots will consume target velocities from robot_viz input)
@@ -187,43 +174,19 @@ class EnvironmentVisualizer:
 
     # -------------- Drawing --------------
     def draw_pieces(self):
-        """Draw game pieces on the top-down field view (x-y plane)."""
+        """Draw game pieces on the top-down field view (x-y plane) as one batch of atlas blits."""
+        sprites = self.atlas.pieces
+        fallback = self.atlas.dot((200, 200, 200), 6)
+        origin, ppu = self.field_origin, self.ppu
+        blits = []
         for piece in self._iter_pieces():
-            if not (hasattr(piece, 'pos') and hasattr(piece, 'type')):
-                continue
-            # Project x-y plane for top-down field view
             try:
-                planar = Vector2(piece.pos.x, piece.pos.y)
-            except Exception:
+                x, y = piece.pos.x, piece.pos.y
+            except AttributeError:
                 # skip pieces with unexpected position format
                 continue
-            scr = world_to_screen(self.field_origin, self.ppu, planar)
-            
-            color = PIECE_COLORS.get(piece.type, (200, 200, 200))
-
-            # Piece size in pixels (scaled appropriately for visibility)
-            base_size = 6  # increased for better visibility
-            size = max(5, int(base_size))
-
-            # Draw cones as triangles and cubes as squares (screen-space)
-            if piece.type == PieceType.CONE:
-                # triangle pointing up on screen
-                p1 = (int(scr.x), int(scr.y - size))
-                p2 = (int(scr.x - size), int(scr.y + size))
-                p3 = (int(scr.x + size), int(scr.y + size))
-                pygame.draw.polygon(self.screen, color, [p1, p2, p3])
-                # Draw outline for better visibility
-                pygame.draw.polygon(self.screen, (255, 255, 255), [p1, p2, p3], width=1)
-            elif piece.type == PieceType.CUBE:
-                s = size
-                rect = pygame.Rect(int(scr.x - s), int(scr.y - s), int(2 * s), int(2 * s))
-                pygame.draw.rect(self.screen, color, rect)
-                # Draw outline for better visibility
-                pygame.draw.rect(self.screen, (255, 255, 255), rect, width=1)
-            else:
-                # fallback to a small circle
-                pygame.draw.circle(self.screen, color, (int(scr.x), int(scr.y)), size)
-                pygame.draw.circle(self.screen, (255, 255, 255), (int(scr.x), int(scr.y)), size, width=1)
+            blits.append(place(sprites.get(getattr(piece, 'type', None), fallback), int(origin.x + x * ppu), int(origin.y - y * ppu)))
+        self.screen.blits(blits, doreturn=False)
 
     def draw_divider(self):
         x = int(self.screen.get_width() * 0.35)
@@ -233,129 +196,60 @@ class EnvironmentVisualizer:
 
     def draw_subsystems_on_field(self):
         """Draw subsystems (elevators and pivots) on the main field view (x-y plane), rotated with their robot."""
-        # Match each subsystem to its robot
-        for robot in self.env.robots:
-            for subsys in self.subsys_viz.subsystems:
-                if not hasattr(subsys, 'pos'):
-                    continue
-                try:
-                    # Find subsystem in robot's attributes
-                    belongs_to_robot = False
-                    for attr in dir(robot):
-                        if not attr.startswith('_'):
-                            try:
-                                if getattr(robot, attr) is subsys:
-                                    belongs_to_robot = True
-                                    break
-                            except:
-                                pass
-                    
-                    if not belongs_to_robot:
-                        continue
-                    
-                    if isinstance(subsys, Elevator):
-                        # Get subsystem position relative to robot
-                        local_pos = Vector2(subsys.pos.x, subsys.pos.y) if hasattr(subsys.pos, 'y') else Vector2(subsys.pos.x, 0)
-                        # Rotate by robot angle and translate to robot position
-                        rotated_pos = local_pos.rotate(robot.theta)
-                        world_pos = Vector2(robot.pos.x, robot.pos.y) + rotated_pos
-                        base_screen = world_to_screen(self.field_origin, self.ppu, world_pos)
-                        
-                        # Draw elevator carriage position projected onto field
-                        car_dir = Vector2(0, subsys.height).rotate(subsys.angle + robot.theta)
-                        car_world = world_pos + car_dir
-                        car_screen = world_to_screen(self.field_origin, self.ppu, car_world)
-                        
-                        # Draw line from base to carriage
-                        pygame.draw.line(self.screen, (100, 200, 255), base_screen, car_screen, 3)
-                        pygame.draw.circle(self.screen, (100, 200, 255), car_screen, 5)
-                    
-                    elif isinstance(subsys, Pivot):
-                        # Get subsystem position relative to robot
-                        local_pos = Vector2(subsys.pos.x, subsys.pos.y) if hasattr(subsys.pos, 'y') else Vector2(subsys.pos.x, 0)
-                        # Rotate by robot angle and translate to robot position
-                        rotated_pos = local_pos.rotate(robot.theta)
-                        world_pos = Vector2(robot.pos.x, robot.pos.y) + rotated_pos
-                        base_screen = world_to_screen(self.field_origin, self.ppu, world_pos)
-                        
-                        # Draw pivot arm rotated with robot
-                        arm_dir = Vector2(subsys.length, 0).rotate(subsys.angle + robot.theta)
-                        end_world = world_pos + arm_dir
-                        end_screen = world_to_screen(self.field_origin, self.ppu, end_world)
-                        
-                        # Draw line from base to end
-                        pygame.draw.line(self.screen, (255, 170, 80), base_screen, end_screen, 4)
-                        pygame.draw.circle(self.screen, (255, 170, 80), end_screen, 5)
-                except Exception:
-                    pass
-    
+        for robot, subsys in self.field_subsystems:
+            try:
+                local_pos = Vector2(subsys.pos.x, subsys.pos.y) if hasattr(subsys.pos, 'y') else Vector2(subsys.pos.x, 0)
+                # Rotate by robot angle and translate to robot position
+                world_pos = Vector2(robot.pos.x, robot.pos.y) + local_pos.rotate(robot.theta)
+                base_screen = world_to_screen(self.field_origin, self.ppu, world_pos)
+
+                if isinstance(subsys, Elevator):
+                    # elevator carriage position projected onto field
+                    end_world = world_pos + Vector2(0, subsys.height).rotate(subsys.angle + robot.theta)
+                    color, width = (100, 200, 255), 3
+                else:
+                    # pivot arm rotated with robot
+                    end_world = world_pos + Vector2(subsys.length, 0).rotate(subsys.angle + robot.theta)
+                    color, width = (255, 170, 80), 4
+                end_screen = world_to_screen(self.field_origin, self.ppu, end_world)
+
+                pygame.draw.line(self.screen, color, base_screen, end_screen, width)
+                self.screen.blit(*place(self.atlas.dot(color, 5), int(end_screen.x), int(end_screen.y)))
+            except Exception:
+                pass
+
+    def draw_zone(self, origin: Vector2, corner1: Vector2, corner2: Vector2):
+        """Blit the atlas' intake overlay over the world-space box with corners corner1, corner2 (drawn from origin)."""
+        top_left = world_to_screen(origin, self.ppu, Vector2(min(corner1.x, corner2.x), max(corner1.y, corner2.y)))
+        bottom_right = world_to_screen(origin, self.ppu, Vector2(max(corner1.x, corner2.x), min(corner1.y, corner2.y)))
+        width = int(bottom_right.x - top_left.x)
+        height = int(bottom_right.y - top_left.y)
+        if width > 0 and height > 0:
+            self.screen.blit(self.atlas.intake_zone(width, height), (int(top_left.x), int(top_left.y)))
+
     def draw_intake_zones(self):
         """Draw intake zones for all robots as semi-transparent rectangles."""
         for robot in self.env.robots:
             try:
                 if hasattr(robot, 'getIntakeZone'):
                     point1, point2 = robot.getIntakeZone()
-                    
-                    # Get the bounding box in x-y plane
-                    min_x = min(point1.x, point2.x)
-                    max_x = max(point1.x, point2.x)
-                    min_y = min(point1.y, point2.y)
-                    max_y = max(point1.y, point2.y)
-                    
-                    # Convert to screen coordinates
-                    top_left = world_to_screen(self.field_origin, self.ppu, Vector2(min_x, max_y))
-                    bottom_right = world_to_screen(self.field_origin, self.ppu, Vector2(max_x, min_y))
-                    
-                    # Create a semi-transparent surface for the intake zone
-                    width = int(abs(bottom_right.x - top_left.x))
-                    height = int(abs(bottom_right.y - top_left.y))
-                    
-                    if width > 0 and height > 0:
-                        intake_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-                        intake_surface.fill((200, 255, 150, 80))  # Light green, semi-transparent
-                        self.screen.blit(intake_surface, (int(min(top_left.x, bottom_right.x)), int(min(top_left.y, bottom_right.y))))
-                        
-                        # Draw a border around the intake zone
-                        rect = pygame.Rect(int(min(top_left.x, bottom_right.x)), int(min(top_left.y, bottom_right.y)), width, height)
-                        pygame.draw.rect(self.screen, (100, 200, 100), rect, 2)
+                    # bounding box in the x-y plane
+                    self.draw_zone(self.field_origin, Vector2(point1.x, point1.y), Vector2(point2.x, point2.y))
             except Exception:
                 pass
 
     def draw_side_view(self):
         """Draw x-z side view of robots and pieces (side profile)."""
         # Draw axis labels
-        font = pygame.font.SysFont('consolas', 14)
-        label = font.render('Side View (X-Z)', True, (180, 180, 180))
-        self.screen.blit(label, (10, self.divider_y + 10))
+        self.screen.blit(label('Side View (X-Z)', 14, (180, 180, 180)), (10, self.divider_y + 10))
 
         # Draw intake zones in side view
         for robot in self.env.robots:
             try:
                 if hasattr(robot, 'getIntakeZone'):
                     point1, point2 = robot.getIntakeZone()
-                    
-                    # Get the bounding box in x-z plane
-                    min_x = min(point1.x, point2.x)
-                    max_x = max(point1.x, point2.x)
-                    min_z = min(point1.z, point2.z)
-                    max_z = max(point1.z, point2.z)
-                    
-                    # Convert to screen coordinates
-                    top_left = world_to_screen(self.side_view_origin, self.ppu, Vector2(min_x, max_z))
-                    bottom_right = world_to_screen(self.side_view_origin, self.ppu, Vector2(max_x, min_z))
-                    
-                    # Create a semi-transparent surface for the intake zone
-                    width = int(abs(bottom_right.x - top_left.x))
-                    height = int(abs(bottom_right.y - top_left.y))
-                    
-                    if width > 0 and height > 0:
-                        intake_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-                        intake_surface.fill((200, 255, 150, 80))  # Light green, semi-transparent
-                        self.screen.blit(intake_surface, (int(min(top_left.x, bottom_right.x)), int(min(top_left.y, bottom_right.y))))
-                        
-                        # Draw a border around the intake zone
-                        rect = pygame.Rect(int(min(top_left.x, bottom_right.x)), int(min(top_left.y, bottom_right.y)), width, height)
-                        pygame.draw.rect(self.screen, (100, 200, 100), rect, 2)
+                    # bounding box in the x-z plane
+                    self.draw_zone(self.side_view_origin, Vector2(point1.x, point1.z), Vector2(point2.x, point2.z))
             except Exception:
                 pass
 
@@ -369,29 +263,25 @@ class EnvironmentVisualizer:
             rect = pygame.Rect(int(scr.x - w/2 * self.ppu), int(scr.y - 10), int(w * self.ppu), 20)
             pygame.draw.rect(self.screen, (90, 110, 150), rect, width=2)
 
-        # Draw pieces in x-z plane
+        # Draw pieces in x-z plane (x horizontal, z vertical: height off ground)
+        origin, ppu = self.side_view_origin, self.ppu
+        dots = {piece_type: self.atlas.dot(color, 4) for piece_type, color in PIECE_COLORS.items()}
+        blits = []
         for piece in self._iter_pieces():
             if not isinstance(piece, Piece):
                 continue
-            try:
-                # x horizontal, z vertical (height off ground)
-                world_xz = Vector2(piece.pos.x, piece.pos.z if hasattr(piece.pos, 'z') else 0)
-                scr = world_to_screen(self.side_view_origin, self.ppu, world_xz)
-                color = PIECE_COLORS.get(piece.type, (200, 200, 200))
-                pygame.draw.circle(self.screen, color, (int(scr.x), int(scr.y)), 4)
-            except Exception:
-                continue
+            z = piece.pos.z if hasattr(piece.pos, 'z') else 0
+            blits.append(place(dots.get(piece.type) or self.atlas.dot((200, 200, 200), 4), int(origin.x + piece.pos.x * ppu), int(origin.y - z * ppu)))
+        self.screen.blits(blits, doreturn=False)
 
     def draw_hud(self):
-        font = pygame.font.SysFont("consolas", 18)
         lines = [
             "Env Viz: ESC quit, R reset",
             f"Robots: {len(self.env.robots)}  Pieces: {len(self._iter_pieces())}",
         ]
         y = 10
         for ln in lines:
-            surf = font.render(ln, True, (235, 235, 235))
-            self.screen.blit(surf, (10, y))
+            self.screen.blit(label(ln), (10, y))
             y += 20
 
     def draw(self):
@@ -403,11 +293,12 @@ class EnvironmentVisualizer:
 
         # Draw scoring nodes
         if hasattr(self, 'scoring_locations'):
+            blits = []
             for loc in self.scoring_locations:
                 pos = loc[0]
                 screen_pos = world_to_screen(self.field_origin, self.ppu, Vector2(pos.x, pos.y) if hasattr(pos, "x") else Vector2(*pos))
-                color = PIECE_COLORS.get(loc[1], (00, 0, 0))
-                pygame.draw.circle(self.screen, color, (int(screen_pos.x), int(screen_pos.y)), 3)
+                blits.append(place(self.atlas.nodes.get(loc[1], self.atlas.nodes[NodeType.HYBRID]), int(screen_pos.x), int(screen_pos.y)))
+            self.screen.blits(blits, doreturn=False)
         
         # Draw pieces and robots on top of the field image
         self.draw_pieces()
@@ -428,7 +319,8 @@ class EnvironmentVisualizer:
         pygame.display.flip()
 
     # -------------- Main Loop --------------
-    def run(self, dt):
+    # with teleop the selected robot is driven from the keyboard (see handle_input)
+    def run(self, dt, teleop=False):
         # dt = .05
         # for event in pygame.event.get():
         #     if event.type == pygame.QUIT:
@@ -438,9 +330,12 @@ class EnvironmentVisualizer:
         #             self.running = False
         #         elif event.key == pygame.K_r:
         #             self.reset()
-        pygame.event.get()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
 
-        # self.handle_input()
+        if teleop:
+            self.handle_input(dt)
         self.update(dt)
         self.draw()
 
@@ -16,18 +16,17 @@ Controls:
   SPACE      : Toggle drawing of subsystem endpoints only vs full arms/rails
   ESC / Close: Quit
 
-You can import and embed `RobotPositionVisualizer` elsewhere or run this file directly.
+You can import and embed `RobotPositionVisualizer` elsewhere or run `python -m environments.visualization.robotvisualization`.
 """
 
 from __future__ import annotations
 import math
 import pygame
 from pygame import Vector2, Vector3
-from pathlib import Path
-import sys
-parent_dir = str(Path(__file__).resolve().parents[1])
-sys.path.insert(0, parent_dir)
-from robots.robot import Robot
+from environments.control import ControlIntent
+from environments.robots.robot import Robot
+from environments.visualization.display import get_screen
+from environments.visualization.sprites import atlas_for, place
 
 
 def world_to_screen(origin_px: Vector2, ppu: float, world: Vector2) -> Vector2:
@@ -46,12 +45,7 @@ class RobotPositionVisualizer:
 
     def __init__(self, robots: list[Robot] | None = None, screen=None, screen_size=(1050, 700), pixels_per_unit=4):
         # If an external screen is provided (embedding), reuse it to avoid resetting display.
-        if screen is None:
-            pygame.init()
-            pygame.display.set_caption("Robot Position Visualizer")
-            self.screen = pygame.display.set_mode(screen_size)
-        else:
-            self.screen = screen
+        self.screen = get_screen(screen_size, "Robot Position Visualizer") if screen is None else screen
         self.clock = pygame.time.Clock()
         self.running = True
         self.ppu = pixels_per_unit
@@ -63,11 +57,11 @@ class RobotPositionVisualizer:
         self.current_index = 0 if self.robots else -1
 
 	# ----------------------------- Input & Update -----------------------------
-    def handle_input(self):
+    def handle_input(self) -> ControlIntent | None:
+        """Drive intent (target velocity, rotation speed) for the keys currently held, or None with no robots."""
         keys = pygame.key.get_pressed()
         if self.current_index < 0:
-            return
-        # Apply the same input targets to all robots so they move together.
+            return None
         move_speed = 180
         target_vel = Vector2(0, 0)
         if keys[pygame.K_LEFT]:
@@ -79,19 +73,22 @@ class RobotPositionVisualizer:
         if keys[pygame.K_DOWN]:
             target_vel.y -= move_speed
 
-        # for robot in self.robots:
-        #     robot.setTargetVel(target_vel)
-
         rot_speed = 120
-        # if keys[pygame.K_q]:
-        #     for robot in self.robots:
-        #         robot.setTargetRotSpeed(rot_speed)
-        # elif keys[pygame.K_e]:
-        #     for robot in self.robots:
-        #         robot.setTargetRotSpeed(-rot_speed)
-        # else:
-        #     for robot in self.robots:
-        #         robot.setTargetRotSpeed(0)
+        intent = ControlIntent()
+        intent.targetVel = target_vel
+        intent.rotSpeed = 0
+        if keys[pygame.K_q]:
+            intent.rotSpeed = rot_speed
+        elif keys[pygame.K_e]:
+            intent.rotSpeed = -rot_speed
+        return intent
+
+    def apply_intent(self, intent: ControlIntent | None):
+        if intent is None:
+            return
+        robot = self.robots[self.current_index]
+        robot.setTargetVel(intent.targetVel)
+        robot.setTargetRotSpeed(intent.rotSpeed)
 
     def update(self, dt: float):
         for robot in self.robots:
@@ -172,7 +169,7 @@ class RobotPositionVisualizer:
                         idx = event.key - pygame.K_1
                         self.select_robot(idx)
 
-            self.handle_input()
+            self.apply_intent(self.handle_input())
             self.update(dt)
 
             self.screen.fill((30, 32, 38))
@@ -187,17 +184,14 @@ class RobotPositionVisualizer:
         """Draw all robots (perimeter only) at provided origin and scale."""
         if not self.robots:
             return
+        # outlines come pre-rendered from the atlas, rotated to the nearest atlas.angle_step degrees
+        atlas = atlas_for(ppu)
+        blits = []
         for robot in self.robots:
-            base_world = Vector2(robot.pos.x, robot.pos.y)
-            w, h = robot.frame if isinstance(robot.frame, (tuple, list)) else (26, 26)
-            w2, h2 = w / 2, h / 2
-            corners = [Vector2(-w2, -h2), Vector2(w2, -h2), Vector2(w2, h2), Vector2(-w2, h2)]
-            rotated = [base_world + c.rotate(robot.theta) for c in corners]
-            pts = [Vector2(origin.x + p.x * ppu, origin.y - p.y * ppu) for p in rotated]
-            pygame.draw.polygon(screen, (90, 110, 150), pts, width=2)
-            front = base_world + Vector2(w2, 0).rotate(robot.theta)
-            pygame.draw.line(screen, (255, 255, 255), Vector2(origin.x + base_world.x * ppu, origin.y - base_world.y * ppu),
-                            Vector2(origin.x + front.x * ppu, origin.y - front.y * ppu), 2)
+            frame = robot.frame if isinstance(robot.frame, (tuple, list)) else (26, 26)
+            sprite = atlas.robot(frame, robot.theta, self.FRAME_COLOR)
+            blits.append(place(sprite, int(origin.x + robot.pos.x * ppu), int(origin.y - robot.pos.y * ppu)))
+        screen.blits(blits, doreturn=False)
 
 
 def main():
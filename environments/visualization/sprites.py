@@ -0,0 +1,142 @@
+"""SpriteAtlas: the visualizers' markers pre-rendered once per scale, so a frame is a sequence of blits.
+
+An atlas belongs to one pixels-per-unit scale and holds:
+  * cube / cone markers and scoring-node dots,
+  * robot outlines (frame and heading line) per frame size and colour, with rotated variants cached by angle
+    quantized to `angle_step` degrees,
+  * semi-transparent intake-zone rectangles per pixel size,
+  * the dots drawn at elevator carriages and pivot ends.
+Text that rarely changes (panel titles, HUD lines) is rendered through label(), which keeps the rendered surfaces.
+
+Every sprite is a (surface, (dx, dy)) pair, blitted at center - (dx, dy). Use atlas_for(ppu) to share atlases
+between visualizers drawing at the same scale.
+"""
+
+from __future__ import annotations
+
+import pygame
+
+from environments.piece import NodeType, PieceType
+
+PIECE_COLORS = {
+    PieceType.CUBE: (140, 110, 255),
+    PieceType.CONE: (255, 210, 80),
+    NodeType.CUBE: (140, 110, 255),
+    NodeType.CONE: (255, 210, 80),
+    NodeType.HYBRID: (0, 0, 0),
+}
+FRAME_COLOR = (90, 110, 150)
+ZONE_FILL = (200, 255, 150, 80)
+ZONE_BORDER = (100, 200, 100)
+
+_atlases = {}
+_fonts = {}
+_labels = {}
+
+
+def atlas_for(ppu: float, piece_size: int = 6, angle_step: float = 3.) -> "SpriteAtlas":
+    key = (round(ppu, 4), piece_size, angle_step)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = SpriteAtlas(ppu, piece_size, angle_step)
+    return atlas
+
+
+class SpriteAtlas:
+    def __init__(self, ppu: float, piece_size: int = 6, angle_step: float = 3.):
+        self.ppu = ppu
+        self.piece_size = piece_size
+        self.angle_step = angle_step
+        self.steps = max(1, round(360 / angle_step))
+        self.pieces = {piece_type: self._piece(piece_type, piece_size) for piece_type in PieceType}
+        self.pieces.update({piece_type.value: sprite for piece_type, sprite in list(self.pieces.items())})
+        self.robots = {}  # (frame size, color) -> {angle index: sprite}
+        self.zones = {}  # (width, height) in pixels -> surface
+        self.dots = {}  # (color, radius) -> sprite
+        self.nodes = {node_type: self.dot(PIECE_COLORS[node_type], 3) for node_type in NodeType}
+
+    @staticmethod
+    def _piece(piece_type: PieceType, size: int):
+        sprite = pygame.Surface((2 * size + 1, 2 * size + 1), pygame.SRCALPHA)
+        color = PIECE_COLORS[piece_type]
+        if piece_type == PieceType.CONE:
+            # triangle pointing up on screen
+            points = [(size, 0), (0, 2 * size), (2 * size, 2 * size)]
+            pygame.draw.polygon(sprite, color, points)
+            pygame.draw.polygon(sprite, (255, 255, 255), points, width=1)
+        else:
+            pygame.draw.rect(sprite, color, (0, 0, 2 * size + 1, 2 * size + 1))
+            pygame.draw.rect(sprite, (255, 255, 255), (0, 0, 2 * size + 1, 2 * size + 1), width=1)
+        return sprite.convert_alpha(), (size, size)
+
+    def piece(self, piece_type):
+        """Marker for a PieceType (or its value)."""
+        return self.pieces[piece_type]
+
+    def node(self, node_type: NodeType):
+        return self.nodes[node_type]
+
+    def dot(self, color, radius: int):
+        key = (tuple(color), radius)
+        sprite = self.dots.get(key)
+        if sprite is None:
+            surface = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (radius, radius), radius)
+            sprite = self.dots[key] = (surface.convert_alpha(), (radius, radius))
+        return sprite
+
+    def robot(self, frame, theta: float, color=FRAME_COLOR):
+        """Outline of a robot with frame size (width, length) in inches, heading `theta` degrees (quantized)."""
+        variants = self.robots.get((tuple(frame), tuple(color)))
+        if variants is None:
+            variants = self.robots[(tuple(frame), tuple(color))] = {}
+        index = round(theta / self.angle_step) % self.steps
+        sprite = variants.get(index)
+        if sprite is None:
+            if 0 not in variants:
+                variants[0] = self._robot(frame, color)
+            base = variants[0][0]
+            surface = pygame.transform.rotate(base, index * 360 / self.steps)
+            sprite = variants[index] = (surface, (surface.get_width() // 2, surface.get_height() // 2))
+        return sprite
+
+    def _robot(self, frame, color):
+        w, h = frame if isinstance(frame, (tuple, list)) else (26, 26)
+        pw, ph = max(2, round(w * self.ppu)), max(2, round(h * self.ppu))
+        pad = 2
+        surface = pygame.Surface((pw + 2 * pad + 1, ph + 2 * pad + 1), pygame.SRCALPHA)
+        pygame.draw.rect(surface, color, (pad, pad, pw + 1, ph + 1), width=2)
+        center = (pad + pw // 2, pad + ph // 2)
+        # heading line from the center to the middle of the front (+x) edge
+        pygame.draw.line(surface, (255, 255, 255), center, (pad + pw, center[1]), 2)
+        return surface.convert_alpha(), center
+
+    def intake_zone(self, width: int, height: int) -> pygame.Surface:
+        key = (int(width), int(height))
+        surface = self.zones.get(key)
+        if surface is None:
+            surface = pygame.Surface(key, pygame.SRCALPHA)
+            surface.fill(ZONE_FILL)
+            pygame.draw.rect(surface, ZONE_BORDER, surface.get_rect(), 2)
+            surface = self.zones[key] = surface.convert_alpha()
+        return surface
+
+
+def place(sprite, x: float, y: float):
+    """(surface, destination) for Surface.blits, centering `sprite` on screen point (x, y)."""
+    surface, (dx, dy) = sprite
+    return surface, (x - dx, y - dy)
+
+
+def label(text: str, size: int = 18, color=(235, 235, 235)) -> pygame.Surface:
+    """`text` rendered in consolas at `size`, kept for the next frame that draws the same string."""
+    key = (text, size, tuple(color))
+    surface = _labels.get(key)
+    if surface is None:
+        font = _fonts.get(size)
+        if font is None:
+            font = _fonts[size] = pygame.font.SysFont("consolas", size)
+        if len(_labels) > 256:
+            _labels.clear()
+        surface = _labels[key] = font.render(text, True, color)
+    return surface
@@ -8,10 +8,14 @@ Controls (default mappings):
 """
 
 from __future__ import annotations
-import os
-import sys
+import math
 import pygame
 from pygame import Vector2
+from environments.vecmath import Vector3
+
+from environments.robots.subsystems.elevator import Elevator
+from environments.robots.subsystems.pivot import Pivot
+from environments.visualization.display import get_screen
 
 
 def world_to_screen(origin_px: Vector2, ppu: float, v: Vector2) -> Vector2:
@@ -22,18 +26,6 @@ class SubsystemVisualizer:
     """Manages a collection of subsystem instances and draws them in a side panel."""
 
     def __init__(self, subsystems: list, origin: Vector2, pixels_per_unit: float):
-        # Import classes dynamically to get the correct ones after paths are set up
-        import sys
-        if 'subsystems.elevator' in sys.modules:
-            Elevator = sys.modules['subsystems.elevator'].Elevator
-            Pivot = sys.modules['subsystems.pivot'].Pivot
-        else:
-            # Fallback - try direct import
-            from subsystems.elevator import Elevator
-            from subsystems.pivot import Pivot
-        
-        self.Elevator = Elevator
-        self.Pivot = Pivot
         self.subsystems = subsystems
         self.origin = origin
         self.ppu = pixels_per_unit
@@ -41,7 +33,8 @@ class SubsystemVisualizer:
         # Optional layout offsets for grouping visuals
         self.pivot_offset = Vector2(0, -180)
 
-    def handle_input(self):
+    def input_velocities(self):
+        """(elevator, pivot) target velocities for the keys currently held."""
         keys = pygame.key.get_pressed()
 
         # Elevator controls
@@ -59,22 +52,37 @@ class SubsystemVisualizer:
             atarget += piv_speed
         if keys[pygame.K_d]:
             atarget -= piv_speed
+        return target, atarget
+
+    def joint_velocities(self, robot) -> dict:
+        """The held keys as ControlIntent.jointVelocities for `robot`, keyed by joint name."""
+        target, atarget = self.input_velocities()
+        velocities = {}
+        for name in robot.subsystemSlots():
+            s = getattr(robot, name)
+            if isinstance(s, Elevator):
+                velocities[name] = target
+            elif isinstance(s, Pivot):
+                velocities[name] = atarget
+        return velocities
 
+    def handle_input(self):
+        target, atarget = self.input_velocities()
         for s in self.subsystems:
-            if isinstance(s, self.Elevator):
+            if isinstance(s, Elevator):
                 s.setTargetVel(target)
-            elif isinstance(s, self.Pivot):
+            elif isinstance(s, Pivot):
                 s.setTargetVel(atarget)
 
     def update(self, dt: float):
         for s in self.subsystems:
             s.update(dt)
-            if isinstance(s, self.Elevator):
+            if isinstance(s, Elevator):
                 if s.height < 0:
                     s.height = 0
                 if s.height > s.maxheight:
                     s.height = s.maxheight
-            elif isinstance(s, self.Pivot):
+            elif isinstance(s, Pivot):
                 if s.angle < s.minAngle:
                     s.angle = s.minAngle
                 if s.angle > s.maxAngle:
@@ -84,11 +92,11 @@ class SubsystemVisualizer:
         # Draw elevators first, then pivots slightly below using a visual offset
         drawn = False
         for s in self.subsystems:
-            if isinstance(s, self.Elevator):
+            if isinstance(s, Elevator):
                 self._draw_elevator(screen, s)
                 drawn = True
         for s in self.subsystems:
-            if isinstance(s, self.Pivot):
+            if isinstance(s, Pivot):
                 self._draw_pivot(screen, s)
                 drawn = True
         
@@ -131,9 +139,8 @@ class SubsystemVisualizer:
         pygame.draw.circle(screen, (255, 170, 60), end_screen, 10)
 """Minimal Pygame simulation templates for visualizing an Elevator or a Pivot.
 
-Run this file directly to launch either simulation:
-  python visualization.py elevator   # Elevator only
-  python visualization.py pivot      # Pivot only
+Run the module from the repository root to launch both simulations:
+  python -m environments.visualization.subsystemvisualization
 
 Controls (Elevator mode):
   W / S : extend / retract (set target velocity)
@@ -149,17 +156,6 @@ These templates do NOT instantiate a Robot; they use the existing subsystem clas
 You can later compose them into a robot visualization.
 """
 
-from pathlib import Path
-import sys
-parent_dir = str(Path(__file__).resolve().parents[1])
-sys.path.insert(0, parent_dir)
-
-import math
-import pygame
-from pygame import Vector2, Vector3
-from robots.subsystems.elevator import Elevator
-from robots.subsystems.pivot import Pivot
-
 def world_to_screen(origin_px: Vector2, ppu: float, world: Vector2) -> Vector2:
 	"""Convert math-style (y up) world coords to Pygame screen (y down)."""
 	return Vector2(origin_px.x + world.x * ppu, origin_px.y - world.y * ppu)
@@ -288,8 +284,7 @@ class PivotSim:
 class SubsystemsSim():
 
     def __init__(self, simList, screen_size=(640, 480), pixels_per_unit=4):
-        pygame.display.set_caption("Simulation")
-        self.screen = pygame.display.set_mode(screen_size)
+        self.screen = get_screen(screen_size, "Simulation")
         self.clock = pygame.time.Clock()
         self.running = True
         self.ppu = pixels_per_unit
@@ -332,13 +327,10 @@ class SubsystemsSim():
 
 def main():
     # Choose mode based on first CLI argument; default elevator.
-    # pygame.init()
     sim = PivotSim(Pivot(Vector3(0, 0, 0), 50, 50, 0, 150, 200, 400))
     sim2 = ElevatorSim(Elevator(Vector3(0, 0, 0), 100, 200, 500, 0))
     realSim = SubsystemsSim([sim, sim2])
     realSim.loop()
 
-pygame.init()
-
 if __name__ == "__main__":
 	main()
@@ -0,0 +1,289 @@
+"""TiledVisualizer: many matches side by side on one window, for comparing sweep candidates.
+
+Each tile shows one match from a list of MatchFrames (robot poses, piece positions, score), so live and recorded
+runs look the same:
+  * live scalar matches: MatchTile.from_environment(env), then tile.capture(env) after every step
+  * live batches: vector_tiles(vec), then capture_vector(vec, tiles) after every VectorEnvironment.step
+  * recorded runs: MatchTile.from_trace(trace) for a determinism.Trace kept with its values
+
+All tiles share one playhead (in ticks), so scrubbing moves every match together. The field backgrounds, tile borders
+and labels are drawn once into a background surface; a frame is that one blit plus a batch of sprite atlas blits
+(see sprites.py) for each tile's robots and pieces, and the score text is only re-rendered when a score changes.
+
+    tiles = vector_tiles(vec)
+    viz = TiledVisualizer(tiles)
+    def step():
+        vec.step(policy(vec.observations))
+        capture_vector(vec, tiles)
+    viz.run(step=step)   # the playhead follows the live edge until you scrub back
+
+Controls:
+  SPACE       : play / pause
+  LEFT / RIGHT: step one tick back / forward (paused)
+  UP / DOWN   : faster / slower playback
+  Mouse       : click or drag on the timeline to scrub
+  END         : jump to the latest tick
+  ESC / Close : quit
+"""
+
+from __future__ import annotations
+import math
+
+import pygame
+from pygame import Vector2
+
+from environments.piece import PieceType
+from environments.visualization.display import FIELD_IMAGE, FIELD_UNITS, fit_size, get_screen, load_scaled_image
+from environments.visualization.sprites import atlas_for, place
+
+TIMELINE_HEIGHT = 36
+LABEL_HEIGHT = 20
+ROBOT_COLORS = {"Red": (235, 80, 80), "Blue": (80, 140, 255)}
+DEFAULT_FRAME = (28, 28)
+
+
+class MatchFrame:
+    """What a tile draws for one tick. robots: [(x, y, theta)], pieces: [(x, y, PieceType value)], score: (red, blue)."""
+
+    __slots__ = ("time", "robots", "pieces", "score")
+
+    def __init__(self, time: float, robots, pieces, score):
+        self.time = time
+        self.robots = robots
+        self.pieces = pieces
+        self.score = score
+
+
+def environment_frame(env) -> MatchFrame:
+    return MatchFrame(env.time,
+                      [(robot.pos.x, robot.pos.y, robot.theta) for robot in env.robots],
+                      [(piece.pos.x, piece.pos.y, piece.type.value) for piece in env.pieces],
+                      (env.scoring.score["Red"], env.scoring.score["Blue"]))
+
+
+def vector_frames(vec) -> list[MatchFrame]:
+    """One frame per environment of a VectorEnvironment."""
+    s = vec.state
+    frames = []
+    for row in range(vec.count):
+        active = s["pieceActive"][row].nonzero()[0]
+        x, y = s["piecePos"][row, 0, active].tolist(), s["piecePos"][row, 1, active].tolist()
+        robots = list(zip(s["pos"][row, :, 0].tolist(), s["pos"][row, :, 1].tolist(), s["theta"][row].tolist()))
+        frames.append(MatchFrame(float(s["time"][row]), robots, list(zip(x, y, s["pieceType"][row, active].tolist())),
+                                 tuple(s["score"][row].tolist())))
+    return frames
+
+
+def trace_frames(trace) -> list[MatchFrame]:
+    """Frames of a determinism.Trace recorded with keepValues."""
+    frames = []
+    layouts = {}
+    for tick in range(len(trace)):
+        layout = trace.ticks[tick]
+        if layout not in layouts:
+            names = {name: index for index, name in enumerate(trace.layouts[layout])}
+            robots = [(names[f"robot{i}.x"], names[f"robot{i}.y"], names[f"robot{i}.theta"])
+                      for i in range(sum(1 for name in names if name.startswith("robot") and name.endswith(".theta")))]
+            pieces = [(names[f"piece{j}.x"], names[f"piece{j}.y"], names[f"piece{j}.type"])
+                      for j in range(sum(1 for name in names if name.startswith("piece") and name.endswith(".type")))]
+            layouts[layout] = (robots, pieces, names["time"], names["score.Red"], names["score.Blue"])
+        robots, pieces, time, red, blue = layouts[layout]
+        values = trace.values[tick]
+        frames.append(MatchFrame(values[time], [(values[x], values[y], values[theta]) for x, y, theta in robots],
+                                 [(values[x], values[y], int(values[kind])) for x, y, kind in pieces],
+                                 (values[red], values[blue])))
+    return frames
+
+
+class MatchTile:
+    def __init__(self, label: str = "", frames: list[MatchFrame] | None = None, robot_sizes=None, alliances=None):
+        self.label = label
+        self.frames = frames if frames is not None else []
+        self.robot_sizes = robot_sizes  # (width, length) per robot, DEFAULT_FRAME when unknown
+        self.alliances = alliances
+
+    @classmethod
+    def from_environment(cls, env, label: str = "") -> "MatchTile":
+        tile = cls(label, [], [tuple(robot.frame) for robot in env.robots], [robot.alliance for robot in env.robots])
+        tile.capture(env)
+        return tile
+
+    @classmethod
+    def from_trace(cls, trace, label: str = "", robot_sizes=None, alliances=None) -> "MatchTile":
+        return cls(label or f"{trace.scenario}/{trace.engine}", trace_frames(trace), robot_sizes, alliances)
+
+    def capture(self, env):
+        self.frames.append(environment_frame(env))
+
+    def frame_at(self, tick: int) -> MatchFrame | None:
+        if not self.frames:
+            return None
+        return self.frames[max(0, min(tick, len(self.frames) - 1))]
+
+
+def vector_tiles(vec, labels=None) -> list[MatchTile]:
+    sizes = [tuple(size) for size in vec.frame.tolist()]
+    alliances = ["Red" if alliance == 0 else "Blue" for alliance in vec.alliance.tolist()]
+    tiles = [MatchTile(labels[row] if labels else f"env {row}", [], sizes, alliances) for row in range(vec.count)]
+    capture_vector(vec, tiles)
+    return tiles
+
+
+def capture_vector(vec, tiles):
+    for tile, frame in zip(tiles, vector_frames(vec)):
+        tile.frames.append(frame)
+
+
+def best_columns(count: int, width: int, height: int) -> int:
+    """Column count that gives each tile's field the largest scale."""
+    def scale(columns):
+        rows = math.ceil(count / columns)
+        return fit_size(width // columns - 8, height // rows - LABEL_HEIGHT - 8)[0]
+    return max(range(1, count + 1), key=scale)
+
+
+class TiledVisualizer:
+    def __init__(self, tiles: list[MatchTile], screen_size=(1600, 1000), columns: int | None = None):
+        self.screen = get_screen(screen_size, "Match Comparison")
+        self.clock = pygame.time.Clock()
+        self.running = True
+        self.tiles = tiles
+        self.playhead = 0.
+        self.speed = 1.  # ticks per displayed frame
+        self.playing = True
+        self.following = True  # the playhead stays on the latest tick while live frames arrive
+        self.font = pygame.font.SysFont("consolas", 14)
+        self.score_text = {}
+
+        w, h = screen_size
+        area_h = h - TIMELINE_HEIGHT
+        self.columns = columns or best_columns(max(len(tiles), 1), w, area_h)
+        rows = max(1, math.ceil(len(tiles) / self.columns))
+        tile_w, tile_h = w // self.columns, area_h // rows
+        field_w, field_h = fit_size(tile_w - 8, tile_h - LABEL_HEIGHT - 8)
+        self.ppu = field_w / FIELD_UNITS[0]
+        self.timeline = pygame.Rect(10, area_h + 8, w - 20, TIMELINE_HEIGHT - 16)
+
+        # field origin (world 0, 0, bottom left of the field) per tile
+        self.origins = []
+        self.background = pygame.Surface(screen_size).convert()
+        self.background.fill((24, 26, 30))
+        field = load_scaled_image(FIELD_IMAGE, (field_w, field_h))
+        for index, tile in enumerate(tiles):
+            left = (index % self.columns) * tile_w + (tile_w - field_w) // 2
+            top = (index // self.columns) * tile_h + LABEL_HEIGHT + 4
+            self.background.blit(field, (left, top))
+            pygame.draw.rect(self.background, (70, 75, 85), (left - 1, top - 1, field_w + 2, field_h + 2), 1)
+            self.background.blit(self.font.render(tile.label, True, (220, 220, 220)), (left, top - LABEL_HEIGHT))
+            self.origins.append(Vector2(left, top + field_h))
+        pygame.draw.rect(self.background, (60, 64, 72), self.timeline)
+
+        self.atlas = atlas_for(self.ppu, piece_size=max(3, int(6 * self.ppu)))
+
+    @property
+    def length(self) -> int:
+        return max((len(tile.frames) for tile in self.tiles), default=0)
+
+    # -------------- Input --------------
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                elif event.key == pygame.K_SPACE:
+                    self.playing = not self.playing
+                elif event.key == pygame.K_RIGHT:
+                    self.seek(int(self.playhead) + 1)
+                elif event.key == pygame.K_LEFT:
+                    self.seek(int(self.playhead) - 1)
+                elif event.key == pygame.K_UP:
+                    self.speed = min(self.speed * 2, 64)
+                elif event.key == pygame.K_DOWN:
+                    self.speed = max(self.speed / 2, 1 / 16)
+                elif event.key == pygame.K_END:
+                    self.seek(self.length - 1)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.timeline.collidepoint(event.pos):
+                self.scrub(event.pos[0])
+            elif event.type == pygame.MOUSEMOTION and event.buttons[0] and self.timeline.collidepoint(event.pos):
+                self.scrub(event.pos[0])
+
+    def scrub(self, x: int):
+        fraction = (x - self.timeline.left) / max(self.timeline.width - 1, 1)
+        self.seek(round(fraction * (self.length - 1)))
+
+    def seek(self, tick: int):
+        self.playhead = float(max(0, min(tick, self.length - 1)))
+        self.following = self.playhead >= self.length - 1
+
+    # -------------- Update --------------
+    # step (optional) advances live sources and captures a frame into every tile; it is called whenever the
+    # playhead is on the latest tick
+    def advance(self, step=None):
+        if not self.playing:
+            return
+        if step is not None and self.following:
+            step()
+        last = self.length - 1
+        self.playhead = min(self.playhead + self.speed, max(last, 0))
+        if step is not None:
+            self.following = self.playhead >= last
+
+    # -------------- Drawing --------------
+    def draw_tile(self, tile: MatchTile, origin: Vector2, frame: MatchFrame):
+        ppu, atlas = self.ppu, self.atlas
+        cube = atlas.piece(PieceType.CUBE)
+        blits = [place(atlas.pieces.get(kind, cube), origin.x + x * ppu, origin.y - y * ppu) for x, y, kind in frame.pieces]
+        for index, (x, y, theta) in enumerate(frame.robots):
+            frame_size = tile.robot_sizes[index] if tile.robot_sizes else DEFAULT_FRAME
+            color = ROBOT_COLORS.get(tile.alliances[index] if tile.alliances else "Red", (200, 200, 200))
+            blits.append(place(atlas.robot(frame_size, theta, color), origin.x + x * ppu, origin.y - y * ppu))
+        self.screen.blits(blits, doreturn=False)
+        key = (int(frame.score[0]), int(frame.score[1]))
+        text = self.score_text.get(key)
+        if text is None:
+            text = self.score_text[key] = self.font.render(f"R {key[0]}  B {key[1]}", True, (255, 255, 255), (0, 0, 0))
+        self.screen.blit(text, (origin.x + 4, origin.y - text.get_height() - 4))
+
+    def draw_timeline(self):
+        length = self.length
+        tick = int(self.playhead)
+        if length > 1:
+            x = self.timeline.left + tick * (self.timeline.width - 1) / (length - 1)
+            pygame.draw.rect(self.screen, (120, 170, 255), (self.timeline.left, self.timeline.top, x - self.timeline.left + 1, self.timeline.height))
+        frame = self.tiles[0].frame_at(tick) if self.tiles else None
+        status = f"tick {tick}/{max(length - 1, 0)}" + (f"  t={frame.time:.1f}s" if frame is not None else "") + \
+                 f"  x{self.speed:g}" + ("" if self.playing else "  paused")
+        self.screen.blit(self.font.render(status, True, (240, 240, 240)), (self.timeline.left + 6, self.timeline.top + 2))
+
+    def draw(self):
+        self.screen.blit(self.background, (0, 0))
+        tick = int(self.playhead)
+        for tile, origin in zip(self.tiles, self.origins):
+            frame = tile.frame_at(tick)
+            if frame is not None:
+                self.draw_tile(tile, origin, frame)
+        self.draw_timeline()
+        pygame.display.flip()
+
+    # -------------- Main Loop --------------
+    def run(self, fps: int = 60, step=None):
+        while self.running:
+            self.clock.tick(fps)
+            self.handle_events()
+            self.advance(step)
+            self.draw()
+        pygame.quit()
+
+
+def main():
+    # the main.py routine replayed through the reference engine and the adaptive one
+    from determinism import runScenario
+    traces = [runScenario("main"), runScenario("main", "adaptive")]
+    viz = TiledVisualizer([MatchTile.from_trace(trace) for trace in traces], screen_size=(1000, 900))
+    viz.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -18,28 +18,16 @@ Controls:
 """
 
 from __future__ import annotations
-import os
-import sys
 import pygame
-from pygame import Vector2, Vector3
+from pygame import Vector2
+from environments.vecmath import Vector3
 
-
-def _add_paths_for_imports():
-	"""Make sure we can import robot, elevator, and pivot from the project layout."""
-	here = os.path.dirname(__file__)  # .../environments/visualization
-	env_dir = os.path.dirname(here)   # .../environments
-	robots_dir = os.path.join(env_dir, "robots")
-	subsystems_dir = os.path.join(robots_dir, "subsystems")
-	for p in (robots_dir, subsystems_dir):
-		if p not in sys.path:
-			sys.path.append(p)
-
-
-_add_paths_for_imports()
-from elevator import Elevator  # type: ignore
-from pivot import Pivot  # type: ignore
-from robotvisualization import RobotPositionVisualizer  # relative import within visualization pkg
-from subsystemvisualization import SubsystemVisualizer
+from environments.robots.robot import Robot
+from environments.robots.subsystems.elevator import Elevator
+from environments.robots.subsystems.pivot import Pivot
+from environments.visualization.display import get_screen
+from environments.visualization.robotvisualization import RobotPositionVisualizer
+from environments.visualization.subsystemvisualization import SubsystemVisualizer
 
 
 def world_to_screen(origin_px: Vector2, ppu: float, v: Vector2) -> Vector2:
@@ -49,9 +37,7 @@ def world_to_screen(origin_px: Vector2, ppu: float, v: Vector2) -> Vector2:
 
 class CombinedVisualizer:
 	def __init__(self, subsystems, robots, screen_size=(1200, 720), pixels_per_unit=4):
-		pygame.init()
-		pygame.display.set_caption("Robot + Subsystems Visualization")
-		self.screen = pygame.display.set_mode(screen_size)
+		self.screen = get_screen(screen_size, "Robot + Subsystems Visualization")
 		self.clock = pygame.time.Clock()
 		self.running = True
 		self.ppu = pixels_per_unit
@@ -62,7 +48,7 @@ class CombinedVisualizer:
 		self.center_origin = Vector2(int(w * 0.60), int(h * 0.75))
 
 		# Robot visualizer (reuse RobotPositionVisualizer for drawing and input)
-		self.robot_viz = RobotPositionVisualizer(robots)
+		self.robot_viz = RobotPositionVisualizer(robots, screen=self.screen, screen_size=screen_size)
 
 		# Subsystems visualizer (reuse SubsystemVisualizer)
 		self.subsystems_viz = SubsystemVisualizer(subsystems=subsystems, origin=self.side_origin, pixels_per_unit=self.ppu)
@@ -157,7 +143,6 @@ class CombinedVisualizer:
 				s.setTargetVel(0)
 
 
-from robots.robot import Robot
 def main():
 	elevator = Elevator(low_pos=Vector3(-20, 0, 0), maxheight=120, maxVel=160, maxAccel=300, mountedAngle=90)
 	elevator.setTargetVel(0)
@@ -1,12 +1,10 @@
-from pathlib import Path
 import sys
 
 from autopaths import Pathfollow
 
-from pygame import Vector2, Vector3
+from environments.vecmath import Vector2, Vector3
 
 from environments.piece import Piece, PieceType
-from environments.visualization.fullvisualization import EnvironmentVisualizer
 
 
 from environments.environment import Environment
@@ -24,112 +22,124 @@ import constants
 # robot = JITBRobot(0, 0, 0, 0, 0, (20, 20))
 # sim = Sim([PivotSim(robot.pivot), ElevatorSim(robot.telescope), PivotSim(robot.wrist)])
 
-def run():
+def buildMatch():
+    poof = PoofsRobot(100, 100, 0, 5000, 200, (28, 28), Piece(PieceType.CONE, Vector3(20, 20, 20)))
+    jitb = JITBRobot(200, 200, 0, 5000, 170, (26, 26), Piece(PieceType.CUBE, Vector3(-20, 20, 20)))
+    krawler = KrawlerBot(150, 200, 0, 5000, 200, (25, 25), Piece(PieceType.CONE, Vector3()))
+    bread = BreadRobot(300, 100, 0, 5000, 220, (30, 30), Piece(PieceType.CONE, Vector3()))
+    op = OPRobot(400, 200, 0, 5000, 190, (30, 30), Piece(PieceType.CUBE, Vector3()))
+    # sim = SubsystemsSim([ElevatorSim(robot.elevator), ElevatorSim(robot.laterator), PivotSim(robot2.pivot), ElevatorSim(robot2.telescope), PivotSim(robot2.wrist)])
+
+    robots = [jitb, poof, krawler, bread, op]
+    robots = [poof]
+
+    # sim.addRobots(robots)
+
+    # robotvisualization is used inside EnvironmentVisualizer; do not instantiate
+    # a standalone RobotPositionVisualizer here (it was created with a single
+    # robot and could cause confusion). EnvironmentVisualizer will create its
+    # own RobotPositionVisualizer bound to the full `robots` list below.
+
+    env = Environment(robots=robots, startingPieces=[])
+
+    pathing = Pathfollow(robots[0], env)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[8][0].x, 70), 90)
+    pathing.addMoveArm(30.0, 40.0)
+    pathing.addDrop(10)
+    pathing.changePiece(PieceType.CUBE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addMoveArm(30.0, 40.0)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[7][0].x, 70), 90)
+    pathing.addDrop(25)
+    pathing.changePiece(PieceType.CONE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[6][0].x, 70), 90)
+    pathing.addDrop(30)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[5][0].x, 70), 90)
+    pathing.addDrop(40)
+    pathing.changePiece(PieceType.CUBE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[4][0].x, 70), 90)
+    pathing.addDrop(55)
+    pathing.changePiece(PieceType.CONE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[3][0].x, 70), 90)
+    pathing.addDrop(60)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[2][0].x, 70), 90)
+    pathing.addDrop(70)
+    pathing.changePiece(PieceType.CUBE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[1][0].x, 70), 90)
+    pathing.addDrop(85)
+    pathing.changePiece(PieceType.CONE)
+    pathing.addPath(Vector2(100, 250), 90)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[0][0].x, 70), 90)
+    pathing.addDrop(90)
+    pathing.addMoveArm(30.0, 25.0)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[8][0].x, 70), 90)
+    pathing.addDrop(100)
+    pathing.changePiece(PieceType.CUBE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[7][0].x, 70), 90)
+    pathing.addDrop(115)
+    pathing.changePiece(PieceType.CONE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[6][0].x, 70), 90)
+    pathing.addDrop(120)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[5][0].x, 70), 90)
+    pathing.addDrop(130)
+    pathing.changePiece(PieceType.CUBE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[4][0].x, 70), 90)
+    pathing.addDrop(145)
+    pathing.changePiece(PieceType.CONE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[3][0].x, 70), 90)
+    pathing.addDrop(150)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[2][0].x, 70), 90)
+    pathing.addDrop(160)
+    pathing.changePiece(PieceType.CUBE)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[1][0].x, 70), 90)
+    pathing.addDrop(170)
+    pathing.addPath(Vector2(100, 250), 90)
+    pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
+    pathing.addDrop(180)
+    pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[0][0].x, 70), 90)
+    return env, pathing
+
+
+# with a visualizer every step is drawn through viz.run(dt), which also advances the environment
+def run(env, pathing, viz=None):
     totaltime = 0
     while pathing.runCommand() and totaltime < 135:
         dt = .1
-        viz.env.update(dt)
-        # viz.run(dt)
+        if viz is None:
+            env.update(dt)
+        else:
+            viz.run(dt)
         totaltime += dt
         # print(totaltime)
-        
+
     print(pathing.index, pathing.commands[pathing.index])
-    print(viz.env.scoring.score)
-    print(viz.env.scoring.grid)
-
-    viz.quit()
-
-poof = PoofsRobot(100, 100, 0, 5000, 200, (28, 28), Piece(PieceType.CONE, Vector3(20, 20, 20)))
-jitb = JITBRobot(200, 200, 0, 5000, 170, (26, 26), Piece(PieceType.CUBE, Vector3(-20, 20, 20)))
-krawler = KrawlerBot(150, 200, 0, 5000, 200, (25, 25), Piece(PieceType.CONE, Vector3()))
-bread = BreadRobot(300, 100, 0, 5000, 220, (30, 30), Piece(PieceType.CONE, Vector3()))
-op = OPRobot(400, 200, 0, 5000, 190, (30, 30), Piece(PieceType.CUBE, Vector3()))
-# sim = SubsystemsSim([ElevatorSim(robot.elevator), ElevatorSim(robot.laterator), PivotSim(robot2.pivot), ElevatorSim(robot2.telescope), PivotSim(robot2.wrist)])
-
-robots = [jitb, poof, krawler, bread, op]
-robots = [poof]
-
-# sim.addRobots(robots)
-
-
-# robotvisualization is used inside EnvironmentVisualizer; do not instantiate
-# a standalone RobotPositionVisualizer here (it was created with a single
-# robot and could cause confusion). EnvironmentVisualizer will create its
-# own RobotPositionVisualizer bound to the full `robots` list below.
-
-env = Environment(robots=robots, startingPieces=[])
-viz = EnvironmentVisualizer(env, screen_size=(1280, 800))
-
-
-pathing = Pathfollow(robots[0], env)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[8][0].x, 70), 90)
-pathing.addMoveArm(30.0, 40.0)
-pathing.addDrop(10)
-pathing.changePiece(PieceType.CUBE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addMoveArm(30.0, 40.0)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[7][0].x, 70), 90)
-pathing.addDrop(25)
-pathing.changePiece(PieceType.CONE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[6][0].x, 70), 90)
-pathing.addDrop(30)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[5][0].x, 70), 90)
-pathing.addDrop(40)
-pathing.changePiece(PieceType.CUBE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[4][0].x, 70), 90)
-pathing.addDrop(55)
-pathing.changePiece(PieceType.CONE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[3][0].x, 70), 90)
-pathing.addDrop(60)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[2][0].x, 70), 90)
-pathing.addDrop(70)
-pathing.changePiece(PieceType.CUBE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[1][0].x, 70), 90)
-pathing.addDrop(85)
-pathing.changePiece(PieceType.CONE)
-pathing.addPath(Vector2(100, 250), 90)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[0][0].x, 70), 90)
-pathing.addDrop(90)
-pathing.addMoveArm(30.0, 25.0)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[8][0].x, 70), 90)
-pathing.addDrop(100)
-pathing.changePiece(PieceType.CUBE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[7][0].x, 70), 90)
-pathing.addDrop(115)
-pathing.changePiece(PieceType.CONE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[6][0].x, 70), 90)
-pathing.addDrop(120)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[5][0].x, 70), 90)
-pathing.addDrop(130)
-pathing.changePiece(PieceType.CUBE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[4][0].x, 70), 90)
-pathing.addDrop(145)
-pathing.changePiece(PieceType.CONE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[3][0].x, 70), 90)
-pathing.addDrop(150)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[2][0].x, 70), 90)
-pathing.addDrop(160)
-pathing.changePiece(PieceType.CUBE)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[1][0].x, 70), 90)
-pathing.addDrop(170)
-pathing.addPath(Vector2(100, 250), 90)
-pathing.addPath(constants.pickupSpot(constants.FIELD_CONSTANTS.RED_SUBSTATION_RIGHT), -90)
-pathing.addDrop(180)
-pathing.addPath(Vector2(constants.FIELD_CONSTANTS.SCORING_LOCATIONS[0][0].x, 70), 90)
-run()
\ No newline at end of file
+    print(env.scoring.score)
+    print(env.scoring.grid)
+
+
+# python main.py [--visualize]
+if __name__ == "__main__":
+    env, pathing = buildMatch()
+    viz = None
+    if "--visualize" in sys.argv[1:]:
+        from environments.visualization import EnvironmentVisualizer
+        viz = EnvironmentVisualizer(env, screen_size=(1280, 800))
+    run(env, pathing, viz)
+    if viz is not None:
+        viz.quit()
@@ -0,0 +1,94 @@
+from environments.vecmath import Vector2
+
+from environments.environment import Environment, MatchMode
+
+
+# runs a Pathfollow routine against an Environment the same way main.py does. With a tolerance each dt is
+# integrated by Environment.advance instead of a single fixed step. onStep is called after every step.
+def runRoutine(env, pathing, dt=.1, duration=135, tolerance=None, onStep=None):
+    totaltime = 0
+    while pathing.runCommand() and totaltime < duration:
+        stepEnvironment(env, dt, tolerance)
+        totaltime += dt
+        if onStep is not None:
+            onStep()
+    return env
+
+
+def stepEnvironment(env, dt, tolerance=None):
+    if tolerance is None:
+        env.update(dt)
+    else:
+        env.advance(dt, tolerance)
+
+
+def buildAlliances(red, blue, startingPieces=()):
+    for robot in red:
+        robot.alliance = "Red"
+    for robot in blue:
+        robot.alliance = "Blue"
+    return Environment(robots=list(red) + list(blue), startingPieces=list(startingPieces))
+
+
+class Match:
+    """A full match: every controller (Pathfollow or anything with `robot`, `commands`, `index`, `decide()` and
+    `commit()`) is stepped once per tick through Environment.tick, and the environment goes through
+    auto -> teleop -> disabled.
+
+    teleopControllers defaults to carrying the auto controllers on into teleop. Pass a concurrent.futures executor
+    to evaluate controllers in parallel; results are identical to the sequential path. With a `tolerance` controllers
+    still run every dt, but the physics in between is integrated adaptively (see Environment.advance).
+    """
+
+    def __init__(self, env, autoControllers, teleopControllers=None, dt=.1, executor=None, tolerance=None):
+        self.env = env
+        self.executor = executor
+        self.autoControllers = list(autoControllers)
+        self.teleopControllers = self.autoControllers if teleopControllers is None else list(teleopControllers)
+        self.dt = dt
+        self.tolerance = tolerance
+        self.controllers = []
+        self.finished = set()
+
+    def start(self):
+        self.env.startMatch()
+        self.setControllers(self.autoControllers)
+
+    def setControllers(self, controllers):
+        self.controllers = controllers
+        self.finished = set()
+
+    def step(self):
+        active = []
+        for controller in self.controllers:
+            if id(controller) in self.finished:
+                continue
+            if controller.index >= len(controller.commands):
+                self.stopController(controller)
+            else:
+                active.append(controller)
+
+        # Environment.tick, with finished robots stopped before the physics step
+        self.env.applyIntents(active, self.env.gatherIntents(active, self.executor))
+        for controller in active:
+            if controller.index >= len(controller.commands):
+                self.stopController(controller)
+        stepEnvironment(self.env, self.dt, self.tolerance)
+
+        if self.env.timeRemaining <= 0:
+            if self.env.mode == MatchMode.AUTO:
+                self.env.endAuto()
+                self.setControllers(self.teleopControllers)
+            elif self.env.mode == MatchMode.TELEOP:
+                self.env.endMatch()
+
+    def stopController(self, controller):
+        self.finished.add(id(controller))
+        controller.robot.setTargetVel(Vector2(0, 0))
+        controller.robot.setTargetRotSpeed(0)
+
+    def run(self):
+        self.start()
+        while self.env.mode != MatchMode.DISABLED:
+            self.step()
+        return self.env.scoring
@@ -0,0 +1,176 @@
+"""Monte Carlo match evaluation.
+
+Each trial builds a fresh match with `builder()` (a top-level function returning `(env, pathing)` so it can be
+sent to worker processes), perturbs it with a NoiseModel driven by its own seeded RNG stream, runs it with
+match.runRoutine and records `metric(env)`. Trials are run in rounds across the worker pool and evaluation stops
+as soon as the confidence interval on the mean is narrower than the requested tolerance.
+
+    with MonteCarloEvaluator(workers=8) as evaluator:
+        result = evaluator.evaluate(buildMatch, NoiseModel(maxvel=Normal(1, .05), intakeSlop=Uniform(-2, 2)),
+                                    maxTrials=500, tolerance=1)
+        print(result.mean, result.interval, result.percentiles)
+"""
+
+import math
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from match import runRoutine
+
+
+class Normal:
+    def __init__(self, mean, std):
+        self.mean = mean
+        self.std = std
+
+    def sample(self, rng):
+        return rng.gauss(self.mean, self.std)
+
+
+class Uniform:
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng):
+        return rng.uniform(self.low, self.high)
+
+
+class Choice:
+    def __init__(self, values):
+        self.values = list(values)
+
+    def sample(self, rng):
+        return rng.choice(self.values)
+
+
+class NoiseModel:
+    # maxaccel/maxvel are multiplicative factors, intakeSlop (inches) and dropTicks (Pathfollow drop ticks) are
+    # added. Every distribution is sampled per robot / per drop command. A dropTicks draw changes only the length of
+    # its own drop: Pathfollow's drop times count ticks since the routine started, so each time is moved by the sum
+    # of the draws up to it.
+    def __init__(self, maxaccel=None, maxvel=None, intakeSlop=None, dropTicks=None):
+        self.maxaccel = maxaccel
+        self.maxvel = maxvel
+        self.intakeSlop = intakeSlop
+        self.dropTicks = dropTicks
+
+    def apply(self, env, controllers, rng):
+        for robot in env.robots:
+            if self.maxaccel is not None:
+                robot.maxaccel *= max(self.maxaccel.sample(rng), 0)
+            if self.maxvel is not None:
+                robot.maxvel *= max(self.maxvel.sample(rng), 0)
+            if self.intakeSlop is not None:
+                robot.intakeSlop += self.intakeSlop.sample(rng)
+        if self.dropTicks is None:
+            return
+        for controller in controllers:
+            original = noisy = 0
+            for index, command in enumerate(controller.commands):
+                if command[0] is None:
+                    length = command[1] - original
+                    original = command[1]
+                    noisy += max(length + round(self.dropTicks.sample(rng)), 0)
+                    controller.commands[index] = (None, noisy)
+
+
+def redScore(env):
+    return env.scoring.score["Red"]
+
+
+# trial i of a given seed always sees the same random stream, whichever worker runs it
+def trialRng(seed, trial):
+    return random.Random(f"{seed}:{trial}")
+
+
+def runTrials(builder, noise, metric, seed, trials, dt, duration):
+    results = []
+    for trial in trials:
+        env, pathing = builder()
+        if noise is not None:
+            noise.apply(env, [pathing], trialRng(seed, trial))
+        runRoutine(env, pathing, dt, duration)
+        results.append(metric(env))
+    return results
+
+
+class MonteCarloResult:
+    __slots__ = ("scores", "mean", "stdev", "interval", "percentiles", "stoppedEarly")
+
+    def __init__(self, scores, confidence, stoppedEarly):
+        self.scores = scores
+        self.mean = statistics.fmean(scores)
+        self.stdev = statistics.stdev(scores) if len(scores) > 1 else 0.0
+        halfWidth = confidenceHalfWidth(scores, confidence)
+        self.interval = (self.mean - halfWidth, self.mean + halfWidth)
+        self.percentiles = percentiles(scores, (5, 25, 50, 75, 95))
+        self.stoppedEarly = stoppedEarly
+
+    def __repr__(self):
+        return (f"MonteCarloResult(trials={len(self.scores)}, mean={self.mean:.2f}, "
+                f"interval=({self.interval[0]:.2f}, {self.interval[1]:.2f}), stoppedEarly={self.stoppedEarly})")
+
+
+def confidenceHalfWidth(scores, confidence):
+    if len(scores) < 2:
+        return math.inf
+    z = statistics.NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    return z * statistics.stdev(scores) / math.sqrt(len(scores))
+
+
+def percentiles(scores, points):
+    ordered = sorted(scores)
+    result = {}
+    for point in points:
+        position = (len(ordered) - 1) * point / 100
+        low = math.floor(position)
+        high = min(low + 1, len(ordered) - 1)
+        result[point] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    return result
+
+
+class MonteCarloEvaluator:
+    # the process pool is kept for the evaluator's lifetime so thousands of configs can share it
+    def __init__(self, workers=1, chunkSize=8, dt=.1, duration=135):
+        self.workers = workers
+        self.chunkSize = chunkSize
+        self.dt = dt
+        self.duration = duration
+        self.executor = ProcessPoolExecutor(workers) if workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    # stops once the `confidence` interval half width is <= tolerance (after at least minTrials), or at maxTrials.
+    # Stopping is only checked between rounds, so the result does not depend on worker timing.
+    def evaluate(self, builder, noise=None, maxTrials=100, minTrials=10, tolerance=None, confidence=.95,
+                 seed=0, metric=redScore):
+        scores = []
+        roundSize = self.chunkSize * self.workers
+        while len(scores) < maxTrials:
+            start = len(scores)
+            stop = min(start + roundSize, maxTrials)
+            chunks = [range(i, min(i + self.chunkSize, stop)) for i in range(start, stop, self.chunkSize)]
+            if self.executor is None:
+                for chunk in chunks:
+                    scores.extend(runTrials(builder, noise, metric, seed, chunk, self.dt, self.duration))
+            else:
+                futures = [self.executor.submit(runTrials, builder, noise, metric, seed, chunk, self.dt, self.duration)
+                           for chunk in chunks]
+                for future in futures:
+                    scores.extend(future.result())
+
+            if (tolerance is not None and len(scores) >= minTrials and len(scores) < maxTrials
+                    and confidenceHalfWidth(scores, confidence) <= tolerance):
+                return MonteCarloResult(scores, confidence, True)
+        return MonteCarloResult(scores, confidence, False)
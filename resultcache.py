@@ -0,0 +1,210 @@
+"""Content-addressed cache of finished Environment + Pathfollow runs.
+
+runKey() hashes everything that determines a run: every robot's class and full slot state (mechanism included),
+the pieces, scoring and match state, the controller's commands and progress, dt, duration and tolerance. Floats are
+hashed exactly (float.hex), so two configurations share a key only if they would simulate identically. The final
+ScoringManager state and the telemetry summary of the run are stored under that key in SQLite, which is safe to
+share between worker processes (WAL mode, one connection per process) and bounded to maxBytes by evicting the least
+recently used results.
+
+    cache = ResultCache()
+    result = cachedRoutine(cache, env, pathing)    # simulates on a miss, otherwise a single indexed lookup
+    print(result.score, result.summary["redLinkTimes"])
+
+Bump CACHE_VERSION whenever a change to the simulation alters results.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from enum import Enum
+from pathlib import Path
+
+from environments.environment import ScoringManager
+from environments.vecmath import Vector2, Vector3
+from match import runRoutine
+from telemetry import MatchRecorder
+
+CACHE_VERSION = 1
+REFERENCES = frozenset(("pieceHeld", "holder", "robot", "env")) # links between objects, encoded by index instead
+
+
+def cachePath():
+    return Path(os.environ.get("FRCSIM_CACHE", Path.home() / ".cache" / "frcsim")) / "results.sqlite"
+
+
+def slotNames(cls):
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return names
+
+
+# a nested tuple of strings that only depends on values, never on identities or dict order
+def canonical(value):
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value).hex()
+    if isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}"
+    if isinstance(value, (Vector2, Vector3)):
+        return (type(value).__name__,) + tuple(coord.hex() for coord in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical(item) for item in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((canonical(key), canonical(item)) for key, item in value.items()))
+    names = slotNames(type(value)) or sorted(vars(value))
+    return (f"{type(value).__module__}.{type(value).__qualname__}",) + tuple(
+        (name, canonical(getattr(value, name, None))) for name in names
+        if not name.startswith("_") and name not in REFERENCES)
+
+
+def runKey(env, pathing, dt=.1, duration=135, tolerance=None):
+    pieceIndex = {id(piece): index for index, piece in enumerate(env.pieces)}
+    description = (
+        CACHE_VERSION,
+        canonical(env.robots),
+        tuple(pieceIndex.get(id(robot.pieceHeld), -1) for robot in env.robots),
+        tuple(canonical(piece.getState()) + (piece.lastPos is None,) for piece in env.pieces),
+        canonical(env.scoring.getState()),
+        canonical((env.mode, env.timeRemaining, env.pieceToAdd, env.time, env.lastStep)),
+        env.robots.index(pathing.robot),
+        canonical(pathing),
+        canonical((dt, duration, tolerance)),
+    )
+    return hashlib.sha256(repr(description).encode()).hexdigest()
+
+
+class CachedResult:
+    __slots__ = ("scoringState", "summary", "index")
+
+    def __init__(self, scoringState, summary, index):
+        self.scoringState = scoringState
+        self.summary = summary
+        self.index = index # the controller's command index when the run stopped
+
+    @property
+    def score(self):
+        return self.scoringState[1]
+
+    def scoring(self):
+        scoring = ScoringManager.__new__(ScoringManager)
+        scoring.setState(self.scoringState)
+        return scoring
+
+    def encode(self):
+        return json.dumps((self.scoringState, self.summary, self.index), separators=(",", ":")).encode()
+
+    @classmethod
+    def decode(cls, data):
+        return cls(*json.loads(data))
+
+
+class ResultCache:
+    # lastUsed is only rewritten when it is older than touchInterval seconds, so hits are normally read-only
+    def __init__(self, path=None, maxBytes=256 * 1024 * 1024, touchInterval=60):
+        self.path = Path(path) if path is not None else cachePath()
+        self.maxBytes = maxBytes
+        self.touchInterval = touchInterval
+        self.connection = None
+        self.pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # the connection is per process: a cache inherited through fork or pickled to a worker reconnects
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["connection"] = None
+        state["pid"] = None
+        return state
+
+    def connect(self):
+        if self.connection is not None and self.pid == os.getpid():
+            return self.connection
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                           "size INTEGER NOT NULL, lastUsed REAL NOT NULL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS resultsByUse ON results (lastUsed)")
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute("INSERT OR IGNORE INTO meta VALUES ('bytes', 0)")
+        self.connection = connection
+        self.pid = os.getpid()
+        return connection
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+    def get(self, key):
+        connection = self.connect()
+        row = connection.execute("SELECT value, lastUsed FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.touchInterval:
+            connection.execute("UPDATE results SET lastUsed = ? WHERE key = ?", (now, key))
+        return CachedResult.decode(row[0])
+
+    def put(self, key, result):
+        value = result.encode()
+        connection = self.connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            old = connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, value, len(value), time.time()))
+            connection.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (len(value) - (old[0] if old else 0),))
+            total = connection.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+            if total > self.maxBytes:
+                self.evict(connection, total)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    # drops least recently used results until the store is back under 90% of maxBytes, inside put's transaction
+    def evict(self, connection, total):
+        target = self.maxBytes * 9 // 10
+        freed = 0
+        doomed = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY lastUsed"):
+            if total - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM results WHERE key = ?", doomed)
+        connection.execute("UPDATE meta SET value = value - ? WHERE name = 'bytes'", (freed,))
+
+    def clear(self):
+        connection = self.connect()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM results")
+        connection.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+        connection.execute("COMMIT")
+
+
+# match.runRoutine through the cache. On a miss the run is simulated (leaving env and pathing at the end of the run,
+# like runRoutine) and stored; on a hit env and pathing are left untouched.
+def cachedRoutine(cache, env, pathing, dt=.1, duration=135, tolerance=None):
+    key = runKey(env, pathing, dt, duration, tolerance)
+    result = cache.get(key)
+    if result is not None:
+        return result
+    recorder = MatchRecorder(env)
+    runRoutine(env, pathing, dt, duration, tolerance, recorder.observe)
+    summary = recorder.summary(None)
+    del summary["matchId"]
+    result = CachedResult(env.scoring.getState(), summary, pathing.index)
+    cache.put(key, result)
+    return result
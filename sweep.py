@@ -0,0 +1,283 @@
+"""Resumable parameter sweeps backed by a SQLite job queue.
+
+The job list, who holds which job and every result live in one SQLite file, so a sweep survives crashed workers and
+reboots: run the same script again and only the unfinished jobs are run. Jobs are JSON parameter dicts handed to a
+top-level function (so it can be sent to worker processes) whose JSON-serializable return value is stored.
+
+    def trial(params):
+        env, pathing = buildMatch()
+        env.robots[0].maxvel = params["maxvel"]
+        env.robots[0].maxaccel = params["maxaccel"]
+        runRoutine(env, pathing)
+        return env.scoring.score
+
+    queue = SweepQueue("out/sweep.sqlite")
+    queue.addJobs({"maxvel": v, "maxaccel": a} for v in range(100, 300, 10) for a in (2500, 5000))
+    stats = runSweep("out/sweep.sqlite", trial, workers=8)
+    for params, score in queue.results():
+        ...
+
+Workers claim jobs in batches and report a whole batch in one transaction, which is the checkpoint: a crash loses at
+most the batch in flight. The batch size adapts so the time spent claiming and reporting stays under
+`maxOverhead` (1%) of the time spent simulating. A claimed job whose worker has not reported for `lease` seconds is
+handed out again; a job is retried until it has been attempted `maxAttempts` times, then marked failed with its
+traceback. After a reboot, queue.requeueStale(0) hands back the claims of workers that are known to be gone.
+"""
+
+import json
+import math
+import os
+import socket
+import sqlite3
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PENDING, CLAIMED, DONE, FAILED = "pending", "claimed", "done", "failed"
+
+
+def jobKey(params):
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+def workerName():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Job:
+    __slots__ = ("id", "params", "attempts")
+
+    def __init__(self, id, params, attempts):
+        self.id = id
+        self.params = params
+        self.attempts = attempts # including this one
+
+
+class SweepQueue:
+    def __init__(self, path, maxAttempts=3, lease=600):
+        self.path = Path(path)
+        self.maxAttempts = maxAttempts
+        self.lease = lease
+        self.connection = None
+        self.pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # one connection per process, as in resultcache.ResultCache
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["connection"] = None
+        state["pid"] = None
+        return state
+
+    def connect(self):
+        if self.connection is not None and self.pid == os.getpid():
+            return self.connection
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, "
+                           "params TEXT NOT NULL, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                           "worker TEXT, heartbeat REAL, result TEXT, error TEXT, seconds REAL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS jobsByState ON jobs (state, id)")
+        self.connection = connection
+        self.pid = os.getpid()
+        return connection
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+    def transaction(self):
+        connection = self.connect()
+        connection.execute("BEGIN IMMEDIATE")
+        return connection
+
+    # jobs already in the queue (same parameters) are skipped, so re-adding a whole sweep resumes it. Returns how
+    # many jobs were new.
+    def addJobs(self, paramsList):
+        rows = [(jobKey(params), json.dumps(params), PENDING) for params in paramsList]
+        connection = self.transaction()
+        try:
+            before = connection.total_changes
+            connection.executemany("INSERT OR IGNORE INTO jobs (key, params, state) VALUES (?, ?, ?)", rows)
+            added = connection.total_changes - before
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return added
+
+    # hands out up to `count` pending jobs, oldest first, after putting expired claims back in the queue
+    def claim(self, worker, count):
+        connection = self.transaction()
+        try:
+            now = time.time()
+            self.expire(connection, now - self.lease)
+            rows = connection.execute("SELECT id, params, attempts FROM jobs WHERE state = ? ORDER BY id LIMIT ?",
+                                      (PENDING, count)).fetchall()
+            connection.executemany("UPDATE jobs SET state = ?, worker = ?, heartbeat = ?, attempts = attempts + 1 WHERE id = ?",
+                                   [(CLAIMED, worker, now, id) for id, _, _ in rows])
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return [Job(id, json.loads(params), attempts + 1) for id, params, attempts in rows]
+
+    def expire(self, connection, before):
+        connection.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, "
+                           "error = 'lease expired' WHERE state = ? AND heartbeat < ?",
+                           (self.maxAttempts, FAILED, PENDING, CLAIMED, before))
+
+    # records a finished batch: done is [(job id, result, seconds)], failed is [(job id, error text)]. A failed job
+    # goes back to pending until it has used up maxAttempts.
+    def complete(self, worker, done=(), failed=()):
+        now = time.time()
+        connection = self.transaction()
+        try:
+            connection.executemany("UPDATE jobs SET state = ?, result = ?, seconds = ?, error = NULL, worker = NULL "
+                                   "WHERE id = ? AND state != ?",
+                                   [(DONE, json.dumps(result), seconds, id, DONE) for id, result, seconds in done])
+            connection.executemany("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, "
+                                   "worker = NULL WHERE id = ? AND state = ? AND worker = ?",
+                                   [(self.maxAttempts, FAILED, PENDING, error, id, CLAIMED, worker) for id, error in failed])
+            connection.execute("UPDATE jobs SET heartbeat = ? WHERE state = ? AND worker = ?", (now, CLAIMED, worker))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    # gives a worker's claims back, by default without using up an attempt (clean shutdown). With refund=False the
+    # attempt counts, so a job that keeps killing its worker ends up failed.
+    def release(self, worker, refund=True):
+        connection = self.transaction()
+        try:
+            if refund:
+                connection.execute("UPDATE jobs SET state = ?, worker = NULL, attempts = attempts - 1 WHERE state = ? AND worker = ?",
+                                   (PENDING, CLAIMED, worker))
+            else:
+                connection.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, "
+                                   "error = 'worker disconnected' WHERE state = ? AND worker = ?",
+                                   (self.maxAttempts, FAILED, PENDING, CLAIMED, worker))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def requeueStale(self, lease=None):
+        connection = self.transaction()
+        try:
+            self.expire(connection, time.time() - (self.lease if lease is None else lease))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    # failed jobs get a fresh set of attempts
+    def retryFailed(self):
+        connection = self.transaction()
+        try:
+            connection.execute("UPDATE jobs SET state = ?, attempts = 0 WHERE state = ?", (PENDING, FAILED))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def progress(self):
+        counts = dict.fromkeys((PENDING, CLAIMED, DONE, FAILED), 0)
+        counts.update(self.connect().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return counts
+
+    def results(self):
+        for params, result in self.connect().execute("SELECT params, result FROM jobs WHERE state = ? ORDER BY id", (DONE,)):
+            yield json.loads(params), json.loads(result)
+
+    def failures(self):
+        for params, error in self.connect().execute("SELECT params, error FROM jobs WHERE state = ? ORDER BY id", (FAILED,)):
+            yield json.loads(params), error
+
+
+class SweepStats:
+    __slots__ = ("done", "errors", "batches", "jobSeconds", "queueSeconds")
+
+    def __init__(self, done=0, errors=0, batches=0, jobSeconds=0., queueSeconds=0.):
+        self.done = done
+        self.errors = errors # failed attempts, retried or not
+        self.batches = batches
+        self.jobSeconds = jobSeconds
+        self.queueSeconds = queueSeconds
+
+    # time spent claiming and reporting, as a fraction of time spent running jobs
+    @property
+    def overhead(self):
+        return self.queueSeconds / self.jobSeconds if self.jobSeconds > 0 else 0.
+
+    def __add__(self, other):
+        return SweepStats(*(getattr(self, name) + getattr(other, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return (f"SweepStats(done={self.done}, errors={self.errors}, batches={self.batches}, "
+                f"overhead={self.overhead:.2%})")
+
+
+# size of the next batch: enough jobs that the queue round trip is at most maxOverhead of the batch's run time
+def nextBatchSize(queueSeconds, jobSeconds, maxOverhead, maxBatch):
+    if jobSeconds <= 0:
+        return maxBatch
+    return max(1, min(maxBatch, math.ceil(queueSeconds / (maxOverhead * jobSeconds))))
+
+
+# claims and runs batches until no job is pending; claims still held on any exception are released
+def runWorker(path, function, worker=None, maxAttempts=3, lease=600, maxOverhead=.01, maxBatch=1000):
+    worker = worker or workerName()
+    queue = SweepQueue(path, maxAttempts, lease)
+    stats = SweepStats()
+    batch = 1
+    try:
+        while True:
+            start = time.perf_counter()
+            jobs = queue.claim(worker, batch)
+            claimed = time.perf_counter()
+            if not jobs:
+                stats.queueSeconds += claimed - start
+                return stats
+            done, failed = [], []
+            for job in jobs:
+                jobStart = time.perf_counter()
+                try:
+                    result = function(job.params)
+                except Exception:
+                    failed.append((job.id, traceback.format_exc()))
+                else:
+                    done.append((job.id, result, time.perf_counter() - jobStart))
+            ran = time.perf_counter()
+            queue.complete(worker, done, failed)
+            finished = time.perf_counter()
+
+            stats.done += len(done)
+            stats.errors += len(failed)
+            stats.batches += 1
+            stats.jobSeconds += ran - claimed
+            stats.queueSeconds += (claimed - start) + (finished - ran)
+            batch = nextBatchSize((claimed - start) + (finished - ran), (ran - claimed) / len(jobs), maxOverhead, maxBatch)
+    except BaseException:
+        queue.release(worker)
+        raise
+    finally:
+        queue.close()
+
+
+# runs the queue at `path` to completion with `workers` processes and returns their combined SweepStats
+def runSweep(path, function, workers=1, **options):
+    if workers <= 1:
+        return runWorker(path, function, **options)
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(runWorker, path, function, **options) for _ in range(workers)]
+        return sum((future.result() for future in futures), SweepStats())
@@ -0,0 +1,266 @@
+"""Streaming match telemetry for sweeps.
+
+A MatchRecorder watches an Environment tick by tick and keeps what the final score hides: when each node was first
+filled, when each link was completed and how long every robot's cycles (drop to drop) took. Each worker writes those
+summaries, and optionally per-tick robot traces, through a TelemetryWriter into its own Parquet part files. Rows are
+buffered columnwise and written as one Arrow record batch (one row group) every `batchRows` rows, so a worker's
+memory stays bounded however many matches it runs. mergeTelemetry then streams all parts into one file per table.
+
+    with TelemetryWriter("out/sweep", traces=True) as writer:
+        for trial in range(1000):
+            env, pathing = buildMatch()
+            recordRoutine(env, pathing, writer, f"trial-{trial}")
+    mergeTelemetry("out/sweep")   # out/sweep/summaries.parquet, out/sweep/traces.parquet
+
+pyarrow is only imported when a file is written or merged.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+from environments.environment import MatchMode, NODE_ALLIANCES
+from match import runRoutine
+
+# (name, type) per column; types are resolved against pyarrow through ARROW_TYPES in arrowSchema
+SUMMARY_COLUMNS = (
+    ("matchId", "string"),
+    ("duration", "float64"),
+    ("redScore", "int32"),
+    ("blueScore", "int32"),
+    ("redFillTimes", "list<float64>"), # 27 nodes, top row first, null if never filled
+    ("blueFillTimes", "list<float64>"),
+    ("redLinkTimes", "list<float64>"),
+    ("blueLinkTimes", "list<float64>"),
+    ("robotAlliances", "list<string>"),
+    ("cycleDurations", "list<list<float64>>"), # per robot, in env.robots order
+)
+TRACE_COLUMNS = (
+    ("matchId", "string"),
+    ("time", "float64"),
+    ("robot", "int16"),
+    ("x", "float64"),
+    ("y", "float64"),
+    ("theta", "float64"),
+    ("vx", "float64"),
+    ("vy", "float64"),
+    ("holding", "bool"),
+)
+BATCH_ROWS = 65536
+
+
+ARROW_TYPES = {
+    "string": "string",
+    "float64": "float64",
+    "int16": "int16",
+    "int32": "int32",
+    "bool": "bool_",
+}
+
+
+def arrowType(pa, name):
+    if name.startswith("list<"):
+        return pa.list_(arrowType(pa, name[5:-1]))
+    return getattr(pa, ARROW_TYPES[name])()
+
+
+def arrowSchema(pa, columns):
+    return pa.schema([pa.field(name, arrowType(pa, typeName)) for name, typeName in columns])
+
+
+def importArrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("telemetry export needs pyarrow (pip install pyarrow)") from error
+    return pyarrow, pyarrow.parquet
+
+
+class MatchRecorder:
+    # created at the start of the match; call observe() after every step
+    def __init__(self, env):
+        self.env = env
+        self.startTime = env.time
+        self.fillTimes = {alliance: [None] * 27 for alliance in NODE_ALLIANCES}
+        self.linkTimes = {alliance: [] for alliance in NODE_ALLIANCES}
+        self.links = env.scoring.calculateLinks()
+        self.filled = sum(1 for alliance in NODE_ALLIANCES for row in env.scoring.grid[alliance] for node in row if node > 0)
+        self.holding = [robot.pieceHeld is not None for robot in env.robots]
+        self.lastDrop = [env.time] * len(env.robots)
+        self.cycles = [[] for _ in env.robots]
+
+    def observe(self):
+        env = self.env
+        time = env.time
+        grid = env.scoring.grid
+        filled = sum(1 for alliance in NODE_ALLIANCES for row in grid[alliance] for node in row if node > 0)
+        if filled != self.filled:
+            self.filled = filled
+            for alliance in NODE_ALLIANCES:
+                times = self.fillTimes[alliance]
+                for level, row in enumerate(grid[alliance]):
+                    for column, node in enumerate(row):
+                        if node > 0 and times[level * 9 + column] is None:
+                            times[level * 9 + column] = time
+            links = env.scoring.calculateLinks()
+            for alliance in NODE_ALLIANCES:
+                self.linkTimes[alliance].extend([time] * (links[alliance] - self.links[alliance]))
+            self.links = links
+        for index, robot in enumerate(env.robots):
+            holding = robot.pieceHeld is not None
+            if self.holding[index] and not holding:
+                self.cycles[index].append(time - self.lastDrop[index])
+                self.lastDrop[index] = time
+            self.holding[index] = holding
+
+    def summary(self, matchId):
+        score = self.env.scoring.score
+        return {
+            "matchId": matchId,
+            "duration": self.env.time - self.startTime,
+            "redScore": score["Red"],
+            "blueScore": score["Blue"],
+            "redFillTimes": list(self.fillTimes["Red"]),
+            "blueFillTimes": list(self.fillTimes["Blue"]),
+            "redLinkTimes": list(self.linkTimes["Red"]),
+            "blueLinkTimes": list(self.linkTimes["Blue"]),
+            "robotAlliances": [robot.alliance for robot in self.env.robots],
+            "cycleDurations": [list(cycles) for cycles in self.cycles],
+        }
+
+
+def traceRows(matchId, env):
+    return [{"matchId": matchId, "time": env.time, "robot": index, "x": robot.pos.x, "y": robot.pos.y,
+             "theta": robot.theta, "vx": robot.velocity.x, "vy": robot.velocity.y, "holding": robot.pieceHeld is not None}
+            for index, robot in enumerate(env.robots)]
+
+
+class ParquetSink:
+    """Buffers rows columnwise and appends them to one Parquet file a record batch at a time."""
+
+    def __init__(self, path, columns, batchRows=BATCH_ROWS):
+        self.path = Path(path)
+        self.columns = columns
+        self.batchRows = batchRows
+        self.buffer = {name: [] for name, _ in columns}
+        self.rows = 0
+        self.writer = None
+        self.schema = None
+
+    def append(self, row):
+        for name, values in self.buffer.items():
+            values.append(row[name])
+        self.rows += 1
+        if self.rows >= self.batchRows:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        if self.rows == 0:
+            return
+        pa, pq = importArrow()
+        if self.writer is None:
+            self.schema = arrowSchema(pa, self.columns)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.writer = pq.ParquetWriter(str(self.path), self.schema, compression="zstd")
+        arrays = [pa.array(self.buffer[name], type=field.type) for name, field in zip(self.buffer, self.schema)]
+        self.writer.write_table(pa.Table.from_batches([pa.record_batch(arrays, schema=self.schema)]))
+        self.buffer = {name: [] for name, _ in self.columns}
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class TelemetryWriter:
+    # one writer per worker process; every writer gets its own part file name so workers never share a file
+    def __init__(self, directory, traces=False, batchRows=BATCH_ROWS):
+        self.directory = Path(directory)
+        self.traces = traces
+        part = f"part-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+        self.summarySink = ParquetSink(self.directory / "summaries" / part, SUMMARY_COLUMNS, batchRows)
+        self.traceSink = ParquetSink(self.directory / "traces" / part, TRACE_COLUMNS, batchRows) if traces else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def addSummary(self, summary):
+        self.summarySink.append(summary)
+
+    def addTrace(self, matchId, env):
+        if self.traceSink is not None:
+            self.traceSink.extend(traceRows(matchId, env))
+
+    def close(self):
+        self.summarySink.close()
+        if self.traceSink is not None:
+            self.traceSink.close()
+
+
+# match.runRoutine with telemetry; returns the environment like runRoutine
+def recordRoutine(env, pathing, writer, matchId, dt=.1, duration=135, tolerance=None):
+    recorder = MatchRecorder(env)
+
+    def onStep():
+        recorder.observe()
+        writer.addTrace(matchId, env)
+
+    runRoutine(env, pathing, dt, duration, tolerance, onStep)
+    writer.addSummary(recorder.summary(matchId))
+    return env
+
+
+# Match.run with telemetry; returns the scoring manager like Match.run
+def recordMatch(match, writer, matchId):
+    match.start()
+    recorder = MatchRecorder(match.env)
+    while match.env.mode != MatchMode.DISABLED:
+        match.step()
+        recorder.observe()
+        writer.addTrace(matchId, match.env)
+    writer.addSummary(recorder.summary(matchId))
+    return match.env.scoring
+
+
+# streams every part file into `output` one record batch at a time
+def mergeParts(paths, output, batchRows=BATCH_ROWS):
+    pa, pq = importArrow()
+    writer = None
+    try:
+        for path in paths:
+            part = pq.ParquetFile(str(path))
+            if writer is None:
+                Path(output).parent.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(str(output), part.schema_arrow, compression="zstd")
+            for batch in part.iter_batches(batch_size=batchRows):
+                writer.write_table(pa.Table.from_batches([batch]))
+    finally:
+        if writer is not None:
+            writer.close()
+    return writer is not None
+
+
+# merges <directory>/summaries/part-*.parquet into <directory>/summaries.parquet, and the same for traces.
+# Returns the merged files; parts are removed afterwards when removeParts is set.
+def mergeTelemetry(directory, batchRows=BATCH_ROWS, removeParts=False):
+    directory = Path(directory)
+    merged = []
+    for table in ("summaries", "traces"):
+        parts = sorted((directory / table).glob("part-*.parquet"))
+        output = directory / f"{table}.parquet"
+        if parts and mergeParts(parts, output, batchRows):
+            merged.append(output)
+            if removeParts:
+                for part in parts:
+                    part.unlink()
+    return merged
@@ -0,0 +1,49 @@
+import constants
+from environments.environment import MatchMode
+from environments.piece import Piece, PieceType
+from environments.robots.robots.poofs import PoofsRobot
+from environments.vecmath import Vector3
+from main import buildMatch
+from match import Match, buildAlliances
+
+
+def buildTwoAllianceMatch():
+    _, template = buildMatch()
+    red = [PoofsRobot(100 + 40 * i, 100, 0, 5000, 200, (28, 28), Piece(PieceType.CONE, Vector3())) for i in range(3)]
+    blue = [PoofsRobot(100 + 40 * i, constants.FIELD_HEIGHT - 100, 0, 5000, 200, (28, 28), Piece(PieceType.CONE, Vector3()))
+            for i in range(3)]
+    loose = [Piece(PieceType.CUBE, Vector3(300 + 10 * i, 300, 0)) for i in range(10)]
+    env = buildAlliances(red, blue, loose)
+    controllers = [template.copy(robot, env) for robot in red] + [template.mirrored(robot, env) for robot in blue]
+    return env, Match(env, controllers)
+
+
+def test_holders_stay_consistent_through_a_match():
+    env, match = buildTwoAllianceMatch()
+    match.start()
+    env.checkHolders()
+    while env.mode != MatchMode.DISABLED:
+        match.step()
+        env.checkHolders()
+    assert env.scoring.score["Red"] > 0 and env.scoring.score["Blue"] > 0
+
+
+def test_holders_survive_snapshot_restore():
+    env, match = buildTwoAllianceMatch()
+    match.start()
+    for _ in range(200):
+        match.step()
+    snapshot = env.snapshot()
+    held = [robot.pieceHeld for robot in env.robots]
+    assert any(piece is not None for piece in held)
+
+    # pieces change hands and new pieces appear before the restore
+    for _ in range(300):
+        match.step()
+    env.restore(snapshot)
+    env.checkHolders()
+    assert [robot.pieceHeld for robot in env.robots] == held
+
+    for _ in range(50):
+        match.step()
+        env.checkHolders()
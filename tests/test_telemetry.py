@@ -0,0 +1,41 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("pyarrow.compute")
+
+from main import buildMatch
+from telemetry import SUMMARY_COLUMNS, TRACE_COLUMNS, TelemetryWriter, arrowSchema, mergeTelemetry, recordRoutine
+
+
+@pytest.mark.parametrize("columns", [SUMMARY_COLUMNS, TRACE_COLUMNS])
+def test_schema_resolves_every_column(columns):
+    schema = arrowSchema(pa, columns)
+    assert schema.names == [name for name, _ in columns]
+
+
+def test_traced_matches_round_trip(tmp_path):
+    ticks = []
+    for trial in range(2):
+        # one writer per match, so the merge sees two part files per table
+        with TelemetryWriter(tmp_path, traces=True) as writer:
+            env, pathing = buildMatch()
+            recordRoutine(env, pathing, writer, f"trial-{trial}", duration=10)
+        ticks.append(round(env.time / .1))
+
+    for table in ("summaries", "traces"):
+        assert len(list((tmp_path / table).glob("part-*.parquet"))) == 2
+    assert mergeTelemetry(tmp_path) == [tmp_path / "summaries.parquet", tmp_path / "traces.parquet"]
+
+    summaries = pq.read_table(tmp_path / "summaries.parquet")
+    assert summaries.schema == arrowSchema(pa, SUMMARY_COLUMNS)
+    assert sorted(summaries.column("matchId").to_pylist()) == ["trial-0", "trial-1"]
+
+    traces = pq.read_table(tmp_path / "traces.parquet")
+    assert traces.schema == arrowSchema(pa, TRACE_COLUMNS)
+    robots = len(env.robots)
+    assert traces.num_rows == sum(ticks) * robots
+    assert traces.schema.field("holding").type == pa.bool_()
+    # every robot starts the match holding a piece
+    first = traces.filter(pa.compute.equal(traces.column("time"), pa.compute.min(traces.column("time"))))
+    assert first.num_rows == 2 * robots and all(first.column("holding").to_pylist())
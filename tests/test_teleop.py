@@ -0,0 +1,53 @@
+import pytest
+
+from environments.control import ControlIntent
+from environments.environment import Environment
+from environments.piece import Piece, PieceType
+from environments.robots.robots.poofs import PoofsRobot
+from environments.teleop import IntentRecorder, ReplayController, readIntentLog, replaySession
+from environments.vecmath import Vector2, Vector3
+
+DT = .05
+
+
+def buildEnv():
+    robot = PoofsRobot(100, 100, 0, 5000, 200, (28, 28), Piece(PieceType.CONE, Vector3()))
+    return Environment(robots=[robot], startingPieces=[]), robot
+
+
+def driverIntent(frame, dropFrame):
+    intent = ControlIntent()
+    intent.targetVel = Vector2(50, 80) if frame < 40 else Vector2(-30, 20)
+    intent.rotSpeed = 10
+    intent.jointVelocities = {"elevator": 20 if frame < 30 else -10, "laterator": 15}
+    intent.drop = frame == dropFrame
+    intent.pieceToAdd = PieceType.CUBE if frame == 45 else None
+    return intent
+
+
+def heldType(robot):
+    return None if robot.pieceHeld is None else robot.pieceHeld.type
+
+
+@pytest.mark.parametrize("dropFrame", [None, 20])
+def test_replay_reproduces_recorded_session(tmp_path, dropFrame):
+    path = tmp_path / "session.tlog"
+    env, robot = buildEnv()
+    # recorded the way EnvironmentVisualizer.run(dt, teleop=True) records: intent, apply, step
+    with IntentRecorder(path, robot) as recorder:
+        for frame in range(60):
+            intent = driverIntent(frame, dropFrame)
+            recorder.record(env.time, intent, DT)
+            env.applyIntent(robot, intent)
+            env.update(DT)
+
+    replayEnv, replayed = buildEnv()
+    controller = ReplayController(replayed, readIntentLog(path))
+    replaySession(replayEnv, [controller], DT)
+
+    assert replayEnv.time == env.time
+    assert (replayed.pos.x, replayed.pos.y, replayed.theta) == (robot.pos.x, robot.pos.y, robot.theta)
+    assert (replayed.elevator.height, replayed.laterator.height) == (robot.elevator.height, robot.laterator.height)
+    assert heldType(robot) == (PieceType.CONE if dropFrame is None else None)
+    assert heldType(replayed) == heldType(robot)
+    assert [(piece.type, piece.pos) for piece in replayEnv.pieces] == [(piece.type, piece.pos) for piece in env.pieces]